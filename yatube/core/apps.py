@@ -1,5 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .db_router import mark_written
+        from .sqlite import configure_connection
+        connection_created.connect(configure_connection)
+        post_save.connect(mark_written, dispatch_uid='core.mark_written')
+        post_delete.connect(mark_written, dispatch_uid='core.mark_written')
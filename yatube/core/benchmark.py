@@ -0,0 +1,193 @@
+"""
+Нагрузочный бенчмарк маршрутов posts, users и about.
+
+seed() наполняет базу через bulk_create, measure() обходит все
+маршруты и снимает число SQL-запросов, время ответа и пиковую память,
+compare() сравнивает результат с сохраненной базовой линией.
+Запускается командой `python manage.py benchmark`.
+"""
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from posts import counters, timeline
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+BATCH_SIZE = 5000
+NAMESPACES = ('posts', 'users', 'about')
+USERNAME = 'bench_user_{i}'
+DEFAULT_VOLUMES = {
+    'users': 1000,
+    'groups': 20,
+    'posts': 20000,
+    'follows': 20000,
+    'comments': 200,
+}
+# Абсолютный допуск по времени, мс: защищает быстрые маршруты от шума.
+TIME_NOISE_MS = 5.0
+
+
+def _batches(items, size=BATCH_SIZE):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _bulk_create(model, objects, **kwargs):
+    for batch in _batches(objects):
+        model.objects.bulk_create(batch, **kwargs)
+
+
+def seed(volumes, rng=None):
+    """
+    Наполняет базу данными объема volumes и возвращает читателя,
+    от имени которого обходятся маршруты.
+    """
+    rng = rng or random.Random(0)
+    with transaction.atomic():
+        _bulk_create(User, (
+            User(username=USERNAME.format(i=i), password='!')
+            for i in range(volumes['users'])))
+        user_ids = list(User.objects.values_list('pk', flat=True))
+        _bulk_create(Group, (
+            Group(title=f'Группа {i}', slug=f'bench-group-{i}',
+                  description='Группа для бенчмарка')
+            for i in range(volumes['groups'])))
+        group_ids = list(Group.objects.values_list('pk', flat=True))
+        _bulk_create(Post, (
+            Post(text=f'Пост {i} для бенчмарка. ' * 5,
+                 author_id=rng.choice(user_ids),
+                 group_id=rng.choice(group_ids + [None]))
+            for i in range(volumes['posts'])))
+        _bulk_create(Follow, (
+            Follow(user_id=rng.choice(user_ids),
+                   author_id=rng.choice(user_ids))
+            for _ in range(volumes['follows'])), ignore_conflicts=True)
+        Follow.objects.filter(user=user_ids[0]).delete()
+        reader = User.objects.get(pk=user_ids[0])
+        authors = rng.sample(user_ids[1:], min(50, len(user_ids) - 1))
+        Follow.objects.bulk_create(
+            [Follow(user=reader, author_id=pk) for pk in authors])
+        post = Post.objects.first()
+        _bulk_create(Comment, (
+            Comment(post=post, author_id=rng.choice(user_ids),
+                    text=f'Комментарий {i}')
+            for i in range(volumes['comments'])))
+        counters.repair()
+        for follow in Follow.objects.filter(user=reader).select_related(
+                'user', 'author'):
+            timeline.backfill(follow.user, follow.author)
+    return reader
+
+
+def _patterns(resolver, namespace=None):
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _patterns(pattern, pattern.namespace or namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield namespace, pattern
+
+
+def routes(reader):
+    """Возвращает {имя маршрута: url} для всех маршрутов NAMESPACES."""
+    post = Post.objects.first()
+    kwargs_values = {
+        'slug': Group.objects.first().slug,
+        'username': post.author.username,
+        'post_id': post.pk,
+        'uidb64': urlsafe_base64_encode(force_bytes(reader.pk)),
+        'token': default_token_generator.make_token(reader),
+    }
+    result = {}
+    for namespace, pattern in _patterns(get_resolver()):
+        if namespace not in NAMESPACES:
+            continue
+        name = f'{namespace}:{pattern.name}'
+        kwargs = {key: kwargs_values[key]
+                  for key in pattern.pattern.converters}
+        result[name] = reverse(name, kwargs=kwargs)
+    return result
+
+
+def _request(client, reader, url):
+    cache.clear()
+    client.force_login(reader)
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = client.get(url)
+        elapsed = time.perf_counter() - started
+    return response, len(queries.captured_queries), elapsed
+
+
+def measure(reader, repeat=3):
+    """
+    Обходит все маршруты и возвращает
+    {имя: {'status', 'queries', 'time_ms', 'memory_kb'}}.
+    """
+    client = Client()
+    results = {}
+    for name, url in sorted(routes(reader).items()):
+        timings = []
+        for _ in range(repeat):
+            response, queries, elapsed = _request(client, reader, url)
+            timings.append(elapsed)
+        tracemalloc.start()
+        _request(client, reader, url)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = {
+            'status': response.status_code,
+            'queries': queries,
+            'time_ms': round(statistics.median(timings) * 1000, 2),
+            'memory_kb': round(peak / 1024, 1),
+        }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Возвращает список регрессий results относительно baseline:
+    больше запросов, чем в базовой линии, время и память больше
+    базовых более чем на долю tolerance, а также маршруты без
+    базовой линии - их нужно снять с --update-baseline.
+    """
+    regressions = [f'{name}: нет в базовой линии'
+                   for name in sorted(set(results) - set(baseline))]
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None:
+            regressions.append(f'{name}: маршрут не найден')
+            continue
+        if current['queries'] > base['queries']:
+            regressions.append(
+                f"{name}: запросов {current['queries']} "
+                f"> {base['queries']}")
+        time_limit = max(base['time_ms'] * (1 + tolerance),
+                         base['time_ms'] + TIME_NOISE_MS)
+        if current['time_ms'] > time_limit:
+            regressions.append(
+                f"{name}: время {current['time_ms']} мс "
+                f"> {round(time_limit, 2)} мс")
+        memory_limit = base['memory_kb'] * (1 + tolerance)
+        if current['memory_kb'] > memory_limit:
+            regressions.append(
+                f"{name}: память {current['memory_kb']} КБ "
+                f"> {round(memory_limit, 1)} КБ")
+    return regressions
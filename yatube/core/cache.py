@@ -0,0 +1,80 @@
+"""
+Защита кэша от «давки» (cache stampede).
+
+Значение хранится вместе со временем вычисления и логическим сроком
+жизни; физически запись живет дольше, чтобы устаревшее значение можно
+было отдать, пока его пересчитывает другой процесс. Пересчет начинается
+чуть раньше истечения срока с вероятностью, растущей к его концу
+(probabilistic early expiration, XFetch), и выполняется только тем
+воркером, который захватил блокировку через cache.add.
+"""
+import math
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+LOCK_TIMEOUT = settings.CACHE_LOCK_TIMEOUT
+BETA = settings.CACHE_EARLY_EXPIRATION_BETA
+POLL_INTERVAL = 0.05
+LOCK_KEY = '{key}:lock'
+
+
+def _is_expired(delta, expires, beta):
+    """Решает, пора ли пересчитывать значение (алгоритм XFetch)."""
+    jitter = -delta * beta * math.log(1.0 - random.random())
+    return time.time() + jitter >= expires
+
+
+def _compute_and_store(key, compute, timeout):
+    started = time.time()
+    value = compute()
+    finished = time.time()
+    envelope = (value, finished - started, finished + timeout)
+    cache.set(key, envelope, timeout * 2)
+    return value
+
+
+def _acquire(key, lock_timeout):
+    token = uuid.uuid4().hex
+    if cache.add(LOCK_KEY.format(key=key), token, lock_timeout):
+        return token
+    return None
+
+
+def _release(key, token):
+    lock_key = LOCK_KEY.format(key=key)
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def get_or_compute(key, compute, timeout, beta=BETA,
+                   lock_timeout=LOCK_TIMEOUT):
+    """
+    Возвращает значение key из кэша, вычисляя его через compute()
+    не более чем в одном воркере одновременно. Остальные воркеры
+    получают устаревшее значение или ждут первого вычисления
+    не дольше lock_timeout секунд.
+    """
+    envelope = cache.get(key)
+    if envelope is not None:
+        value, delta, expires = envelope
+        if not _is_expired(delta, expires, beta):
+            return value
+    token = _acquire(key, lock_timeout)
+    if token is not None:
+        try:
+            return _compute_and_store(key, compute, timeout)
+        finally:
+            _release(key, token)
+    if envelope is not None:
+        return envelope[0]
+    deadline = time.time() + lock_timeout
+    while time.time() < deadline:
+        time.sleep(POLL_INTERVAL)
+        envelope = cache.get(key)
+        if envelope is not None:
+            return envelope[0]
+    return _compute_and_store(key, compute, timeout)
@@ -0,0 +1,309 @@
+"""
+Кэш в файле SQLite, общий для всех процессов одного сервера.
+
+В отличие от LocMemCache, воркеры gunicorn видят одни и те же
+записи: фрагменты ленты хранятся один раз и у всех пользователей
+одинаковы. Записи вытесняются по давности последнего чтения (LRU),
+когда число записей превышает MAX_ENTRIES или их общий размер -
+MAX_SIZE байт. Счетчики попаданий, промахов и вытеснений копятся
+в процессе и сбрасываются в файл каждые STATS_FLUSH_EVERY операций
+и при выходе; stats() возвращает общую статистику всех процессов.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache_backends.SQLiteCache',
+            'LOCATION': '/var/tmp/yatube-cache.sqlite3',
+            'OPTIONS': {'MAX_ENTRIES': 10000, 'MAX_SIZE': 64 * 2 ** 20},
+        }
+    }
+"""
+import atexit
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_entries_accessed ON cache_entries(accessed);
+CREATE INDEX IF NOT EXISTS cache_entries_expires ON cache_entries(expires);
+CREATE TABLE IF NOT EXISTS cache_totals (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_totals VALUES (1, 0, 0);
+CREATE TABLE IF NOT EXISTS cache_stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_stats VALUES
+    ('hits', 0), ('misses', 0), ('evictions', 0);
+CREATE TRIGGER IF NOT EXISTS cache_entries_insert
+AFTER INSERT ON cache_entries BEGIN
+    UPDATE cache_totals
+    SET entries = entries + 1, bytes = bytes + NEW.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_entries_delete
+AFTER DELETE ON cache_entries BEGIN
+    UPDATE cache_totals
+    SET entries = entries - 1, bytes = bytes - OLD.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_entries_update
+AFTER UPDATE OF size ON cache_entries BEGIN
+    UPDATE cache_totals SET bytes = bytes + NEW.size - OLD.size WHERE id = 1;
+END;
+'''
+UPSERT = '''
+INSERT INTO cache_entries(key, value, expires, accessed, size)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(key) DO UPDATE SET
+    value = excluded.value, expires = excluded.expires,
+    accessed = excluded.accessed, size = excluded.size
+'''
+# Время последнего чтения обновляется не чаще раза в секунду,
+# чтобы чтения почти никогда не требовали записи.
+ACCESS_RESOLUTION = 1.0
+# После вытеснения кэш заполнен не больше чем на эту долю лимитов.
+CULL_TARGET = 0.9
+# Сколько операций копятся счетчики процесса до сброса в файл.
+STATS_FLUSH_EVERY = 100
+BUSY_TIMEOUT = 5.0
+
+
+class SQLiteCache(BaseCache):
+    """Кэш Django в файле SQLite с LRU-вытеснением и статистикой."""
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.location = location
+        self.max_size = int(options.get('MAX_SIZE', 64 * 2 ** 20))
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._pending = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._operations = 0
+        atexit.register(self._flush_at_exit)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.location, timeout=BUSY_TIMEOUT, isolation_level=None,
+                check_same_thread=False)
+            connection.execute('PRAGMA journal_mode = wal')
+            connection.execute('PRAGMA synchronous = normal')
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _count(self, name, value=1):
+        with self._stats_lock:
+            self._pending[name] += value
+            self._operations += 1
+            flush = self._operations >= STATS_FLUSH_EVERY
+        if flush:
+            self._flush_stats()
+
+    def _flush_stats(self):
+        with self._stats_lock:
+            pending = self._pending
+            self._pending = {name: 0 for name in pending}
+            self._operations = 0
+        if not any(pending.values()):
+            return
+        self._connection().executemany(
+            'UPDATE cache_stats SET value = value + ? WHERE name = ?',
+            [(value, name) for name, value in pending.items() if value])
+
+    def _flush_at_exit(self):
+        try:
+            self._flush_stats()
+        except sqlite3.Error:
+            pass
+
+    def _fetch(self, keys):
+        """Возвращает {ключ: значение} непросроченных записей keys."""
+        now = time.time()
+        connection = self._connection()
+        placeholders = ', '.join('?' * len(keys))
+        rows = connection.execute(
+            f'SELECT key, value, expires, accessed FROM cache_entries '
+            f'WHERE key IN ({placeholders})', keys).fetchall()
+        found = {}
+        stale = []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                continue
+            found[key] = pickle.loads(value)
+            if accessed < now - ACCESS_RESOLUTION:
+                stale.append((now, key))
+        if stale:
+            connection.executemany(
+                'UPDATE cache_entries SET accessed = ? WHERE key = ?', stale)
+        return found
+
+    def _store(self, items, timeout, only_new=False):
+        """Записывает items {ключ: значение}; возвращает записанные ключи."""
+        now = time.time()
+        expires = self.get_backend_timeout(timeout)
+        connection = self._connection()
+        stored = []
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for key, value in items.items():
+                if only_new:
+                    row = connection.execute(
+                        'SELECT expires FROM cache_entries WHERE key = ?',
+                        (key,)).fetchone()
+                    if row and (row[0] is None or row[0] > now):
+                        continue
+                data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+                connection.execute(
+                    UPSERT, (key, data, expires, now, len(data)))
+                stored.append(key)
+            self._cull(connection, now)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return stored
+
+    def _totals(self, connection):
+        return connection.execute(
+            'SELECT entries, bytes FROM cache_totals WHERE id = 1').fetchone()
+
+    def _cull(self, connection, now):
+        """Удаляет просроченные, затем давно не читанные записи."""
+        entries, size = self._totals(connection)
+        if entries <= self._max_entries and size <= self.max_size:
+            return
+        evicted = connection.execute(
+            'DELETE FROM cache_entries WHERE expires <= ?', (now,)).rowcount
+        entries, size = self._totals(connection)
+        while entries and (entries > self._max_entries * CULL_TARGET
+                           or size > self.max_size * CULL_TARGET):
+            batch = max(1, entries // 10)
+            evicted += connection.execute(
+                'DELETE FROM cache_entries WHERE key IN (SELECT key '
+                'FROM cache_entries ORDER BY accessed LIMIT ?)',
+                (batch,)).rowcount
+            entries, size = self._totals(connection)
+        if evicted:
+            self._count('evictions', evicted)
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        found = self._fetch([key])
+        if key in found:
+            self._count('hits')
+            return found[key]
+        self._count('misses')
+        return default
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        found = self._fetch(list(keys))
+        if found:
+            self._count('hits', len(found))
+        if len(found) < len(keys):
+            self._count('misses', len(keys) - len(found))
+        return {keys[key]: value for key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store({self._key(key, version): value}, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store({self._key(key, version): value
+                     for key, value in data.items()}, timeout)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return bool(self._store(
+            {self._key(key, version): value}, timeout, only_new=True))
+
+    def incr(self, key, delta=1, version=None):
+        """
+        Увеличивает значение key на delta в одной транзакции записи:
+        одновременные incr разных процессов не теряют приращений.
+        """
+        key = self._key(key, version)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT value FROM cache_entries WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (key, time.time())).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            connection.execute(
+                'UPDATE cache_entries SET value = ?, size = ? WHERE key = ?',
+                (data, len(data), key))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        cursor = self._connection().execute(
+            'UPDATE cache_entries SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()))
+        return cursor.rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return self._connection().execute(
+            'SELECT 1 FROM cache_entries WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (key, time.time())).fetchone() is not None
+
+    def delete(self, key, version=None):
+        self._connection().execute(
+            'DELETE FROM cache_entries WHERE key = ?',
+            (self._key(key, version),))
+
+    def delete_many(self, keys, version=None):
+        self._connection().executemany(
+            'DELETE FROM cache_entries WHERE key = ?',
+            [(self._key(key, version),) for key in keys])
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache_entries')
+
+    def close(self, **kwargs):
+        """Соединение потока переиспользуется между запросами."""
+
+    def stats(self):
+        """
+        Возвращает статистику кэша всех процессов: число записей,
+        размер, попадания, промахи, вытеснения и долю попаданий.
+        """
+        self._flush_stats()
+        connection = self._connection()
+        result = dict(connection.execute(
+            'SELECT name, value FROM cache_stats').fetchall())
+        result['entries'], result['bytes'] = self._totals(connection)
+        lookups = result['hits'] + result['misses']
+        result['hit_rate'] = (
+            round(result['hits'] / lookups, 4) if lookups else None)
+        return result
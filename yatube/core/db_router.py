@@ -0,0 +1,90 @@
+"""
+Чтение с реплик и запись в основную базу.
+
+ReplicaRouter отправляет запись в основную базу, а чтение - на одну
+из реплик (алиасы DATABASES с префиксом replica_), но только внутри
+запроса, который ReplicaMiddleware разрешил читать с реплик: безопасный
+метод и нет cookie «липкости». Если запрос сохранил или удалил модель
+(сигналы post_save и post_delete, см. mark_written), пользователь
+получает cookie на REPLICA_STICKY_SECONDS секунд и все это время читает
+с основной базы, поэтому сразу видит свои изменения. db_for_write
+для этого не годится: его вызывают и чтения вроде get_or_create. Вне запросов
+(команды, shell, тесты) и во view с use_primary все идет в основную базу.
+"""
+import functools
+import random
+import threading
+
+from django.conf import settings
+
+PRIMARY = 'default'
+REPLICA_PREFIX = 'replica_'
+# Данные этих приложений всегда читаются с основной базы.
+PRIMARY_APPS = ('sessions',)
+_state = threading.local()
+
+
+def replica_aliases():
+    """Возвращает алиасы реплик из settings.DATABASES."""
+    return [alias for alias in settings.DATABASES
+            if alias.startswith(REPLICA_PREFIX)]
+
+
+def reads_from_primary():
+    """Проверяет, закреплено ли чтение за основной базой."""
+    return getattr(_state, 'primary', True)
+
+
+def set_primary(primary):
+    """Закрепляет (или открепляет) чтение текущего потока."""
+    _state.primary = primary
+
+
+def pop_written():
+    """Возвращает и сбрасывает признак записи в текущем потоке."""
+    written = getattr(_state, 'written', False)
+    _state.written = False
+    return written
+
+
+def mark_written(sender, **kwargs):
+    """
+    Приемник post_save и post_delete: отмечает запись в текущем потоке.
+    Запись данных PRIMARY_APPS (сессий) чтение не закрепляет.
+    """
+    if sender._meta.app_label not in PRIMARY_APPS:
+        _state.written = True
+
+
+def use_primary(view):
+    """Декоратор: view читает и пишет только в основную базу."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        previous = reads_from_primary()
+        set_primary(True)
+        try:
+            return view(*args, **kwargs)
+        finally:
+            set_primary(previous)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Роутер баз данных с чтением с реплик."""
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        if (not self.replicas or reads_from_primary()
+                or model._meta.app_label in PRIMARY_APPS):
+            return PRIMARY
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
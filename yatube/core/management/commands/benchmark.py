@@ -0,0 +1,78 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+
+from core import benchmark
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmark_baseline.json')
+
+
+class Command(BaseCommand):
+    help = ('Наполняет отдельную тестовую базу SQLite данными заданного '
+            'объема, обходит маршруты posts, users и about и сравнивает '
+            'число запросов, время и память с базовой линией.')
+
+    def add_arguments(self, parser):
+        for name, default in benchmark.DEFAULT_VOLUMES.items():
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Количество объектов {name} (по умолчанию {default}).')
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Сколько раз запрашивать каждый маршрут.')
+        parser.add_argument(
+            '--baseline', default=DEFAULT_BASELINE,
+            help='JSON-файл с базовой линией.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.5,
+            help='Допустимый рост времени и памяти (0.5 = +50%%).')
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Сохранить результаты как новую базовую линию.')
+
+    def handle(self, *args, **options):
+        volumes = {name: options[name] for name in benchmark.DEFAULT_VOLUMES}
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f'Наполнение базы: {volumes}')
+            reader = benchmark.seed(volumes)
+            results = benchmark.measure(reader, repeat=options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for name, result in results.items():
+            self.stdout.write(
+                '{name:40} {status} {queries:>4} запр. {time_ms:>9} мс '
+                '{memory_kb:>9} КБ'.format(name=name, **result))
+
+        if options['update_baseline']:
+            with open(options['baseline'], 'w', encoding='utf-8') as file:
+                json.dump({'volumes': volumes, 'routes': results},
+                          file, ensure_ascii=False, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(
+                f"Базовая линия сохранена в {options['baseline']}"))
+            return
+
+        if not os.path.exists(options['baseline']):
+            raise CommandError(
+                'Нет базовой линии, запустите с --update-baseline.')
+        with open(options['baseline'], encoding='utf-8') as file:
+            baseline = json.load(file)
+        if baseline['volumes'] != volumes:
+            raise CommandError(
+                'Базовая линия снята на других объемах данных: '
+                f"{baseline['volumes']}.")
+        regressions = benchmark.compare(
+            results, baseline['routes'], options['tolerance'])
+        if regressions:
+            raise CommandError(
+                'Регрессии производительности:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
@@ -0,0 +1,18 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ('Выводит статистику общего кэша: число записей, размер, '
+            'попадания, промахи, вытеснения и долю попаданий.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alias', default='default')
+
+    def handle(self, *args, **options):
+        cache = caches[options['alias']]
+        if not hasattr(cache, 'stats'):
+            raise CommandError(
+                f'Бэкенд {type(cache).__name__} не ведет статистику.')
+        for name, value in cache.stats().items():
+            self.stdout.write(f'{name}: {value}')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core import ratelimit
+
+
+class Command(BaseCommand):
+    help = ('Выводит число отклоненных (429) запросов '
+            'по областям ограничения частоты.')
+
+    def handle(self, *args, **options):
+        for scope, limited in ratelimit.stats().items():
+            self.stdout.write(
+                '{scope}: отклонено {limited}, лимит {rate}'.format(
+                    scope=scope, limited=limited,
+                    rate=ratelimit.RATE_LIMITS[scope]))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.sqlite import concurrency_benchmark
+
+JOURNAL_MODES = ('delete', 'wal')
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает чтение SQLite во время непрерывной записи '
+            'в режимах журнала DELETE и WAL с PRAGMA из настроек.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--duration', type=float, default=2.0,
+            help='Длительность замера для каждого режима, секунды.')
+        parser.add_argument(
+            '--readers', type=int, default=4,
+            help='Количество потоков чтения.')
+
+    def handle(self, *args, **options):
+        for mode in JOURNAL_MODES:
+            result = concurrency_benchmark(
+                mode, duration=options['duration'],
+                readers=options['readers'])
+            self.stdout.write(
+                '{mode:8} чтений {reads:>7}  записей {writes:>5}  '
+                'медиана {read_median_ms:>8} мс  p99 {read_p99_ms:>8} мс'
+                '  блокировок {locked_errors}'.format(mode=mode, **result))
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import startup
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время запуска (импорт настроек, django.setup, '
+            'WSGI-приложение) и первого запроса в профилях dev и prod.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Сколько процессов запускать для каждого профиля.')
+
+    def handle(self, *args, **options):
+        for profile in startup.PROFILES:
+            result = startup.run(
+                profile, settings.BASE_DIR, repeat=options['repeat'])
+            self.stdout.write(
+                '{profile:5} запуск {startup_ms:>8} мс  первый запрос '
+                '{first_request_ms:>8} мс  модулей {modules:>5}  '
+                'статус {status}'.format(profile=profile, **result))
@@ -0,0 +1,27 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.db_router import PRIMARY, replica_aliases
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в файлы реплик '
+            '(DATABASE_REPLICAS) через online backup API.')
+
+    def handle(self, *args, **options):
+        aliases = replica_aliases()
+        if not aliases:
+            raise CommandError('Реплики не настроены: DATABASE_REPLICAS.')
+        source = sqlite3.connect(settings.DATABASES[PRIMARY]['NAME'])
+        try:
+            for alias in aliases:
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{alias}: синхронизирована')
+        finally:
+            source.close()
@@ -0,0 +1,60 @@
+import random
+
+from django.conf import settings
+
+from . import perf
+from .db_router import pop_written, set_primary
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_COOKIE = 'read_primary'
+STICKY_SECONDS = settings.REPLICA_STICKY_SECONDS
+PERF_SAMPLE_RATE = settings.PERF_SAMPLE_RATE
+
+
+class ReplicaMiddleware:
+    """
+    Разрешает безопасным запросам читать с реплик. Пользователь,
+    только что записавший данные, получает cookie и следующие
+    STICKY_SECONDS секунд читает с основной базы.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        set_primary(request.method not in SAFE_METHODS
+                    or STICKY_COOKIE in request.COOKIES)
+        pop_written()
+        try:
+            response = self.get_response(request)
+        finally:
+            set_primary(True)
+        if pop_written():
+            response.set_cookie(
+                STICKY_COOKIE, '1', max_age=STICKY_SECONDS,
+                httponly=True, samesite='Lax')
+        return response
+
+
+class PerformanceMiddleware:
+    """
+    Для доли PERF_SAMPLE_RATE запросов собирает число и время
+    SQL-запросов, время рендеринга шаблонов, попадания в кэш и размер
+    ответа, добавляет их в заголовок Server-Timing и передает
+    в приемник settings.PERF_METRICS_SINK.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sink = perf.get_sink(settings.PERF_METRICS_SINK)
+
+    def __call__(self, request):
+        if random.random() >= PERF_SAMPLE_RATE:
+            return self.get_response(request)
+        metrics = perf.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            perf.stop(metrics)
+        record = metrics.record(request, response)
+        response['Server-Timing'] = perf.server_timing(record)
+        self.sink(record)
+        return response
@@ -0,0 +1,260 @@
+import base64
+import binascii
+import heapq
+import json
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+COUNT_PER_PAGE = settings.COUNT_PER_PAGE
+LAST_PAGE = 'last'
+
+
+class CursorPaginator(Paginator):
+    """
+    Пагинатор по ключу сортировки (keyset pagination).
+
+    Вместо LIMIT/OFFSET и COUNT(*) страница выбирается условием
+    «строго после/до курсора» по полям сортировки queryset'а,
+    поэтому время выборки не зависит от глубины страницы.
+    Курсор - непрозрачный токен с закодированными значениями полей
+    сортировки последнего (первого) объекта страницы.
+    """
+    def __init__(self, object_list, per_page, ordering=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.ordering = tuple(
+            ordering
+            or object_list.query.order_by
+            or object_list.model._meta.ordering
+        )
+        self._num_pages = 1
+
+    @property
+    def num_pages(self):
+        """
+        Число «известных» страниц относительно текущей: курсорная
+        пагинация не считает общее количество объектов.
+        """
+        return self._num_pages
+
+    def _fields(self):
+        opts = self.object_list.model._meta
+        for name in self.ordering:
+            descending = name.startswith('-')
+            name = name.lstrip('-')
+            field = opts.pk if name == 'pk' else opts.get_field(name)
+            yield field, descending
+
+    def encode_cursor(self, obj):
+        """
+        Возвращает токен курсора для объекта obj
+        или словаря из queryset.values().
+        """
+        values = []
+        for field, _ in self._fields():
+            if isinstance(obj, dict):
+                value = obj[field.attname]
+            else:
+                value = getattr(obj, field.attname)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        """
+        Возвращает значения полей сортировки из токена
+        или None, если токен некорректен.
+        """
+        fields = list(self._fields())
+        try:
+            padding = '=' * (-len(token) % 4)
+            values = json.loads(base64.urlsafe_b64decode(token + padding))
+        except (binascii.Error, ValueError, TypeError):
+            return None
+        if not isinstance(values, list) or len(values) != len(fields):
+            return None
+        try:
+            return [field.to_python(value)
+                    for (field, _), value in zip(fields, values)]
+        except Exception:
+            return None
+
+    def _keyset_filter(self, values, forward):
+        """
+        Строит условие «строго после курсора» (forward=True)
+        или «строго до курсора» в порядке сортировки. Условие
+        по первому полю (pub_date <= X) повторяется отдельно:
+        без него SQLite не читает индекс диапазоном из-за OR.
+        """
+        condition = Q()
+        bound = Q()
+        equal = {}
+        for (field, descending), value in zip(self._fields(), values):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= Q(**equal, **{f'{field.attname}__{lookup}': value})
+            if not equal:
+                bound = Q(**{f'{field.attname}__{lookup}e': value})
+            equal[field.attname] = value
+        return bound & condition
+
+    def _reversed_ordering(self):
+        return [name[1:] if name.startswith('-') else '-' + name
+                for name in self.ordering]
+
+    def get_rows(self, values, forward, limit):
+        """
+        Возвращает до limit объектов после курсора values (forward=True)
+        или до него в обратном порядке; values=None - от начала
+        или от конца выборки.
+        """
+        ordering = self.ordering if forward else self._reversed_ordering()
+        queryset = self.object_list.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._keyset_filter(values, forward))
+        return list(queryset[:limit])
+
+    def get_cursor_page(self, after=None, before=None):
+        """
+        Возвращает страницу, следующую за курсором after,
+        или предшествующую курсору before. Без курсоров - первая
+        страница, before=LAST_PAGE - последняя.
+        """
+        values = None
+        forward = True
+        has_previous = False
+        if after:
+            values = self.decode_cursor(after)
+            has_previous = values is not None
+        elif before:
+            forward = False
+            if before != LAST_PAGE:
+                values = self.decode_cursor(before)
+                if values is None:
+                    return self.get_cursor_page()
+        rows = self.get_rows(values, forward, self.per_page + 1)
+        has_more = len(rows) > self.per_page
+        if not forward and not has_more and before != LAST_PAGE:
+            # Дошли до начала выборки - показываем полную первую страницу.
+            return self.get_cursor_page()
+        rows = rows[:self.per_page]
+        if forward:
+            has_next = has_more
+        else:
+            rows.reverse()
+            has_next = before != LAST_PAGE and bool(rows)
+            has_previous = has_more
+        number = 2 if has_previous else 1
+        self._num_pages = number + 1 if has_next else number
+        page = Page(rows, number, self)
+        page.next_cursor = self.encode_cursor(rows[-1]) if has_next else ''
+        page.previous_cursor = (
+            self.encode_cursor(rows[0]) if has_previous else '')
+        return page
+
+
+class MergedCursorPaginator(CursorPaginator):
+    """
+    Курсорный пагинатор по нескольким источникам (CursorPaginator)
+    с общим ключом сортировки, например лента из записей и постов
+    популярных авторов. Каждый источник отдает не больше страницы
+    от курсора по своему индексу, строки сливаются heapq.merge,
+    одинаковые по ключу сортировки показываются один раз.
+    object_list и ordering описывают объекты, которые отдают источники.
+    """
+    def __init__(self, object_list, per_page, sources, ordering=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, ordering=ordering, **kwargs)
+        self.sources = sources
+
+    def _key(self, obj):
+        return tuple(getattr(obj, field.attname)
+                     for field, _ in self._fields())
+
+    def get_rows(self, values, forward, limit):
+        descending = self.ordering[0].startswith('-')
+        merged = heapq.merge(
+            *(source.get_rows(values, forward, limit)
+              for source in self.sources),
+            key=self._key, reverse=descending == forward)
+        rows = []
+        seen = set()
+        for row in merged:
+            key = self._key(row)
+            if key in seen:
+                continue
+            seen.add(key)
+            rows.append(row)
+            if len(rows) == limit:
+                break
+        return rows
+
+
+class SequencePaginator(Paginator):
+    """
+    Пагинатор уже упорядоченного списка, например результатов
+    поиска по релевантности. Курсор - позиция в списке, поэтому
+    ссылки страниц те же, что у CursorPaginator.
+    """
+    def __init__(self, object_list, per_page, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._num_pages = 1
+
+    @property
+    def num_pages(self):
+        """Число «известных» страниц относительно текущей."""
+        return self._num_pages
+
+    def _position(self, token):
+        try:
+            return min(max(int(token), 0), len(self.object_list))
+        except (TypeError, ValueError):
+            return 0
+
+    def get_cursor_page(self, after=None, before=None):
+        """
+        Возвращает страницу, начинающуюся с позиции after
+        или заканчивающуюся перед позицией before.
+        """
+        total = len(self.object_list)
+        if after:
+            start = self._position(after)
+        elif before == LAST_PAGE:
+            start = max(total - self.per_page, 0)
+        elif before:
+            start = max(self._position(before) - self.per_page, 0)
+        else:
+            start = 0
+        end = min(start + self.per_page, total)
+        number = 2 if start else 1
+        self._num_pages = number + 1 if end < total else number
+        page = Page(self.object_list[start:end], number, self)
+        page.next_cursor = str(end) if end < total else ''
+        page.previous_cursor = str(start) if start else ''
+        return page
+
+
+def paginate(request, object_list, per_page=COUNT_PER_PAGE, ordering=None):
+    """
+    Возвращает страницу object_list по курсорам
+    из GET-параметров after/before запроса.
+    """
+    paginator = CursorPaginator(object_list, per_page, ordering=ordering)
+    return paginator.get_cursor_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+
+
+def paginate_sequence(request, sequence, per_page=COUNT_PER_PAGE):
+    """
+    Возвращает страницу упорядоченного списка sequence по позициям
+    из GET-параметров after/before запроса.
+    """
+    paginator = SequencePaginator(sequence, per_page)
+    return paginator.get_cursor_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
@@ -0,0 +1,154 @@
+"""
+Сбор метрик производительности запроса.
+
+Для выборки запросов (settings.PERF_SAMPLE_RATE) PerformanceMiddleware
+включает сбор: число и время SQL-запросов всех баз (execute_wrapper
+соединений), время рендеринга шаблонов (шаблонизатор
+core.template_backends.DjangoTemplates), попадания и промахи кэша
+(обертки get и get_many экземпляра кэша текущего потока). Обертки
+SQL и кэша ставятся на время запроса из выборки и снимаются после
+него; классы Django не меняются, а запросы вне выборки не измеряются.
+Сигнал template_rendered для времени шаблонов не подходит: Django
+отправляет его только в тестовом окружении.
+"""
+import functools
+import json
+import logging
+import threading
+import time
+
+from django.core.cache import caches
+from django.db import connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('yatube.performance')
+_state = threading.local()
+_MISSING = object()
+CACHE_METHODS = ('get', 'get_many')
+
+
+class Metrics:
+    """Метрики одного запроса."""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._rendering = False
+        self._cache_call = False
+
+    def execute(self, execute, sql, params, many, context):
+        """Обертка connection.execute_wrapper: время SQL-запроса."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def render(self, render, *args, **kwargs):
+        """Время рендеринга шаблона без вложенных рендерингов."""
+        if self._rendering:
+            return render(*args, **kwargs)
+        self._rendering = True
+        started = time.perf_counter()
+        try:
+            return render(*args, **kwargs)
+        finally:
+            self.template_time += time.perf_counter() - started
+            self._rendering = False
+
+    def cache_get(self, get, key, default=None, version=None):
+        """Обертка cache.get: попадание или промах."""
+        if self._cache_call:
+            return get(key, default, version)
+        value = get(key, _MISSING, version)
+        if value is _MISSING:
+            self.cache_misses += 1
+            return default
+        self.cache_hits += 1
+        return value
+
+    def cache_get_many(self, get_many, keys, version=None):
+        """Обертка cache.get_many: попадания и промахи по ключам."""
+        keys = list(keys)
+        # get_many бэкенда может читать ключи через get.
+        self._cache_call = True
+        try:
+            values = get_many(keys, version)
+        finally:
+            self._cache_call = False
+        self.cache_hits += len(values)
+        self.cache_misses += len(keys) - len(values)
+        return values
+
+    def record(self, request, response):
+        """Возвращает метрики запроса в виде словаря."""
+        match = request.resolver_match
+        size = None if response.streaming else len(response.content)
+        return {
+            'view': match.view_name if match else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'db_queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'template_ms': round(self.template_time * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'response_bytes': size,
+        }
+
+
+def current():
+    """Возвращает метрики текущего запроса или None вне выборки."""
+    return getattr(_state, 'metrics', None)
+
+
+def start():
+    """Начинает сбор метрик в текущем потоке."""
+    metrics = Metrics()
+    _state.metrics = metrics
+    for connection in connections.all():
+        connection.execute_wrappers.append(metrics.execute)
+    # Экземпляр кэша у каждого потока свой, обертки видит только он.
+    cache = caches['default']
+    cache.get = functools.partial(metrics.cache_get, cache.get)
+    cache.get_many = functools.partial(metrics.cache_get_many,
+                                       cache.get_many)
+    return metrics
+
+
+def stop(metrics):
+    """Заканчивает сбор метрик в текущем потоке."""
+    for connection in connections.all():
+        if metrics.execute in connection.execute_wrappers:
+            connection.execute_wrappers.remove(metrics.execute)
+    cache = caches['default']
+    for name in CACHE_METHODS:
+        cache.__dict__.pop(name, None)
+    _state.metrics = None
+
+
+def server_timing(record):
+    """Возвращает значение заголовка Server-Timing для record."""
+    return ', '.join((
+        f'db;dur={record["db_ms"]};desc="{record["db_queries"]} queries"',
+        f'tpl;dur={record["template_ms"]}',
+        f'cache;desc="hits={record["cache_hits"]} '
+        f'misses={record["cache_misses"]}"',
+        f'total;dur={record["total_ms"]}',
+    ))
+
+
+def log_sink(record):
+    """Приемник метрик по умолчанию: JSON-строка в лог."""
+    logger.info(json.dumps(record, ensure_ascii=False))
+
+
+def get_sink(path):
+    """Возвращает приемник метрик по пути импорта."""
+    return import_string(path)
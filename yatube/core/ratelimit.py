@@ -0,0 +1,130 @@
+"""
+Ограничение частоты записей (скользящее окно) в кэше.
+
+У каждой пары «область, пользователь» (для анонима - IP) есть счетчики
+запросов в окнах длиной в период (settings.RATE_LIMITS, например
+'10/m' - 10 запросов в минуту). Число запросов за последний период
+оценивается как счетчик текущего окна плюс счетчик предыдущего,
+взвешенный долей периода, которая еще не прошла:
+previous * (1 - elapsed / period) + current. Поэтому пачка запросов
+на стыке окон не проходит в двойном объеме, как при фиксированном
+окне. Счетчик создается cache.add и увеличивается cache.incr - обе
+операции атомарны в кэше, поэтому одновременные запросы разных
+процессов не проходят сверх лимита; отклоненный запрос возвращает
+счетчик назад cache.decr. Если лимит исчерпан, декоратор ratelimit
+отвечает 429 с Retry-After до момента, когда запрос пройдет, не вызывая
+представление и не обращаясь к базе. Общий кэш (core.cache_backends)
+ограничивает все процессы сервера вместе. Число отклоненных запросов
+по областям возвращает stats().
+"""
+import functools
+import time
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+RATE_LIMITS = settings.RATE_LIMITS
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+WINDOW_KEY = 'ratelimit:{scope}:{ident}:{window}'
+LIMITED_KEY = 'ratelimit:stats:{scope}:limited'
+
+
+def parse_rate(rate):
+    """Возвращает (число запросов, период в секундах) для '10/m'."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def _ident(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{request.META.get("REMOTE_ADDR", "")}'
+
+
+def _increment(key, timeout):
+    """Атомарно увеличивает счетчик key и возвращает новое значение."""
+    if cache.add(key, 1, timeout):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Запись истекла между add и incr.
+        return _increment(key, timeout)
+
+
+def _decrement(key):
+    try:
+        cache.decr(key)
+    except ValueError:
+        pass
+
+
+def _wait(limit, period, elapsed, previous, current):
+    """
+    Возвращает число секунд, через которое оценка окна с учетом нового
+    запроса не превысит limit. current - счетчик текущего окна вместе
+    с новым запросом.
+    """
+    if current < limit:
+        # Ждем, пока вес предыдущего окна уменьшится.
+        return period * (1 - (limit - current) / previous) - elapsed
+    # Ждем следующего окна: в нем текущее станет предыдущим,
+    # а новый запрос - первым.
+    wait = period - elapsed
+    if current > limit:
+        wait += period * (current - limit) / (current - 1)
+    return wait
+
+
+def take(scope, ident, rate):
+    """
+    Учитывает запрос ident в области scope. Возвращает 0, если лимит
+    за последний период не исчерпан, иначе число секунд до момента,
+    когда запрос пройдет.
+    """
+    limit, period = parse_rate(rate)
+    now = time.time()
+    window = int(now // period)
+    elapsed = now - window * period
+    key = WINDOW_KEY.format(scope=scope, ident=ident, window=window)
+    # Счетчик окна нужен и в следующем окне как предыдущий.
+    current = _increment(key, 2 * period)
+    previous = cache.get(
+        WINDOW_KEY.format(scope=scope, ident=ident, window=window - 1), 0)
+    if previous * (1 - elapsed / period) + current <= limit:
+        return 0
+    _decrement(key)
+    _increment(LIMITED_KEY.format(scope=scope), None)
+    return _wait(limit, period, elapsed, previous, current)
+
+
+def ratelimit(scope, methods=('POST',)):
+    """
+    Декоратор представления: ограничивает запросы methods (None - все)
+    частотой settings.RATE_LIMITS[scope] на пользователя или IP.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            rate = RATE_LIMITS.get(scope)
+            if rate and (methods is None or request.method in methods):
+                retry_after = take(scope, _ident(request), rate)
+                if retry_after:
+                    response = HttpResponse(
+                        'Слишком много запросов.',
+                        content_type='text/plain; charset=utf-8',
+                        status=HTTPStatus.TOO_MANY_REQUESTS)
+                    response['Retry-After'] = max(1, round(retry_after))
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def stats():
+    """Возвращает {область: число отклоненных запросов}."""
+    keys = {scope: LIMITED_KEY.format(scope=scope) for scope in RATE_LIMITS}
+    values = cache.get_many(list(keys.values()))
+    return {scope: values.get(key, 0) for scope, key in keys.items()}
@@ -0,0 +1,113 @@
+"""
+Настройка соединений SQLite для работы под нагрузкой.
+
+При создании каждого соединения выполняются PRAGMA из
+settings.SQLITE_PRAGMAS: журнал WAL (читатели не ждут писателя),
+synchronous=NORMAL, время ожидания блокировки, размер кэша страниц
+и mmap. concurrency_benchmark() сравнивает чтение во время записи
+в разных режимах журнала (команда `python manage.py sqlite_concurrency`).
+"""
+import os
+import re
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+PRAGMAS = settings.SQLITE_PRAGMAS
+PRAGMA_VALUE_RE = re.compile(r'^-?\w+$')
+
+
+def apply_pragmas(connection, pragmas=None):
+    """Выполняет PRAGMA pragmas на соединении sqlite3 connection."""
+    for name, value in (PRAGMAS if pragmas is None else pragmas).items():
+        value = str(value)
+        if not PRAGMA_VALUE_RE.match(value):
+            raise ValueError(f'Недопустимое значение PRAGMA {name}: {value}')
+        connection.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Обработчик connection_created: настраивает новое соединение."""
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection.connection)
+
+
+def _connect(path, pragmas):
+    connection = sqlite3.connect(
+        path, timeout=0, isolation_level=None, check_same_thread=False)
+    apply_pragmas(connection, pragmas)
+    return connection
+
+
+def _write(path, pragmas, stop, rows, hold):
+    connection = _connect(path, pragmas)
+    written = 0
+    while not stop.is_set():
+        connection.execute('BEGIN IMMEDIATE')
+        connection.executemany(
+            'INSERT INTO bench(text) VALUES (?)',
+            [('x' * 200,)] * rows)
+        time.sleep(hold)
+        connection.execute('COMMIT')
+        written += 1
+    connection.close()
+    return written
+
+
+def _read(path, pragmas, stop, latencies, errors):
+    connection = _connect(path, pragmas)
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            connection.execute(
+                'SELECT id, text FROM bench ORDER BY id DESC LIMIT 10'
+            ).fetchall()
+        except sqlite3.OperationalError:
+            errors.append(1)
+            continue
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+
+
+def concurrency_benchmark(journal_mode, duration=2.0, readers=4,
+                          rows=100, hold=0.01):
+    """
+    Пишет в файл SQLite в одном потоке и читает в readers потоках
+    duration секунд. Возвращает число чтений и транзакций записи,
+    медиану и 99-й перцентиль времени чтения (мс) и число ошибок
+    «database is locked».
+    """
+    pragmas = dict(PRAGMAS, journal_mode=journal_mode)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite3')
+        connection = _connect(path, pragmas)
+        connection.execute(
+            'CREATE TABLE bench (id INTEGER PRIMARY KEY, text TEXT)')
+        connection.close()
+        stop = threading.Event()
+        latencies, errors, written = [], [], []
+        threads = [threading.Thread(
+            target=_read, args=(path, pragmas, stop, latencies, errors))
+            for _ in range(readers)]
+        threads.append(threading.Thread(target=lambda: written.append(
+            _write(path, pragmas, stop, rows, hold))))
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    reads = len(latencies)
+    latencies = sorted(latencies) or [0]
+    return {
+        'reads': reads,
+        'writes': sum(written),
+        'read_median_ms': round(statistics.median(latencies) * 1000, 3),
+        'read_p99_ms': round(
+            latencies[int(len(latencies) * 0.99)] * 1000, 3),
+        'locked_errors': len(errors),
+    }
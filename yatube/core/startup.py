@@ -0,0 +1,54 @@
+"""
+Бенчмарк запуска проекта в профилях настроек.
+
+measure() выполняется в отдельном процессе с заданным DJANGO_ENV:
+замеряет время импорта настроек и django.setup() вместе
+с созданием WSGI-приложения, число загруженных модулей и время
+первого запроса к странице без обращений к базе.
+Запускается командой `python manage.py startup_benchmark`.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROFILES = ('dev', 'prod')
+URL = '/about/author/'
+CHILD = 'from core.startup import measure; measure()'
+
+
+def measure():
+    """Замеряет запуск текущего процесса и печатает результат в JSON."""
+    started = time.perf_counter()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    from django.core.wsgi import get_wsgi_application
+    get_wsgi_application()
+    loaded = time.perf_counter()
+    from django.test import Client
+    response = Client().get(URL)
+    finished = time.perf_counter()
+    print(json.dumps({
+        'status': response.status_code,
+        'modules': len(sys.modules),
+        'startup_ms': round((loaded - started) * 1000, 2),
+        'first_request_ms': round((finished - loaded) * 1000, 2),
+    }))
+
+
+def run(profile, base_dir, repeat=5):
+    """
+    Запускает measure() repeat раз в новых процессах с профилем profile
+    и возвращает медианы замеров.
+    """
+    env = dict(os.environ, DJANGO_ENV=profile, ALLOWED_HOSTS='testserver',
+               DJANGO_SETTINGS_MODULE='yatube.settings')
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', CHILD], cwd=base_dir, env=env,
+            check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: statistics.median(run[key] for run in runs)
+            for key in runs[0]}
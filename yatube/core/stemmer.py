@@ -0,0 +1,137 @@
+"""
+Стеммер русского языка (алгоритм Snowball/Портера).
+
+Приводит слово к основе, отбрасывая окончания и суффиксы: «постами»,
+«постов» и «пост» дают одну основу «пост». Слова без кириллицы
+возвращаются без изменений.
+"""
+import functools
+
+VOWELS = 'аеиоуыэюя'
+# Окончания первой группы отбрасываются, только если перед ними а или я.
+PRECEDING = 'ая'
+# Сколько основ слов запоминается между вызовами stem().
+CACHE_SIZE = 2 ** 16
+
+
+def _endings(preceded, plain):
+    """
+    Возвращает таблицу окончаний {окончание: нужна ли перед ним а/я}
+    и длину самого длинного окончания.
+    """
+    table = dict.fromkeys(plain, False)
+    table.update(dict.fromkeys(preceded, True))
+    return table, max(map(len, table))
+
+
+PERFECTIVE_GERUND = _endings(
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+REFLEXIVE = _endings((), ('ся', 'сь'))
+ADJECTIVE = _endings((), (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+))
+PARTICIPLE = _endings(
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+VERB = _endings(
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+     'ет', 'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+     'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+     'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = _endings((), (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+    'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+    'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+    'ья', 'я',
+))
+SUPERLATIVE = _endings((), ('ейше', 'ейш'))
+DERIVATIONAL = _endings((), ('ость', 'ост'))
+
+
+def _regions(word):
+    """
+    Возвращает начала областей RV (после первой гласной),
+    R1 и R2 (после первой согласной, следующей за гласной).
+    """
+    rv = r1 = r2 = len(word)
+    for i, letter in enumerate(word):
+        if letter in VOWELS:
+            rv = i + 1
+            break
+    for i in range(1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            r1 = i + 1
+            break
+    for i in range(r1 + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            r2 = i + 1
+            break
+    return rv, r1, r2
+
+
+def _strip(word, start, endings):
+    """
+    Отбрасывает самое длинное окончание из endings, лежащее в word
+    не левее start. Возвращает None, если окончание не найдено.
+    """
+    table, longest = endings
+    for length in range(min(longest, len(word) - start), 0, -1):
+        needs_preceding = table.get(word[-length:])
+        if needs_preceding is None:
+            continue
+        cut = len(word) - length
+        if needs_preceding and (cut - 1 < start
+                                or word[cut - 1] not in PRECEDING):
+            return None
+        return word[:cut]
+    return None
+
+
+def _step_one(word, rv):
+    stripped = _strip(word, rv, PERFECTIVE_GERUND)
+    if stripped is not None:
+        return stripped
+    stripped = _strip(word, rv, REFLEXIVE)
+    if stripped is not None:
+        word = stripped
+    stripped = _strip(word, rv, ADJECTIVE)
+    if stripped is not None:
+        participle = _strip(stripped, rv, PARTICIPLE)
+        return stripped if participle is None else participle
+    for endings in (VERB, NOUN):
+        stripped = _strip(word, rv, endings)
+        if stripped is not None:
+            return stripped
+    return word
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def stem(word):
+    """Возвращает основу слова word."""
+    word = word.lower().replace('ё', 'е')
+    rv, _, r2 = _regions(word)
+    if rv == len(word):
+        return word
+    word = _step_one(word, rv)
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    stripped = _strip(word, r2, DERIVATIONAL)
+    if stripped is not None:
+        word = stripped
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        return word[:-1]
+    stripped = _strip(word, rv, SUPERLATIVE)
+    if stripped is not None:
+        if stripped.endswith('нн') and len(stripped) - 2 >= rv:
+            return stripped[:-1]
+        return stripped
+    if word.endswith('ь') and len(word) - 1 >= rv:
+        return word[:-1]
+    return word
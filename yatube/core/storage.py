@@ -0,0 +1,78 @@
+"""
+Файловое хранилище с именами из хэша содержимого.
+
+Файл сохраняется как <каталог>/ab/cd/<sha256><расширение>, где ab и cd -
+первые символы хэша: одинаковые файлы хранятся один раз, каталоги
+остаются небольшими, а содержимое по одному имени никогда не меняется,
+поэтому такие URL можно кэшировать навсегда (is_immutable). Метка
+после ~ в имени (image~processed.webp) сохраняется:
+<sha256>~processed.webp. get_valid_name удаляет ~ из имен загрузок,
+поэтому метку может поставить только код. Повторное
+сохранение существующего файла обновляет время его изменения: по нему
+сборка мусора (posts.images.collect) не трогает файлы, которые только
+что понадобились.
+"""
+import hashlib
+import os
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+SHARD_DEPTH = 2
+SHARD_WIDTH = 2
+# Имена из хэша: наши (sha256) и миниатюры sorl-thumbnail (md5) -
+# шарды совпадают с началом хэша.
+IMMUTABLE_RE = re.compile(
+    r'(?:^|/)([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{28}(?:[0-9a-f]{32})?'
+    r'(?:~\w+)?\.\w+$')
+TAG_SEPARATOR = '~'
+
+
+def is_immutable(name):
+    """Проверяет, что файл name назван по хэшу содержимого."""
+    return bool(IMMUTABLE_RE.search(name))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище FileSystemStorage, которое называет файлы по хэшу
+    содержимого и не сохраняет повторно уже существующий файл.
+    """
+    def get_content_name(self, name, content):
+        """Возвращает имя файла content в каталоге имени name."""
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        directory, filename = posixpath.split(name)
+        stem, extension = os.path.splitext(filename)
+        _, separator, tag = stem.rpartition(TAG_SEPARATOR)
+        shards = [digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH]
+                  for i in range(SHARD_DEPTH)]
+        return posixpath.join(
+            directory, *shards,
+            digest + (separator + tag if separator else '')
+            + extension.lower())
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_content_name(name, content)
+        if self.exists(name):
+            try:
+                os.utime(self.path(name))
+                return name
+            except FileNotFoundError:
+                # Файл удалили между проверкой и обновлением времени.
+                pass
+        saved = super().save(name, content, max_length=max_length)
+        if saved != name:
+            # Тот же файл одновременно сохранил другой процесс.
+            self.delete(saved)
+        return name
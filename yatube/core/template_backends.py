@@ -0,0 +1,34 @@
+"""
+Шаблонизатор Django с учетом времени рендеринга в метриках запроса.
+
+Подключается в TEMPLATES вместо DjangoTemplates:
+
+    'BACKEND': 'core.template_backends.DjangoTemplates'
+
+Для запросов из выборки (core.perf) время рендеринга шаблона
+добавляется к метрикам запроса, для остальных шаблон рендерится
+как обычно.
+"""
+from django.template import TemplateDoesNotExist
+from django.template.backends import django
+
+from . import perf
+
+
+class Template(django.Template):
+    def render(self, context=None, request=None):
+        metrics = perf.current()
+        if metrics is None:
+            return super().render(context, request)
+        return metrics.render(super().render, context, request)
+
+
+class DjangoTemplates(django.DjangoTemplates):
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django.reraise(exc, self)
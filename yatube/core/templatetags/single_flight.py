@@ -0,0 +1,50 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from core.cache import get_or_compute
+
+register = template.Library()
+
+
+class SingleFlightCacheNode(template.Node):
+    def __init__(self, nodelist, timeout, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        try:
+            timeout = int(self.timeout.resolve(context))
+        except (template.VariableDoesNotExist, ValueError, TypeError):
+            raise template.TemplateSyntaxError(
+                '"single_flight_cache" tag got an invalid timeout: %r'
+                % self.timeout.token)
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        key = make_template_fragment_key(self.fragment_name, vary_on)
+        return get_or_compute(
+            key, lambda: self.nodelist.render(context), timeout)
+
+
+@register.tag
+def single_flight_cache(parser, token):
+    """
+    Кэширует фрагмент шаблона как {% cache %}, но пересчитывает его
+    в одном воркере, пока остальные отдают устаревшее значение.
+
+    {% single_flight_cache [timeout] [fragment_name] [var1] .. %}
+        ...
+    {% endsingle_flight_cache %}
+    """
+    nodelist = parser.parse(('endsingle_flight_cache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            '%r tag requires at least 2 arguments.' % tokens[0])
+    return SingleFlightCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(t) for t in tokens[3:]],
+    )
@@ -1,5 +1,46 @@
+import importlib
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 from http import HTTPStatus
-from django.test import TestCase
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core import benchmark, ratelimit, startup
+from core.cache import get_or_compute
+from core.cache_backends import SQLiteCache
+from core.db_router import PRIMARY, ReplicaRouter, use_primary
+from core.middleware import STICKY_COOKIE, ReplicaMiddleware
+from core.sqlite import apply_pragmas, concurrency_benchmark
+from core.storage import ContentAddressedStorage, is_immutable
+from core.views import serve_media
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+METRICS = []
+
+
+def collect_metrics(record):
+    """Приемник метрик для тестов."""
+    METRICS.append(record)
 
 
 class ViewsTestClass(TestCase):
@@ -21,3 +62,571 @@ class ViewsTestClass(TestCase):
         """
         response = self.client.get('/unexpected_page/')
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class SingleFlightCacheTest(TestCase):
+    """
+    Класс используется для создания тестов по проверке
+    защиты кэша от одновременного пересчета.
+    """
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        """
+        При одновременном промахе значение вычисляет один поток,
+        остальные дожидаются результата.
+        """
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                get_or_compute('key', compute, 60)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 8)
+
+    def test_stale_value_served_while_locked(self):
+        """
+        Пока другой воркер пересчитывает значение, отдается
+        устаревшее значение.
+        """
+        get_or_compute('key', lambda: 'old', 60)
+        cache.add('key:lock', 'other-worker', 10)
+        with mock.patch('core.cache._is_expired', return_value=True):
+            value = get_or_compute('key', lambda: 'new', 60)
+        self.assertEqual(value, 'old')
+
+    def test_expired_value_recomputed(self):
+        """Устаревшее значение пересчитывается захватившим блокировку."""
+        get_or_compute('key', lambda: 'old', 60)
+        with mock.patch('core.cache._is_expired', return_value=True):
+            value = get_or_compute('key', lambda: 'new', 60)
+        self.assertEqual(value, 'new')
+        self.assertIsNone(cache.get('key:lock'))
+
+    def test_template_tag_caches_fragment(self):
+        """Тег single_flight_cache кэширует фрагмент шаблона."""
+        template = Template(
+            '{% load single_flight %}'
+            '{% single_flight_cache 60 fragment name %}'
+            '{{ value }}{% endsingle_flight_cache %}')
+        first = template.render(Context({'name': 'a', 'value': 1}))
+        second = template.render(Context({'name': 'a', 'value': 2}))
+        other = template.render(Context({'name': 'b', 'value': 3}))
+        self.assertEqual((first, second, other), ('1', '1', '3'))
+
+
+class BenchmarkTest(TestCase):
+    """
+    Класс используется для создания тестов по проверке
+    бенчмарка маршрутов.
+    """
+    def test_measure_covers_every_route(self):
+        """Бенчмарк обходит все маршруты posts, users и about."""
+        reader = benchmark.seed({
+            'users': 5, 'groups': 2, 'posts': 20,
+            'follows': 10, 'comments': 3,
+        })
+        results = benchmark.measure(reader, repeat=1)
+        self.assertIn('posts:index', results)
+        self.assertIn('users:signup', results)
+        self.assertIn('about:tech', results)
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertLess(result['status'], 400)
+                self.assertGreater(result['queries'], 0)
+
+    def test_compare_reports_regressions(self):
+        """Сравнение с базовой линией находит регрессии."""
+        baseline = {
+            'posts:index': {'queries': 3, 'time_ms': 10.0,
+                            'memory_kb': 100.0},
+        }
+        same = {'posts:index': {'queries': 3, 'time_ms': 12.0,
+                                'memory_kb': 120.0}}
+        worse = {'posts:index': {'queries': 13, 'time_ms': 40.0,
+                                 'memory_kb': 400.0}}
+        self.assertEqual(benchmark.compare(same, baseline, 0.5), [])
+        self.assertEqual(len(benchmark.compare(worse, baseline, 0.5)), 3)
+        self.assertEqual(len(benchmark.compare({}, baseline, 0.5)), 1)
+        new_route = dict(same, **{'posts:new': same['posts:index']})
+        self.assertEqual(benchmark.compare(new_route, baseline, 0.5),
+                         ['posts:new: нет в базовой линии'])
+
+    def test_baseline_covers_every_route(self):
+        """Сохраненная базовая линия содержит все маршруты."""
+        reader = benchmark.seed({
+            'users': 5, 'groups': 2, 'posts': 20,
+            'follows': 10, 'comments': 3,
+        })
+        path = os.path.join(settings.BASE_DIR, 'benchmark_baseline.json')
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)
+        self.assertEqual(
+            sorted(set(benchmark.routes(reader)) - set(baseline['routes'])),
+            [])
+
+
+class SqlitePragmasTest(TestCase):
+    """
+    Класс используется для создания тестов по проверке
+    настройки соединений SQLite.
+    """
+    def test_connection_pragmas_are_applied(self):
+        """Соединение Django получает PRAGMA из настроек."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            busy_timeout = cursor.fetchone()[0]
+            cursor.execute('PRAGMA synchronous')
+            synchronous = cursor.fetchone()[0]
+        self.assertEqual(
+            busy_timeout, settings.SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(synchronous, 1)
+
+    def test_invalid_pragma_value_is_rejected(self):
+        """Значение PRAGMA из окружения не попадает в SQL как есть."""
+        with self.assertRaises(ValueError):
+            apply_pragmas(sqlite3.connect(':memory:'),
+                          {'journal_mode': 'wal; DROP TABLE x'})
+
+    def test_reads_proceed_during_write_in_wal(self):
+        """В режиме WAL чтение не блокируется открытой записью."""
+        for mode, blocked in (('delete', True), ('wal', False)):
+            with self.subTest(mode=mode), \
+                    tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'test.sqlite3')
+                pragmas = dict(settings.SQLITE_PRAGMAS,
+                               journal_mode=mode, busy_timeout=0)
+                writer = sqlite3.connect(path, isolation_level=None)
+                reader = sqlite3.connect(path, isolation_level=None)
+                for db in (writer, reader):
+                    apply_pragmas(db, pragmas)
+                writer.execute('CREATE TABLE t (id INTEGER PRIMARY KEY)')
+                writer.execute('BEGIN EXCLUSIVE')
+                writer.execute('INSERT INTO t DEFAULT VALUES')
+                try:
+                    reader.execute('SELECT COUNT(*) FROM t').fetchone()
+                except sqlite3.OperationalError:
+                    was_blocked = True
+                else:
+                    was_blocked = False
+                writer.execute('COMMIT')
+                writer.close()
+                reader.close()
+                self.assertEqual(was_blocked, blocked)
+
+    def test_concurrency_benchmark(self):
+        """Бенчмарк конкурентного доступа выполняет чтение и запись."""
+        result = concurrency_benchmark('wal', duration=0.2, readers=2)
+        self.assertGreater(result['reads'], 0)
+        self.assertGreater(result['writes'], 0)
+        self.assertEqual(result['locked_errors'], 0)
+
+
+class SQLiteCacheTest(TestCase):
+    """
+    Класс используется для создания тестов по проверке
+    общего кэша в файле SQLite.
+    """
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, 'cache.sqlite3')
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.location, {'OPTIONS': options})
+
+    def test_cache_operations(self):
+        """Кэш поддерживает операции API кэша Django."""
+        cache = self.make_cache()
+        cache.set('a', {'x': 1})
+        self.assertEqual(cache.get('a'), {'x': 1})
+        self.assertIsNone(cache.get('missing'))
+        self.assertFalse(cache.add('a', 2))
+        self.assertTrue(cache.add('b', 2))
+        cache.set_many({'c': 3, 'd': 4}, timeout=None)
+        self.assertEqual(cache.get_many(['a', 'c', 'missing']),
+                         {'a': {'x': 1}, 'c': 3})
+        self.assertEqual(cache.incr('b'), 3)
+        cache.delete_many(['c', 'd'])
+        self.assertNotIn('c', cache)
+        cache.set('e', 5, timeout=-1)
+        self.assertIsNone(cache.get('e'))
+        self.assertTrue(cache.add('e', 6))
+        cache.clear()
+        self.assertIsNone(cache.get('a'))
+
+    def test_concurrent_incr(self):
+        """Одновременные incr из разных потоков не теряют приращений."""
+        cache = self.make_cache()
+        cache.set('counter', 0)
+
+        def worker():
+            for _ in range(50):
+                cache.incr('counter')
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(cache.get('counter'), 200)
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+
+    def test_lru_eviction_by_entries(self):
+        """Сверх MAX_ENTRIES вытесняются давно не читанные записи."""
+        cache = self.make_cache(MAX_ENTRIES=10)
+        with mock.patch('core.cache_backends.time.time') as clock:
+            for number in range(10):
+                clock.return_value = 1000.0 + number * 10
+                cache.set(f'key{number}', number, timeout=None)
+            clock.return_value = 2000.0
+            self.assertEqual(cache.get('key0'), 0)
+            cache.set('key10', 10, timeout=None)
+        stats = cache.stats()
+        self.assertLessEqual(stats['entries'], 9)
+        self.assertGreater(stats['evictions'], 0)
+        self.assertEqual(cache.get('key0'), 0)
+        self.assertEqual(cache.get('key10'), 10)
+        self.assertIsNone(cache.get('key1'))
+
+    def test_eviction_by_size(self):
+        """Общий размер записей не превышает MAX_SIZE."""
+        cache = self.make_cache(MAX_SIZE=10000)
+        for number in range(20):
+            cache.set(f'key{number}', 'x' * 1000)
+        self.assertLessEqual(cache.stats()['bytes'], 10000)
+        self.assertIsNotNone(cache.get('key19'))
+
+    def test_stats(self):
+        """Статистика считает попадания и промахи."""
+        cache = self.make_cache()
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get_many(['a', 'b'])
+        cache.get('c')
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['hit_rate'], 0.5)
+        self.assertEqual(stats['entries'], 1)
+
+    def test_shared_between_processes(self):
+        """Записи одного процесса видны другому процессу."""
+        cache = self.make_cache()
+        cache.set('shared', 'from parent')
+        script = (
+            'import sys\n'
+            'from core.cache_backends import SQLiteCache\n'
+            'cache = SQLiteCache(sys.argv[1], {})\n'
+            'print(cache.get("shared"))\n'
+            'cache.set("child", "from child")\n'
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', script, self.location],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+            check=True)
+        self.assertEqual(result.stdout.strip(), 'from parent')
+        self.assertEqual(cache.get('child'), 'from child')
+        self.assertEqual(cache.stats()['hits'], 2)
+
+
+class RateLimitTest(TestCase):
+    """
+    Класс используется для создания тестов по проверке
+    ограничения частоты записей.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_sliding_window(self):
+        """
+        Окно пропускает N запросов за период, а Retry-After указывает
+        момент, когда запрос пройдет.
+        """
+        with mock.patch('core.ratelimit.time.time', return_value=1000.0):
+            self.assertEqual(ratelimit.take('scope', 'a', '2/m'), 0)
+            self.assertEqual(ratelimit.take('scope', 'a', '2/m'), 0)
+            self.assertAlmostEqual(
+                ratelimit.take('scope', 'a', '2/m'), 50.0)
+            self.assertEqual(ratelimit.take('scope', 'b', '2/m'), 0)
+        with mock.patch('core.ratelimit.time.time', return_value=1049.0):
+            self.assertAlmostEqual(
+                ratelimit.take('scope', 'a', '2/m'), 1.0)
+        with mock.patch('core.ratelimit.time.time', return_value=1050.0):
+            self.assertEqual(ratelimit.take('scope', 'a', '2/m'), 0)
+            self.assertAlmostEqual(
+                ratelimit.take('scope', 'a', '2/m'), 30.0)
+
+    def test_burst_across_window_edge(self):
+        """
+        Пачка запросов на стыке окон не проходит сверх лимита:
+        предыдущее окно учитывается с весом.
+        """
+        results = []
+        for now in (1019.0, 1019.5, 1020.5, 1021.0):
+            with mock.patch('core.ratelimit.time.time', return_value=now):
+                results.append(ratelimit.take('scope', 'a', '2/m'))
+        self.assertEqual(results[:2], [0, 0])
+        self.assertTrue(all(results[2:]))
+
+    def test_concurrent_requests_do_not_exceed_limit(self):
+        """Одновременные запросы не проходят сверх лимита."""
+        results = []
+
+        def worker():
+            for _ in range(10):
+                results.append(ratelimit.take('scope', 'a', '10/h'))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(0), 10)
+
+    def test_view_returns_429_before_db_work(self):
+        """Сверх лимита представление не вызывается."""
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.pk})
+        with mock.patch.dict('core.ratelimit.RATE_LIMITS',
+                             {'add_comment': '1/m'}):
+            self.client.post(url, {'text': 'Первый'})
+            with self.assertNumQueries(2):
+                response = self.client.post(url, {'text': 'Второй'})
+            stats = ratelimit.stats()['add_comment']
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertIn(int(response['Retry-After']), range(1, 121))
+        self.assertEqual(Comment.objects.filter(post=self.post).count(), 1)
+        self.assertEqual(stats, 1)
+
+    def test_only_limited_methods_are_counted(self):
+        """Открытие формы поста не учитывается в лимите."""
+        with mock.patch.dict('core.ratelimit.RATE_LIMITS',
+                             {'post_create': '1/m'}):
+            for _ in range(3):
+                response = self.client.get(reverse('posts:post_create'))
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class ContentAddressedStorageTest(TestCase):
+    """
+    Класс используется для создания тестов по проверке хранилища
+    с именами из хэша содержимого.
+    """
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = directory.name
+        self.storage = ContentAddressedStorage(location=self.location)
+
+    def test_same_content_is_stored_once(self):
+        """Одинаковое содержимое сохраняется один раз под одним именем."""
+        first = self.storage.save('posts/a.JPG', ContentFile(b'data'))
+        second = self.storage.save('posts/b.jpg', ContentFile(b'data'))
+        other = self.storage.save('posts/c.jpg', ContentFile(b'other'))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertRegex(first, r'^posts/([0-9a-f]{2})/([0-9a-f]{2})/'
+                                r'\1\2[0-9a-f]{60}\.jpg$')
+        with self.storage.open(first) as stored:
+            self.assertEqual(stored.read(), b'data')
+        self.assertEqual(len(os.listdir(os.path.join(
+            self.location, os.path.dirname(first)))), 1)
+
+    def test_is_immutable(self):
+        """Неизменными считаются только имена из хэша содержимого."""
+        name = self.storage.save('posts/a.jpg', ContentFile(b'data'))
+        self.assertTrue(is_immutable(name))
+        self.assertTrue(is_immutable(
+            'cache/0a/1b/0a1b' + '0' * 28 + '.jpg'))
+        tagged = self.storage.save('posts/a~processed.jpg',
+                                   ContentFile(b'data'))
+        self.assertEqual(tagged, name.replace('.jpg', '~processed.jpg'))
+        self.assertTrue(is_immutable(tagged))
+        self.assertFalse(is_immutable('posts/photo.jpg'))
+        self.assertFalse(is_immutable(
+            'cache/0a/1b/ffff' + '0' * 28 + '.jpg'))
+
+    def test_serve_media_cache_control(self):
+        """Файлы с именами из хэша отдаются с Cache-Control: immutable."""
+        name = self.storage.save('posts/a.jpg', ContentFile(b'data'))
+        with open(os.path.join(self.location, 'plain.txt'), 'wb') as stream:
+            stream.write(b'text')
+        request = RequestFactory().get('/media/')
+        response = serve_media(request, name, self.location)
+        self.assertIn('immutable', response['Cache-Control'])
+        response = serve_media(request, 'plain.txt', self.location)
+        self.assertFalse(response.has_header('Cache-Control'))
+
+
+class ReplicaRouterTest(TestCase):
+    """
+    Класс используется для создания тестов по проверке
+    маршрутизации чтения на реплики.
+    """
+    def setUp(self) -> None:
+        self.router = ReplicaRouter()
+        self.router.replicas = ['replica_0']
+        self.factory = RequestFactory()
+
+    def route(self, request, view=None):
+        """Возвращает базу чтения внутри view и ответ middleware."""
+        used = []
+
+        def default_view(request):
+            used.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        response = ReplicaMiddleware(view or default_view)(request)
+        return used, response
+
+    def test_reads_outside_requests_use_primary(self):
+        """Вне запроса чтение идет в основную базу."""
+        self.assertEqual(self.router.db_for_read(Post), PRIMARY)
+
+    def test_safe_request_reads_from_replica(self):
+        """Безопасный запрос читает с реплики, запись - в основную базу."""
+        used, response = self.route(self.factory.get('/'))
+        self.assertEqual(used, ['replica_0'])
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+        self.assertEqual(self.router.db_for_write(Post), PRIMARY)
+
+    def test_write_makes_reads_sticky(self):
+        """После записи пользователь читает с основной базы."""
+        def write_view(request):
+            Group.objects.create(title='Группа', slug='group')
+            return HttpResponse()
+
+        used, response = self.route(self.factory.get('/'), write_view)
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE] = '1'
+        used, _ = self.route(request)
+        self.assertEqual(used, [PRIMARY])
+
+    def test_routing_write_alone_is_not_sticky(self):
+        """
+        Выбор базы для записи и сохранение сессии не закрепляют
+        чтение за основной базой.
+        """
+        def view(request):
+            self.router.db_for_write(Post)
+            SessionStore().create()
+            return HttpResponse()
+
+        _, response = self.route(self.factory.get('/'), view)
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_primary_only_reads(self):
+        """POST, use_primary и сессии читают с основной базы."""
+        used, _ = self.route(self.factory.post('/'))
+        self.assertEqual(used, [PRIMARY])
+        used = []
+
+        @use_primary
+        def view(request):
+            used.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        self.route(self.factory.get('/'), view)
+        self.assertEqual(used, [PRIMARY])
+        self.route(self.factory.get('/'), lambda request: HttpResponse(
+            used.append(self.router.db_for_read(Session))))
+        self.assertEqual(used, [PRIMARY, PRIMARY])
+
+
+@override_settings(PERF_METRICS_SINK='core.tests.collect_metrics')
+class PerformanceMiddlewareTest(TestCase):
+    """
+    Класс используется для создания тестов по проверке
+    сбора метрик производительности запросов.
+    """
+    def setUp(self) -> None:
+        cache.clear()
+        METRICS.clear()
+
+    def test_sampled_request_reports_metrics(self):
+        """Запрос из выборки получает Server-Timing и попадает в приемник."""
+        with mock.patch('core.middleware.PERF_SAMPLE_RATE', 1.0):
+            self.client.get(reverse('posts:index'))
+            response = self.client.get(reverse('posts:index'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('tpl;dur=', response['Server-Timing'])
+        first, second = METRICS
+        self.assertEqual(first['view'], 'posts:index')
+        self.assertGreater(first['db_queries'], 0)
+        self.assertGreater(first['template_ms'], 0)
+        self.assertGreater(first['cache_misses'], 0)
+        self.assertGreater(second['cache_hits'], 0)
+        self.assertEqual(second['response_bytes'], len(response.content))
+
+    def test_request_outside_sample_is_not_measured(self):
+        """Запрос вне выборки не измеряется."""
+        with mock.patch('core.middleware.PERF_SAMPLE_RATE', 0.0):
+            response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(METRICS, [])
+
+    def test_instrumentation_is_removed_after_request(self):
+        """
+        Обертки кэша снимаются после запроса из выборки, а под
+        тестами метрики не пишутся в лог.
+        """
+        with mock.patch('core.middleware.PERF_SAMPLE_RATE', 1.0):
+            self.client.get(reverse('posts:index'))
+        for name in ('get', 'get_many'):
+            self.assertNotIn(name, vars(caches['default']))
+        self.assertEqual(connection.execute_wrappers, [])
+        self.assertTrue(settings.TESTING)
+        self.assertFalse(logging.getLogger(
+            'yatube.performance').isEnabledFor(logging.INFO))
+
+
+class SettingsProfilesTest(TestCase):
+    """
+    Класс используется для создания тестов по проверке
+    профилей настроек dev и prod.
+    """
+    def test_prod_profile(self):
+        """Боевой профиль без отладки, с кэшем шаблонов и соединений."""
+        prod = importlib.import_module('yatube.settings.prod')
+        self.assertFalse(prod.DEBUG)
+        self.assertNotIn('debug_toolbar', prod.INSTALLED_APPS)
+        self.assertFalse(any('debug_toolbar' in name
+                             for name in prod.MIDDLEWARE))
+        loader, _ = prod.TEMPLATES[0]['OPTIONS']['loaders'][0]
+        self.assertEqual(loader, 'django.template.loaders.cached.Loader')
+        self.assertGreater(prod.DATABASES['default']['CONN_MAX_AGE'], 0)
+        self.assertEqual(prod.CACHES['default']['BACKEND'],
+                         'core.cache_backends.SQLiteCache')
+
+    def test_dev_profile(self):
+        """Профиль разработки подключает debug_toolbar."""
+        dev = importlib.import_module('yatube.settings.dev')
+        self.assertTrue(dev.DEBUG)
+        self.assertIn('debug_toolbar', dev.INSTALLED_APPS)
+
+    def test_startup_benchmark(self):
+        """Бенчмарк запуска замеряет профиль в отдельном процессе."""
+        result = startup.run('prod', settings.BASE_DIR, repeat=1)
+        self.assertEqual(result['status'], HTTPStatus.OK)
+        self.assertGreater(result['startup_ms'], 0)
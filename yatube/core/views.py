@@ -1,6 +1,12 @@
+from django.conf import settings
 from django.shortcuts import render
+from django.views import static
 from http import HTTPStatus
 
+from .storage import is_immutable
+
+IMMUTABLE_MAX_AGE = settings.MEDIA_IMMUTABLE_MAX_AGE
+
 
 def page_not_found(request, exception):
     """Отображение страницы ошибки 404 NOT Found."""
@@ -28,3 +34,15 @@ def server_error(request):
     """Отображение страницы ошибки сервера 500."""
     return render(
         request, 'core/500.html', status=HTTPStatus.INTERNAL_SERVER_ERROR)
+
+
+def serve_media(request, path, document_root=None, show_indexes=False):
+    """
+    Отдача медиафайлов в режиме разработки. Файлы с именами из хэша
+    содержимого отдаются с Cache-Control: immutable.
+    """
+    response = static.serve(request, path, document_root, show_indexes)
+    if is_immutable(path):
+        response['Cache-Control'] = (
+            f'public, max-age={IMMUTABLE_MAX_AGE}, immutable')
+    return response
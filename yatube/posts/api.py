@@ -0,0 +1,155 @@
+"""
+JSON API лент только для чтения: главная, группа, профиль и пост.
+
+Страница выбирается через queryset.values() без создания моделей.
+ETag страницы строится из id и версий постов (feed_cache) и курсоров,
+Last-Modified - из самой свежей даты публикации, комментария или
+изменения поста и групп (время версии feed_cache), поэтому клиент
+с актуальной копией получает 304 до сериализации, а правка поста
+меняет оба заголовка.
+Ответ отдается потоком: JSON пишется по одному посту.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+from core.paginator import paginate
+from . import feed_cache, groups
+from .models import Comment, Post
+
+User = get_user_model()
+COUNT_PER_PAGE = settings.COUNT_PER_PAGE
+COMMENTS_PER_PAGE = settings.COMMENTS_PER_PAGE
+POST_FIELDS = ('id', 'text', 'pub_date', 'image', 'comments_count',
+               'author__username', 'group__slug', 'group__title')
+COMMENT_FIELDS = ('id', 'text', 'created', 'author__username')
+CONTENT_TYPE = 'application/json'
+encoder = DjangoJSONEncoder(ensure_ascii=False)
+storage = Post._meta.get_field('image').storage
+
+
+def _post(row):
+    group = None
+    if row['group__slug'] is not None:
+        group = {'slug': row['group__slug'], 'title': row['group__title']}
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'pub_date': row['pub_date'],
+        'author': row['author__username'],
+        'group': group,
+        'image': storage.url(row['image']) if row['image'] else None,
+        'comments_count': row['comments_count'],
+    }
+
+
+def _comment(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'created': row['created'],
+        'author': row['author__username'],
+    }
+
+
+def _validators(post_ids, dates, *parts):
+    """
+    Возвращает (ETag, Last-Modified) для постов post_ids с датами
+    публикации и комментариев dates и частей страницы parts.
+    Last-Modified None, если время изменения постов неизвестно.
+    """
+    version, changed = feed_cache.version_info(post_ids)
+    digest = hashlib.md5(version.encode())
+    for part in parts:
+        digest.update(f';{part}'.encode())
+    last_modified = None
+    if changed is not None:
+        last_modified = max([changed, *dates])
+    return quote_etag(digest.hexdigest()), last_modified
+
+
+def _conditional(request, etag, last_modified, stream):
+    """
+    Возвращает 304, если у клиента актуальная копия,
+    иначе потоковый ответ из stream().
+    """
+    timestamp = last_modified and int(last_modified.timestamp())
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = StreamingHttpResponse(stream(), content_type=CONTENT_TYPE)
+    response['ETag'] = etag
+    if timestamp:
+        response['Last-Modified'] = http_date(timestamp)
+    return response
+
+
+def _stream_list(key, items, **extra):
+    yield f'{{"{key}":['
+    for number, item in enumerate(items):
+        yield (',' if number else '') + encoder.encode(item)
+    yield ']'
+    for name, value in extra.items():
+        yield f',"{name}":{encoder.encode(value)}'
+    yield '}'
+
+
+def _feed(request, post_list):
+    page_obj = paginate(
+        request, post_list.values(*POST_FIELDS), COUNT_PER_PAGE)
+    rows = list(page_obj)
+    etag, last_modified = _validators(
+        [row['id'] for row in rows], [row['pub_date'] for row in rows],
+        page_obj.next_cursor, page_obj.previous_cursor)
+    return _conditional(request, etag, last_modified, lambda: _stream_list(
+        'results', map(_post, rows),
+        next=page_obj.next_cursor or None,
+        previous=page_obj.previous_cursor or None))
+
+
+@require_safe
+def index(request):
+    """Лента главной страницы в JSON."""
+    return _feed(request, Post.objects.all())
+
+
+@require_safe
+def group_posts(request, slug):
+    """Лента группы в JSON."""
+    group = groups.by_slug(slug)
+    if group is None:
+        raise Http404
+    return _feed(request, Post.objects.filter(group=group.pk))
+
+
+@require_safe
+def profile(request, username):
+    """Лента автора в JSON."""
+    author = get_object_or_404(User, username=username)
+    return _feed(request, Post.objects.filter(author=author))
+
+
+@require_safe
+def post_detail(request, post_id):
+    """Пост со страницей комментариев в JSON."""
+    post = Post.objects.filter(pk=post_id).values(*POST_FIELDS).first()
+    if post is None:
+        raise Http404
+    page_obj = paginate(
+        request, Comment.objects.filter(post=post_id).values(
+            *COMMENT_FIELDS), COMMENTS_PER_PAGE)
+    comments = list(page_obj)
+    etag, last_modified = _validators(
+        [post_id],
+        [post['pub_date']] + [comment['created'] for comment in comments],
+        page_obj.next_cursor, *(comment['id'] for comment in comments))
+    return _conditional(request, etag, last_modified, lambda: _stream_list(
+        'comments', map(_comment, comments), post=_post(post),
+        next=page_obj.next_cursor or None))
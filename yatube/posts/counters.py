@@ -0,0 +1,145 @@
+"""
+Денормализованные счетчики постов, комментариев и подписок
+и дата последней публикации в группе.
+
+Счетчики обновляются атомарными UPDATE ... SET x = x + 1 из сигналов
+сохранения и удаления Post, Comment и Follow. Записи, сделанные в обход
+сигналов (bulk_create, QuerySet.update), исправляет команда
+`python manage.py recount_counters`.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import (Count, DateTimeField, F, IntegerField, Max,
+                              OuterRef, Subquery, Value)
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Group, Post, UserCounters
+
+User = get_user_model()
+REPAIR_BATCH_SIZE = 500
+
+
+def _delta(field, delta):
+    return {field: Greatest(F(field) + delta, 0)}
+
+
+def _count(queryset, field):
+    """Подзапрос количества строк queryset, связанных по field."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField()),
+        0)
+
+
+USER_COUNTERS = {
+    'posts_count': lambda: _count(Post.objects.all(), 'author'),
+    'followers_count': lambda: _count(Follow.objects.all(), 'author'),
+    'following_count': lambda: _count(Follow.objects.all(), 'user'),
+}
+
+
+def recount_user(user_id):
+    """Пересчитывает счетчики пользователя и возвращает их."""
+    values = (User.objects.filter(pk=user_id)
+              .annotate(**{name: expression()
+                           for name, expression in USER_COUNTERS.items()})
+              .values(*USER_COUNTERS).first())
+    if values is None:
+        return None
+    counters, _ = UserCounters.objects.update_or_create(
+        user_id=user_id, defaults=values)
+    return counters
+
+
+def bump_user(user_id, field, delta):
+    """
+    Изменяет счетчик field пользователя на delta. Если счетчиков
+    еще нет, они создаются пересчетом.
+    """
+    updated = UserCounters.objects.filter(user_id=user_id).update(
+        **_delta(field, delta))
+    if not updated and delta > 0:
+        recount_user(user_id)
+
+
+def bump_post(post_id, delta):
+    """Изменяет количество комментариев поста на delta."""
+    Post.objects.filter(pk=post_id).update(**_delta('comments_count', delta))
+
+
+def bump_group(group_id, delta, activity=None):
+    """
+    Изменяет количество постов группы на delta и сдвигает дату
+    последней публикации к activity, если она позже.
+    """
+    if group_id is None:
+        return
+    values = _delta('posts_count', delta)
+    if activity is not None:
+        activity = Value(activity, output_field=DateTimeField())
+        values['last_activity'] = Greatest(
+            Coalesce('last_activity', activity), activity)
+    Group.objects.filter(pk=group_id).update(**values)
+
+
+def get_counters(user):
+    """Возвращает счетчики пользователя, создавая их при отсутствии."""
+    try:
+        return user.counters
+    except UserCounters.DoesNotExist:
+        return recount_user(user.pk)
+
+
+def _latest(queryset, field, date_field):
+    """Подзапрос самой поздней даты date_field строк queryset."""
+    return Subquery(
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(latest=Max(date_field))
+        .values('latest'),
+        output_field=DateTimeField())
+
+
+def _repair(queryset, field, expression):
+    stale = list(queryset.annotate(actual=expression)
+                 .exclude(**{field: F('actual')})
+                 .exclude(**{f'{field}__isnull': True,
+                             'actual__isnull': True})
+                 .values_list('pk', flat=True))
+    for start in range(0, len(stale), REPAIR_BATCH_SIZE):
+        queryset.filter(
+            pk__in=stale[start:start + REPAIR_BATCH_SIZE]
+        ).update(**{field: expression})
+    return len(stale)
+
+
+def repair():
+    """
+    Пересчитывает все счетчики, расходящиеся с фактическими данными.
+    Возвращает словарь {счетчик: число исправленных строк}.
+    """
+    missing = User.objects.filter(counters__isnull=True).values_list(
+        'pk', flat=True)
+    UserCounters.objects.bulk_create(
+        [UserCounters(user_id=pk) for pk in missing], ignore_conflicts=True)
+    fixed = {
+        'post.comments_count': _repair(
+            Post.objects.all(), 'comments_count',
+            _count(Comment.objects.all(), 'post')),
+        'group.posts_count': _repair(
+            Group.objects.all(), 'posts_count',
+            _count(Post.objects.all(), 'group')),
+        'group.last_activity': _repair(
+            Group.objects.all(), 'last_activity',
+            _latest(Post.objects.all(), 'group', 'pub_date')),
+    }
+    for name, expression in USER_COUNTERS.items():
+        fixed[f'user.{name}'] = _repair(
+            UserCounters.objects.all(), name,
+            expression())
+    return fixed
@@ -0,0 +1,141 @@
+"""
+Потоковая выгрузка постов автора или группы в JSONL или CSV.
+
+Посты читаются через QuerySet.iterator(chunk_size) как словари
+values(), комментарии - одним запросом на пачку из не более
+LOOKUP_BATCH_SIZE постов (лимит параметров SQLite), поэтому
+память не зависит от числа постов: выгрузка группы с миллионом
+постов держит в памяти одну пачку. За каждым постом следуют его
+комментарии; картинка выгружается путем в хранилище, как
+ее принимает `import_data`.
+Выгрузка доступна по адресам export/profile/<username>/ и
+export/group/<slug>/ и командой `python manage.py export_posts`.
+"""
+import csv
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.decorators import login_required
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from . import groups
+from .models import Comment, Post
+
+User = get_user_model()
+CHUNK_SIZE = 2000
+# Сколько значений передается в один запрос IN (...).
+LOOKUP_BATCH_SIZE = 500
+FORMATS = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+FIELDS = ('type', 'id', 'post', 'author', 'group', 'pub_date', 'created',
+          'text', 'image')
+POST_FIELDS = ('id', 'author__username', 'group__slug', 'pub_date', 'text',
+               'image')
+COMMENT_FIELDS = ('id', 'post_id', 'author__username', 'created', 'text')
+encoder = DjangoJSONEncoder(ensure_ascii=False)
+
+
+def _batches(iterator, size):
+    batch = []
+    for item in iterator:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def records(posts, chunk_size=CHUNK_SIZE):
+    """
+    Возвращает записи постов posts (QuerySet) от новых к старым
+    в порядке индексов лент; за каждым постом следуют его комментарии
+    от старых к новым.
+    """
+    rows = posts.order_by('-pub_date', '-pk').values(*POST_FIELDS).iterator(
+        chunk_size=chunk_size)
+    for batch in _batches(rows, min(chunk_size, LOOKUP_BATCH_SIZE)):
+        comments = defaultdict(list)
+        for comment in (Comment.objects
+                        .filter(post__in=[row['id'] for row in batch])
+                        .order_by('pk').values(*COMMENT_FIELDS)):
+            comments[comment['post_id']].append(comment)
+        for row in batch:
+            yield {
+                'type': 'post',
+                'id': row['id'],
+                'author': row['author__username'],
+                'group': row['group__slug'],
+                'pub_date': row['pub_date'],
+                'text': row['text'],
+                'image': row['image'] or None,
+            }
+            for comment in comments[row['id']]:
+                yield {
+                    'type': 'comment',
+                    'id': comment['id'],
+                    'post': comment['post_id'],
+                    'author': comment['author__username'],
+                    'created': comment['created'],
+                    'text': comment['text'],
+                }
+
+
+class Echo:
+    """Буфер для csv.writer, возвращающий записанную строку."""
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def serialize(items, data_format):
+    """Возвращает строки выгрузки записей items в формате data_format."""
+    if data_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(FIELDS)
+        for item in items:
+            yield writer.writerow(
+                [_csv_value(item.get(field)) for field in FIELDS])
+        return
+    for item in items:
+        yield encoder.encode(item) + '\n'
+
+
+def _response(request, posts, name):
+    data_format = request.GET.get('format', 'jsonl')
+    if data_format not in FORMATS:
+        raise Http404
+    response = StreamingHttpResponse(
+        serialize(records(posts), data_format),
+        content_type=FORMATS[data_format])
+    response['Content-Disposition'] = (
+        f'attachment; filename="{name}.{data_format}"')
+    return response
+
+
+@login_required
+@require_safe
+def export_profile(request, username):
+    """Выгрузка всех постов автора с комментариями."""
+    author = get_object_or_404(User, username=username)
+    return _response(request, Post.objects.filter(author=author),
+                     f'profile-{author.username}')
+
+
+@login_required
+@require_safe
+def export_group(request, slug):
+    """Выгрузка всех постов группы с комментариями."""
+    group = groups.by_slug(slug)
+    if group is None:
+        raise Http404
+    return _response(request, Post.objects.filter(group=group.pk),
+                     f'group-{group.slug}')
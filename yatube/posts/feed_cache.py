@@ -0,0 +1,102 @@
+"""
+Версионирование кэшированных фрагментов ленты.
+
+Ключ фрагмента страницы строится из курсора страницы и версий
+показанных на ней постов и групп. Сигналы сохранения и удаления Post
+и Group меняют версии, поэтому фрагмент может жить часами, а изменения
+видны сразу: новый пост меняет состав только первой страницы,
+редактирование - только страниц, на которых пост показан.
+
+Версия хранит и время своего создания, поэтому по версиям можно
+узнать, когда посты или группы менялись последний раз (Last-Modified
+в JSON API).
+"""
+import datetime
+import hashlib
+import time
+import uuid
+
+from django.core.cache import cache
+
+POST_VERSION_KEY = 'feed:post:{pk}'
+GROUPS_VERSION_KEY = 'feed:groups'
+
+
+VERSION_FORMAT = '{uuid}@{timestamp:.0f}'
+
+
+def _new_version():
+    return VERSION_FORMAT.format(uuid=uuid.uuid4().hex,
+                                 timestamp=time.time())
+
+
+def _changed_at(version):
+    """Возвращает время создания версии или None для версии без него."""
+    _, separator, timestamp = version.partition('@')
+    if not separator:
+        return None
+    return datetime.datetime.fromtimestamp(int(timestamp),
+                                           datetime.timezone.utc)
+
+
+def bump_post(pk):
+    """Обновляет версию поста."""
+    cache.set(POST_VERSION_KEY.format(pk=pk), _new_version(), None)
+
+
+def bump_groups():
+    """Обновляет версию всех групп."""
+    cache.set(GROUPS_VERSION_KEY, _new_version(), None)
+
+
+def _get_versions(keys):
+    """
+    Возвращает версии для keys. Отсутствующую (в т.ч. вытесненную)
+    версию заменяет новой, чтобы не отдать устаревший фрагмент.
+    """
+    versions = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def groups_version():
+    """Возвращает текущую версию групп."""
+    return _get_versions([GROUPS_VERSION_KEY])[0]
+
+
+def page_version(posts):
+    """Возвращает версию фрагмента со списком постов posts."""
+    return version(post.pk for post in posts)
+
+
+def _post_versions(post_ids):
+    keys = [POST_VERSION_KEY.format(pk=pk) for pk in post_ids]
+    keys.append(GROUPS_VERSION_KEY)
+    return zip(keys, _get_versions(keys))
+
+
+def _digest(versions):
+    digest = hashlib.md5()
+    for key, version in versions:
+        digest.update(f'{key}={version};'.encode())
+    return digest.hexdigest()
+
+
+def version(post_ids):
+    """Возвращает общую версию постов post_ids и групп."""
+    return _digest(_post_versions(post_ids))
+
+
+def version_info(post_ids):
+    """
+    Возвращает (общая версия, время последнего изменения) постов
+    post_ids и групп. Время None, если его нет у какой-то из версий.
+    """
+    versions = list(_post_versions(post_ids))
+    changed = [_changed_at(version) for _, version in versions]
+    if None in changed:
+        return _digest(versions), None
+    return _digest(versions), max(changed)
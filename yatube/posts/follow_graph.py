@@ -0,0 +1,120 @@
+"""
+Граф подписок в общем кэше.
+
+Для каждого пользователя кэш хранит два отсортированных массива id
+(array, 4 байта на id): авторов, на которых он подписан, и подписчиков.
+Проверка подписки - двоичный поиск в массиве, число и список подписок
+и подписчиков - длина и содержимое массива, без запросов к базе.
+Промах кэша загружает массивы нескольких пользователей одним запросом
+на пачку.
+Сигналы сохранения и удаления Follow сбрасывают массивы обоих
+пользователей сразу и еще раз после фиксации транзакции: массив,
+прочитанный другим процессом до фиксации, не переживет изменение.
+Граф служит только для чтения: подписка и отписка всегда пишут в базу.
+Сравнение с запросами к базе - команда follow_graph_benchmark.
+"""
+import bisect
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+FOLLOWING_KEY = 'follows:following:{pk}'
+FOLLOWERS_KEY = 'follows:followers:{pk}'
+TIMEOUT = settings.FEED_CACHE_TIMEOUT
+# Массивы из 4-байтовых id; 8 байт - только для очень больших id.
+SMALL_TYPECODE = 'I'
+LARGE_TYPECODE = 'Q'
+SMALL_LIMIT = 2 ** 32
+# Пользователей в одном запросе загрузки (лимит параметров SQLite).
+LOOKUP_BATCH_SIZE = 500
+
+
+def _pack(ids):
+    ids = sorted(ids)
+    typecode = (SMALL_TYPECODE if not ids or ids[-1] < SMALL_LIMIT
+                else LARGE_TYPECODE)
+    return typecode, array(typecode, ids).tobytes()
+
+
+def _unpack(value):
+    typecode, data = value
+    ids = array(typecode)
+    ids.frombytes(data)
+    return ids
+
+
+def _get_many(key_template, field, other, user_ids):
+    keys = {pk: key_template.format(pk=pk) for pk in user_ids}
+    cached = cache.get_many(list(keys.values()))
+    result = {pk: _unpack(cached[key]) for pk, key in keys.items()
+              if key in cached}
+    missing = [pk for pk in keys if pk not in result]
+    if missing:
+        loaded = {pk: [] for pk in missing}
+        for start in range(0, len(missing), LOOKUP_BATCH_SIZE):
+            batch = missing[start:start + LOOKUP_BATCH_SIZE]
+            for pk, other_pk in Follow.objects.filter(
+                    **{f'{field}__in': batch}).order_by().values_list(
+                        field, other):
+                loaded[pk].append(other_pk)
+        packed = {pk: _pack(ids) for pk, ids in loaded.items()}
+        cache.set_many({keys[pk]: value for pk, value in packed.items()},
+                       TIMEOUT)
+        result.update((pk, _unpack(value)) for pk, value in packed.items())
+    return result
+
+
+def following_many(user_ids):
+    """Возвращает {id пользователя: отсортированный массив id авторов}."""
+    return _get_many(FOLLOWING_KEY, 'user', 'author', user_ids)
+
+
+def followers_many(user_ids):
+    """Возвращает {id автора: отсортированный массив id подписчиков}."""
+    return _get_many(FOLLOWERS_KEY, 'author', 'user', user_ids)
+
+
+def following(user_id):
+    """Возвращает отсортированный массив id авторов пользователя."""
+    return following_many([user_id])[user_id]
+
+
+def followers(user_id):
+    """Возвращает отсортированный массив id подписчиков автора."""
+    return followers_many([user_id])[user_id]
+
+
+def following_count(user_id):
+    """Возвращает число авторов, на которых подписан пользователь."""
+    return len(following(user_id))
+
+
+def followers_count(user_id):
+    """Возвращает число подписчиков автора."""
+    return len(followers(user_id))
+
+
+def is_following(user_id, author_id):
+    """Проверяет, подписан ли пользователь user_id на автора author_id."""
+    ids = following(user_id)
+    index = bisect.bisect_left(ids, author_id)
+    return index < len(ids) and ids[index] == author_id
+
+
+def forget(*user_ids):
+    """Сбрасывает массивы подписок и подписчиков пользователей."""
+    cache.delete_many([key.format(pk=pk) for pk in user_ids
+                       for key in (FOLLOWING_KEY, FOLLOWERS_KEY)])
+
+
+def changed(user_id, author_id):
+    """
+    Сбрасывает массивы подписчика и автора сразу и после фиксации
+    транзакции.
+    """
+    forget(user_id, author_id)
+    transaction.on_commit(lambda: forget(user_id, author_id))
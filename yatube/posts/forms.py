@@ -1,7 +1,11 @@
 from django import forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
 
 from .models import Post, Comment
 
+MAX_UPLOAD_SIZE = settings.POST_IMAGE_MAX_UPLOAD_SIZE
+
 
 class PostForm(forms.ModelForm):
     """
@@ -11,6 +15,14 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if image and image.size > MAX_UPLOAD_SIZE:
+            raise forms.ValidationError(
+                'Картинка больше {size}.'.format(
+                    size=filesizeformat(MAX_UPLOAD_SIZE)))
+        return image
+
 
 class CommentForm(forms.ModelForm):
     """
@@ -0,0 +1,58 @@
+"""
+Таблица групп в памяти процесса и в общем кэше.
+
+Таблица {slug: группа} и {id: группа} (id, slug, название, описание)
+хранится в кэше под ключом с версией групп (feed_cache), которую
+меняют сигналы сохранения и удаления Group. Процесс держит у себя
+копию последней версии, поэтому поиск группы по slug или id стоит
+одного чтения версии из кэша; после изменения групп таблица
+загружается из общего кэша, а при его промахе - одним запросом к базе.
+Счетчики постов и дата последней публикации в таблицу не входят:
+каталог групп читает их из денормализованных полей Group.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from . import feed_cache
+from .models import Group
+
+TABLE_KEY = 'groups:table:{version}'
+TABLE_TIMEOUT = settings.FEED_CACHE_TIMEOUT
+FIELDS = ('id', 'slug', 'title', 'description')
+
+_table = (None, None)
+
+
+def _load():
+    groups = [Group(**values)
+              for values in Group.objects.order_by().values(*FIELDS)]
+    return {
+        'by_slug': {group.slug: group for group in groups},
+        'by_id': {group.pk: group for group in groups},
+    }
+
+
+def get_table():
+    """Возвращает таблицу групп текущей версии."""
+    global _table
+    version = feed_cache.groups_version()
+    cached_version, table = _table
+    if cached_version == version:
+        return table
+    key = TABLE_KEY.format(version=version)
+    table = cache.get(key)
+    if table is None:
+        table = _load()
+        cache.set(key, table, TABLE_TIMEOUT)
+    _table = (version, table)
+    return table
+
+
+def by_slug(slug):
+    """Возвращает группу по slug или None."""
+    return get_table()['by_slug'].get(slug)
+
+
+def by_id(group_id):
+    """Возвращает группу по id или None."""
+    return get_table()['by_id'].get(group_id)
@@ -0,0 +1,195 @@
+"""
+Обработка загруженных картинок постов вне запроса.
+
+Загрузка сохраняется хранилищем по частям (chunks) как есть, а пост
+сохраняется сразу. После фиксации транзакции пул потоков
+(thumbnails.submit) декодирует картинку, поворачивает ее по EXIF
+и отбрасывает метаданные, уменьшает до POST_IMAGE_MAX_SIZE по большей
+стороне и перекодирует в WebP (если Pillow собран с ним) или
+прогрессивный JPEG. Загрузка и результат хранятся под именами из хэша
+содержимого (core.storage), поэтому одинаковые картинки хранятся один
+раз; посты переключаются на новый файл, и для него создаются
+миниатюры. Картинка, которую не удалось декодировать, остается у поста
+как есть, а в журнал пишется предупреждение.
+
+Файлы не удаляются при удалении или смене картинки поста: другой
+запрос мог в это время сохранить такой же файл и еще не записать
+ссылку на него. Команда collect_images (collect) удаляет файлы и их
+миниатюры, на которые не ссылается ни один пост (индекс post_image_idx)
+и которые не сохранялись заново дольше POST_IMAGE_GC_GRACE секунд.
+"""
+import datetime
+import logging
+import posixpath
+import re
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from core.storage import is_immutable
+from . import feed_cache, thumbnails
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+MAX_SIZE = settings.POST_IMAGE_MAX_SIZE
+QUALITY = settings.POST_IMAGE_QUALITY
+GC_GRACE = settings.POST_IMAGE_GC_GRACE
+GC_DIR = 'posts'
+# Сколько имен проверяется одним запросом IN (...).
+LOOKUP_BATCH_SIZE = 500
+PROCESSED_RE = re.compile(
+    r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}~processed\.(webp|jpg)$')
+# Метка ~processed отличает результат обработки от загрузки (core.storage).
+PROCESSED_NAME = 'posts/image~processed.{extension}'
+storage = Post._meta.get_field('image').storage
+
+
+def get_format():
+    """Возвращает (формат Pillow, расширение) для перекодирования."""
+    image_format = settings.POST_IMAGE_FORMAT
+    if image_format == 'auto':
+        image_format = 'webp' if features.check('webp') else 'jpeg'
+    if image_format == 'webp':
+        return 'WEBP', 'webp'
+    return 'JPEG', 'jpg'
+
+
+def is_processed(name):
+    """Проверяет, что картинка name уже прошла обработку."""
+    return bool(PROCESSED_RE.match(name))
+
+
+def encode(source):
+    """
+    Декодирует картинку из файла source и возвращает
+    (байты перекодированной картинки, расширение).
+    """
+    image = Image.open(source)
+    image.load()
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((MAX_SIZE, MAX_SIZE), Image.LANCZOS)
+    image_format, extension = get_format()
+    if image_format == 'JPEG':
+        options = {'progressive': True, 'optimize': True}
+        if image.mode != 'RGB':
+            image = image.convert('RGBA' if 'A' in image.getbands()
+                                  else 'RGB')
+            if image.mode == 'RGBA':
+                background = Image.new('RGB', image.size, 'white')
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+    else:
+        options = {'method': 4}
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands()
+                                  or 'transparency' in image.info
+                                  else 'RGB')
+    buffer = BytesIO()
+    image.save(buffer, image_format, quality=QUALITY, **options)
+    return buffer.getvalue(), extension
+
+
+def store(data, extension):
+    """Сохраняет data под именем из хэша содержимого и возвращает имя."""
+    return storage.save(PROCESSED_NAME.format(extension=extension),
+                        ContentFile(data))
+
+
+def _walk(directory):
+    directories, files = storage.listdir(directory)
+    for filename in files:
+        yield posixpath.join(directory, filename)
+    for name in directories:
+        yield from _walk(posixpath.join(directory, name))
+
+
+def _is_stale(name, before):
+    try:
+        return storage.get_modified_time(name) < before
+    except OSError:
+        return False
+
+
+def collect(grace=None):
+    """
+    Удаляет картинки с именами из хэша, на которые не ссылается ни один
+    пост и которые не сохранялись последние grace секунд (по умолчанию
+    POST_IMAGE_GC_GRACE), вместе с миниатюрами. Возвращает число
+    удаленных файлов.
+    """
+    if not storage.exists(GC_DIR):
+        return 0
+    before = timezone.now() - datetime.timedelta(
+        seconds=GC_GRACE if grace is None else grace)
+    candidates = [name for name in _walk(GC_DIR)
+                  if is_immutable(name) and _is_stale(name, before)]
+    deleted = 0
+    for start in range(0, len(candidates), LOOKUP_BATCH_SIZE):
+        batch = candidates[start:start + LOOKUP_BATCH_SIZE]
+        used = set(Post.objects.filter(image__in=batch).values_list(
+            'image', flat=True))
+        for name in batch:
+            # Время проверяется еще раз: файл мог только что понадобиться.
+            if name in used or not _is_stale(name, before):
+                continue
+            try:
+                default.kvstore.delete(ImageFile(name, storage))
+                storage.delete(name)
+            except OSError:
+                logger.exception('Не удалось удалить картинку %s', name)
+                continue
+            deleted += 1
+    return deleted
+
+
+def process(name):
+    """
+    Перекодирует загруженную картинку name и переключает на результат
+    посты, которые на нее ссылаются.
+    """
+    close_old_connections()
+    try:
+        try:
+            with storage.open(name) as source:
+                processed = store(*encode(source))
+        except (OSError, SyntaxError, ValueError,
+                Image.DecompressionBombError):
+            logger.warning('Картинку %s не удалось декодировать, '
+                           'она сохранена без обработки', name)
+            return
+        post_ids = list(Post.objects.filter(image=name).values_list(
+            'pk', flat=True))
+        # Картинку поста могли сменить, пока шла обработка.
+        Post.objects.filter(pk__in=post_ids, image=name).update(
+            image=processed)
+        for pk in post_ids:
+            feed_cache.bump_post(pk)
+        thumbnails.generate(processed)
+    except Exception:
+        logger.exception('Не удалось обработать картинку %s', name)
+    finally:
+        thumbnails.done(process, name)
+        close_old_connections()
+
+
+def schedule(name):
+    """
+    Ставит обработку картинки name в очередь пула; для уже
+    обработанной картинки - только создание миниатюр.
+    """
+    if is_processed(name):
+        thumbnails.schedule(name)
+    else:
+        thumbnails.submit(process, name)
+
+
+def schedule_on_commit(name):
+    """Ставит обработку картинки в очередь после фиксации транзакции."""
+    transaction.on_commit(lambda: schedule(name))
@@ -0,0 +1,375 @@
+"""
+Массовый импорт групп, постов, комментариев и подписок.
+
+Строки читаются потоком из JSONL или CSV и проверяются правилами
+полей PostForm/CommentForm и validate_not_empty. Проверенные строки
+вставляются пачками по batch_size, каждая пачка - в своей транзакции,
+с датами из строк (или временем импорта). Имена авторов, slug групп и id постов
+разрешаются через кэш: на пачку уходит один запрос за новыми
+значениями. Вставка не отправляет сигналы, поэтому после импорта
+счетчики, поисковый индекс, ленты и граф подписок обновляются одним
+проходом по строкам, которые вставил сам импорт.
+Запускается командой `python manage.py import_data`.
+"""
+import csv
+import json
+import time
+from collections import namedtuple
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connections, router, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, feed_cache, follow_graph, search, timeline
+from .forms import CommentForm, PostForm
+from .models import Comment, Follow, Group, Post
+from .validators import validate_not_empty
+
+User = get_user_model()
+BATCH_SIZE = 5000
+# Сколько значений передается в один запрос IN (...).
+LOOKUP_BATCH_SIZE = 500
+# Сколько ошибок строк сохраняется для отчета.
+MAX_REPORTED_ERRORS = 100
+FORMATS = ('jsonl', 'csv')
+
+RowError = namedtuple('RowError', 'line message')
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def read_rows(stream, data_format):
+    """
+    Возвращает пары (номер строки, словарь полей) из stream.
+    Строка JSONL, которую не удалось разобрать, дает ValidationError
+    вместо словаря.
+    """
+    if data_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as error:
+            row = ValidationError(f'Некорректный JSON: {error}')
+        else:
+            if not isinstance(row, dict):
+                row = ValidationError('Ожидался объект JSON.')
+        yield line, row
+
+
+def _clean(field, value):
+    """Проверяет value правилами поля формы field и validate_not_empty."""
+    value = field.clean(value)
+    validate_not_empty(value)
+    return value
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Lookup:
+    """
+    Кэш id объектов по уникальному полю field. Значения, которых
+    еще нет в кэше, загружаются одним запросом на пачку строк.
+    """
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.ids = {}
+
+    def load(self, values):
+        missing = list({value for value in values
+                        if value is not None and value not in self.ids})
+        for start in range(0, len(missing), LOOKUP_BATCH_SIZE):
+            self.ids.update(self.queryset.filter(**{
+                f'{self.field}__in': missing[start:start + LOOKUP_BATCH_SIZE]
+            }).values_list(self.field, 'pk'))
+
+    def get(self, value, message):
+        try:
+            return self.ids[value]
+        except KeyError:
+            raise ValidationError(message.format(value=value))
+
+
+class Importer:
+    """
+    Базовый класс импорта одной модели: build() превращает строку
+    в объект модели, prefetch() заранее загружает связанные id,
+    finish() обновляет производные данные после импорта.
+    """
+    model = None
+    date_field = None
+    ignore_conflicts = False
+
+    def __init__(self):
+        self.users = Lookup(User.objects.all(), 'username')
+        self.now = timezone.now()
+
+    def prefetch(self, rows):
+        """Загружает в кэш id, на которые ссылаются строки rows."""
+
+    def build(self, row):
+        raise NotImplementedError
+
+    def finish(self, created):
+        """Обновляет производные данные созданных объектов created."""
+
+    def _user(self, row, field):
+        return self.users.get(row.get(field),
+                              'Пользователь {value} не найден.')
+
+    def _date(self, row):
+        value = row.get(self.date_field)
+        if not value:
+            return self.now
+        date = parse_datetime(value) if isinstance(value, str) else None
+        if date is None:
+            raise ValidationError(f'Некорректная дата: {value}')
+        if settings.USE_TZ and timezone.is_naive(date):
+            date = timezone.make_aware(date)
+        elif not settings.USE_TZ and timezone.is_aware(date):
+            date = timezone.make_naive(date)
+        return date
+
+
+class GroupImporter(Importer):
+    model = Group
+
+    def __init__(self):
+        super().__init__()
+        self.groups = Lookup(Group.objects.all(), 'slug')
+        self.slugs = set()
+
+    def prefetch(self, rows):
+        self.groups.load(row.get('slug') for row in rows)
+
+    def build(self, row):
+        values = {}
+        for name in ('title', 'slug', 'description'):
+            values[name] = Group._meta.get_field(name).clean(
+                row.get(name, ''), None)
+        if values['slug'] in self.groups.ids or values['slug'] in self.slugs:
+            raise ValidationError(f'Группа {values["slug"]} уже есть.')
+        self.slugs.add(values['slug'])
+        return Group(**values)
+
+    def finish(self, created):
+        feed_cache.bump_groups()
+
+
+class PostImporter(Importer):
+    model = Post
+    date_field = 'pub_date'
+    text_field = PostForm.base_fields['text']
+
+    def __init__(self):
+        super().__init__()
+        self.groups = Lookup(Group.objects.all(), 'slug')
+
+    def prefetch(self, rows):
+        self.users.load(row.get('author') for row in rows)
+        self.groups.load(row.get('group') for row in rows)
+
+    def build(self, row):
+        group = row.get('group') or None
+        if group is not None:
+            group = self.groups.get(group, 'Группа {value} не найдена.')
+        return Post(text=_clean(self.text_field, row.get('text')),
+                    author_id=self._user(row, 'author'),
+                    group_id=group,
+                    image=row.get('image') or '',
+                    pub_date=self._date(row))
+
+    def finish(self, created):
+        for pk, total in _totals(created, 'author'):
+            counters.bump_user(pk, 'posts_count', total)
+        for pk, total, latest in (
+                created.filter(group__isnull=False).order_by()
+                .values_list('group')
+                .annotate(total=Count('pk'), latest=Max('pub_date'))
+                .values_list('group', 'total', 'latest')):
+            counters.bump_group(pk, total, latest)
+        search.index_all(created, Comment.objects.none())
+        timeline.fan_out_many(created)
+
+
+class CommentImporter(Importer):
+    model = Comment
+    date_field = 'created'
+    text_field = CommentForm.base_fields['text']
+
+    def __init__(self):
+        super().__init__()
+        self.posts = Lookup(Post.objects.all(), 'pk')
+
+    def prefetch(self, rows):
+        self.users.load(row.get('author') for row in rows)
+        self.posts.load(_int(row.get('post')) for row in rows)
+
+    def build(self, row):
+        return Comment(
+            post_id=self.posts.get(_int(row.get('post')),
+                                   'Пост {value} не найден.'),
+            author_id=self._user(row, 'author'),
+            text=_clean(self.text_field, row.get('text')),
+            created=self._date(row))
+
+    def finish(self, created):
+        for pk, total in _totals(created, 'post'):
+            counters.bump_post(pk, total)
+        search.index_all(Post.objects.none(), created)
+
+
+class FollowImporter(Importer):
+    model = Follow
+    date_field = 'created'
+    ignore_conflicts = True
+
+    def prefetch(self, rows):
+        self.users.load(row.get(field) for row in rows
+                        for field in ('user', 'author'))
+
+    def build(self, row):
+        user_id = self._user(row, 'user')
+        author_id = self._user(row, 'author')
+        if user_id == author_id:
+            raise ValidationError('Нельзя подписаться на себя.')
+        return Follow(user_id=user_id, author_id=author_id,
+                      created=self._date(row))
+
+    def finish(self, created):
+        for field, name in (('author', 'followers_count'),
+                            ('user', 'following_count')):
+            for pk, total in _totals(created, field):
+                counters.bump_user(pk, name, total)
+        pairs = list(created.values_list('user', 'author'))
+        timeline.backfill_many(pairs)
+        follow_graph.forget(*{pk for pair in pairs for pk in pair})
+
+
+IMPORTERS = {
+    'groups': GroupImporter,
+    'posts': PostImporter,
+    'comments': CommentImporter,
+    'follows': FollowImporter,
+}
+
+
+def _totals(queryset, field):
+    return (queryset.order_by().values_list(field)
+            .annotate(total=Count('pk')).values_list(field, 'total'))
+
+
+def _insert(model, objects, ignore_conflicts, using):
+    """
+    Вставляет objects пачками, как bulk_create, и возвращает диапазоны
+    (первый, последний) id вставленных строк. Вставка сырая (raw, как
+    у loaddata): pre_save полей не вызывается, поэтому даты auto_now_add
+    берутся из объектов без изменения полей модели. Строки одного
+    INSERT получают в SQLite подряд идущие rowid: последний -
+    last_insert_rowid(), число - changes(); строки, вставленные
+    в это время другими запросами, в диапазоны не попадают.
+    """
+    connection = connections[using]
+    opts = model._meta
+    fields = [field for field in opts.concrete_fields
+              if field is not opts.auto_field]
+    ranges = []
+    for batch in _batches(
+            objects, max(connection.ops.bulk_batch_size(fields, objects), 1)):
+        model._base_manager.using(using)._insert(
+            batch, fields=fields, raw=True,
+            ignore_conflicts=ignore_conflicts)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT last_insert_rowid(), changes()')
+            last, count = cursor.fetchone()
+        if count:
+            ranges.append((last - count + 1, last))
+    return ranges
+
+
+def _created(model, ranges):
+    """Возвращает QuerySet строк model с id из диапазонов ranges."""
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first == merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], last)
+        else:
+            merged.append((first, last))
+    if not merged:
+        return model.objects.none()
+    return model.objects.filter(
+        reduce(or_, (Q(pk__range=bounds) for bounds in merged)))
+
+
+def run(kind, rows, batch_size=BATCH_SIZE):
+    """
+    Импортирует строки rows (пары номер строки, словарь полей)
+    как объекты kind. Возвращает число прочитанных и созданных строк,
+    ошибки, время и скорость вставки и время обновления производных
+    данных.
+    """
+    importer = IMPORTERS[kind]()
+    model = importer.model
+    using = router.db_for_write(model)
+    ranges = []
+    total = 0
+    error_count = 0
+    errors = []
+    started = time.perf_counter()
+    for batch in _batches(rows, batch_size):
+        total += len(batch)
+        importer.prefetch([row for _, row in batch
+                           if isinstance(row, dict)])
+        objects = []
+        for line, row in batch:
+            try:
+                if isinstance(row, ValidationError):
+                    raise row
+                objects.append(importer.build(row))
+            except ValidationError as error:
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append(
+                        RowError(line, '; '.join(error.messages)))
+        with transaction.atomic(using=using):
+            ranges += _insert(model, objects, importer.ignore_conflicts,
+                              using)
+    seconds = time.perf_counter() - started
+    created = _created(model, ranges)
+    with transaction.atomic(using=using):
+        importer.finish(created)
+    return {
+        'rows': total,
+        'created': sum(last - first + 1 for first, last in ranges),
+        'error_count': error_count,
+        'errors': errors,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(total / seconds) if seconds else None,
+        'finish_seconds': round(time.perf_counter() - started - seconds, 3),
+    }
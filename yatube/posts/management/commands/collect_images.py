@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts import images
+
+
+class Command(BaseCommand):
+    help = ('Удаляет картинки постов и их миниатюры, на которые '
+            'не ссылается ни один пост.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=None,
+            help='Не удалять файлы, сохраненные за последние N секунд '
+                 '(по умолчанию POST_IMAGE_GC_GRACE).')
+
+    def handle(self, *args, **options):
+        deleted = images.collect(grace=options['grace'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено картинок: {deleted}'))
@@ -0,0 +1,49 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import exporter
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Выгружает все посты автора или группы с комментариями '
+            'в JSONL или CSV потоком, без загрузки выборки в память.')
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--profile', metavar='USERNAME')
+        source.add_argument('--group', metavar='SLUG')
+        parser.add_argument('--format', choices=sorted(exporter.FORMATS),
+                            default='jsonl')
+        parser.add_argument('--output', help='Файл выгрузки, по умолчанию '
+                                             'stdout.')
+        parser.add_argument('--chunk-size', type=int,
+                            default=exporter.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть больше нуля.')
+        if options['profile']:
+            author = User.objects.filter(username=options['profile']).first()
+            if author is None:
+                raise CommandError(f'Автор {options["profile"]} не найден.')
+            posts = Post.objects.filter(author=author)
+        else:
+            group = Group.objects.filter(slug=options['group']).first()
+            if group is None:
+                raise CommandError(f'Группа {options["group"]} не найдена.')
+            posts = Post.objects.filter(group=group)
+        lines = exporter.serialize(
+            exporter.records(posts, options['chunk_size']),
+            options['format'])
+        if options['output'] is None:
+            for line in lines:
+                sys.stdout.write(line)
+            return
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as stream:
+            stream.writelines(lines)
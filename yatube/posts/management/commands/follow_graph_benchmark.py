@@ -0,0 +1,71 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts import follow_graph
+from posts.models import Follow
+
+
+def _timed(check, pairs):
+    started = time.perf_counter()
+    answers = [check(user_id, author_id) for user_id, author_id in pairs]
+    return answers, (time.perf_counter() - started) * 1000 / len(pairs)
+
+
+def _query(user_id, author_id):
+    return Follow.objects.filter(user=user_id, author=author_id).exists()
+
+
+def benchmark(lookups=1000, rng=None):
+    """
+    Проверяет lookups пар «подписчик, автор» (половина - существующие
+    подписки) запросом exists(), как раньше представления, и через граф
+    с прогретым кэшем. Возвращает среднее время проверки (мс), число
+    запросов к базе для каждого способа и число расхождений ответов.
+    """
+    rng = rng or random.Random(0)
+    follows = list(Follow.objects.order_by('?').values_list(
+        'user', 'author')[:lookups // 2])
+    if not follows:
+        raise CommandError('Нет подписок для бенчмарка.')
+    users = [pk for pair in follows for pk in pair]
+    pairs = follows + [(rng.choice(users), rng.choice(users))
+                       for _ in range(lookups - len(follows))]
+    rng.shuffle(pairs)
+    with CaptureQueriesContext(connection) as queries:
+        expected, query_ms = _timed(_query, pairs)
+    query_count = len(queries)
+    follow_graph.following_many({user_id for user_id, _ in pairs})
+    with CaptureQueriesContext(connection) as queries:
+        answers, graph_ms = _timed(follow_graph.is_following, pairs)
+    return {
+        'lookups': len(pairs),
+        'query_ms': round(query_ms, 4),
+        'query_count': query_count,
+        'graph_ms': round(graph_ms, 4),
+        'graph_count': len(queries),
+        'speedup': round(query_ms / graph_ms, 1) if graph_ms else None,
+        'mismatches': sum(a != b for a, b in zip(answers, expected)),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает проверку подписки запросом к базе и через '
+            'граф подписок в кэше.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lookups', type=int, default=1000,
+            help='Количество проверяемых пар «подписчик, автор».')
+
+    def handle(self, *args, **options):
+        result = benchmark(lookups=options['lookups'])
+        self.stdout.write(
+            'проверок {lookups}\n'
+            'exists()  {query_ms:>8} мс  запросов {query_count}\n'
+            'граф      {graph_ms:>8} мс  запросов {graph_count}\n'
+            'ускорение {speedup}x  расхождений {mismatches}'.format(
+                **result))
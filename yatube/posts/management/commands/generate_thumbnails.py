@@ -0,0 +1,56 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+UPLOAD_DIR = 'posts'
+
+
+def _init_worker():
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = ('Создает миниатюры всех размеров для картинок постов '
+            'и файлов в MEDIA_ROOT/posts/ в несколько процессов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Количество процессов.')
+
+    def image_names(self):
+        names = set(
+            Post.objects.exclude(image='')
+            .values_list('image', flat=True).distinct())
+        directory = os.path.join(settings.MEDIA_ROOT, UPLOAD_DIR)
+        if os.path.isdir(directory):
+            names.update(
+                f'{UPLOAD_DIR}/{filename}'
+                for filename in os.listdir(directory)
+                if os.path.isfile(os.path.join(directory, filename)))
+        return sorted(names)
+
+    def handle(self, *args, **options):
+        names = self.image_names()
+        started = time.perf_counter()
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options['workers'],
+                                 initializer=_init_worker) as executor:
+            for done, _ in enumerate(
+                    executor.map(thumbnails.generate, names, chunksize=8),
+                    start=1):
+                if done % 100 == 0:
+                    self.stdout.write(f'Обработано {done} из {len(names)}')
+        self.stdout.write(self.style.SUCCESS(
+            'Миниатюры для {count} картинок созданы за {seconds:.1f} с'
+            .format(count=len(names),
+                    seconds=time.perf_counter() - started)))
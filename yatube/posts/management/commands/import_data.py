@@ -0,0 +1,44 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import importer
+
+
+class Command(BaseCommand):
+    help = ('Импортирует группы, посты, комментарии или подписки '
+            'из файла JSONL или CSV через bulk_create.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(importer.IMPORTERS))
+        parser.add_argument('path', help='Файл данных или - для stdin.')
+        parser.add_argument('--format', choices=importer.FORMATS,
+                            help='По умолчанию - по расширению файла.')
+        parser.add_argument('--batch-size', type=int,
+                            default=importer.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        data_format = options['format'] or (
+            'csv' if os.path.splitext(path)[1].lower() == '.csv'
+            else 'jsonl')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        try:
+            stream = (sys.stdin if path == '-'
+                      else open(path, encoding='utf-8', newline=''))
+        except OSError as error:
+            raise CommandError(error)
+        with stream:
+            result = importer.run(
+                options['kind'], importer.read_rows(stream, data_format),
+                options['batch_size'])
+        for error in result['errors']:
+            self.stderr.write(f'Строка {error.line}: {error.message}')
+        self.stdout.write(
+            'Прочитано: {rows}, создано: {created}, ошибок: {error_count}'
+            .format(**result))
+        self.stdout.write(self.style.SUCCESS(
+            'Вставка: {seconds} с, {rows_per_second} строк/с; '
+            'счетчики, поиск и ленты: {finish_seconds} с'.format(**result)))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = ('Заново строит индекс полнотекстового поиска '
+            'по постам и комментариям.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            search.create_index()
+            search.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            'Индекс построен: {index}'.format(
+                index=type(search.get_index()).__name__)))
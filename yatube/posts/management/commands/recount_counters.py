@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает денормализованные счетчики постов, '
+            'комментариев и подписок и исправляет расхождения.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = counters.repair()
+        for name, rows in fixed.items():
+            self.stdout.write(f'{name}: исправлено {rows}')
+        self.stdout.write(self.style.SUCCESS(
+            'Всего исправлено: {total}'.format(total=sum(fixed.values()))))
@@ -0,0 +1,130 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:41
+
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import OperationalError, migrations, models
+import django.db.models.deletion
+
+from core.stemmer import stem
+
+# Снимок posts.search на момент миграции: код модуля может меняться.
+FTS_TABLE = 'posts_search_fts'
+WORD_RE = re.compile(r'\w+')
+TERM_LENGTH = 100
+BATCH_SIZE = 1000
+
+
+def tokenize(text):
+    return [stem(word)[:TERM_LENGTH] for word in WORD_RE.findall(text)]
+
+
+def fts5_supported(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                'CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(body)')
+        except OperationalError:
+            return False
+        cursor.execute('DROP TABLE temp.fts5_probe')
+    return True
+
+
+def documents(apps, alias):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    posts = Post.objects.using(alias).order_by().values_list(
+        'pk', 'pk', 'text')
+    comments = Comment.objects.using(alias).order_by().values_list(
+        'pk', 'post_id', 'text')
+    for kind, queryset in (('post', posts), ('comment', comments)):
+        for object_id, post_id, text in queryset.iterator():
+            yield kind, object_id, post_id, text
+
+
+def batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def fill_fts(apps, connection):
+    rows = ((object_id * 2 + (kind == 'comment'),
+             ' '.join(tokenize(text)), post_id)
+            for kind, object_id, post_id, text
+            in documents(apps, connection.alias))
+    with connection.cursor() as cursor:
+        for batch in batches(rows):
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE}(rowid, body, post_id) '
+                f'VALUES (%s, %s, %s)', batch)
+
+
+def fill_terms(apps, connection):
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    terms = (
+        SearchTerm(term=term, kind=kind, object_id=object_id,
+                   post_id=post_id, frequency=frequency, length=len(tokens))
+        for kind, object_id, post_id, text
+        in documents(apps, connection.alias)
+        for tokens in [tokenize(text)]
+        for term, frequency in Counter(tokens).items()
+    )
+    for batch in batches(terms):
+        SearchTerm.objects.using(connection.alias).bulk_create(batch)
+
+
+def build_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if (settings.SEARCH_BACKEND != 'python'
+            and fts5_supported(connection)):
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+            f'USING fts5(body, post_id UNINDEXED, '
+            f"tokenize='unicode61 remove_diacritics 0')")
+        fill_fts(apps, connection)
+    else:
+        fill_terms(apps, connection)
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100, verbose_name='Основа слова')),
+                ('kind', models.CharField(max_length=10, verbose_name='Тип документа')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id документа')),
+                ('frequency', models.PositiveIntegerField(verbose_name='Число вхождений')),
+                ('length', models.PositiveIntegerField(verbose_name='Длина документа')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Post', verbose_name='пост')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['term'], name='search_term_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['kind', 'object_id'], name='search_document_idx'),
+        ),
+        migrations.RunPython(build_index, drop_index),
+    ]
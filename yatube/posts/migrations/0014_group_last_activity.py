@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:05
+
+from django.db import migrations, models
+from django.db.models import DateTimeField, Max, OuterRef, Subquery
+
+
+def fill_last_activity(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    Group.objects.update(last_activity=Subquery(
+        Post.objects.filter(group=OuterRef('pk'))
+        .order_by()
+        .values('group')
+        .annotate(latest=Max('pub_date'))
+        .values('latest'),
+        output_field=DateTimeField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='last_activity',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последняя публикация'),
+        ),
+        migrations.RunPython(fill_last_activity, migrations.RunPython.noop),
+    ]
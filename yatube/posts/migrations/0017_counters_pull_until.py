@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_timeline_post_cursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercounters',
+            name='pull_until',
+            field=models.DateTimeField(blank=True, help_text='Посты, опубликованные до этой даты, пока у автора было много подписчиков, подмешиваются к лентам при чтении', null=True, verbose_name='Подмешивать посты до'),
+        ),
+    ]
@@ -3,11 +3,24 @@ from django.db import models
 from .validators import validate_not_empty
 from django.conf import settings
 from core.models import CreatedModel
+from core.storage import ContentAddressedStorage
 
 User = get_user_model()
 SYMBOLS = settings.SYMBOLS_FOR_TEXT_POST_STR
 
 
+class PostQuerySet(models.QuerySet):
+    """QuerySet постов с выборками для лент."""
+    feed_related = ('author', 'group')
+
+    def for_feed(self):
+        """
+        Посты с автором и группой, загруженными одним JOIN:
+        шаблоны лент обращаются к post.author и post.group.
+        """
+        return self.select_related(*self.feed_related)
+
+
 class Post(models.Model):
     """
     Класс Post используется для создания моделей Post
@@ -22,8 +35,7 @@ class Post(models.Model):
     )
     pub_date = models.DateTimeField(
         verbose_name='Дата публикации',
-        auto_now_add=True,
-        db_index=True
+        auto_now_add=True
     )
     author = models.ForeignKey(
         User,
@@ -43,8 +55,16 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         """
@@ -52,6 +72,15 @@ class Post(models.Model):
         класса Post.
         """
         ordering = ['-pub_date', '-pk']
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['image'], name='post_image_idx'),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -68,6 +97,17 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=100, unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Количество постов',
+        default=0,
+        editable=False
+    )
+    last_activity = models.DateTimeField(
+        verbose_name='Последняя публикация',
+        blank=True,
+        null=True,
+        editable=False
+    )
 
     def __str__(self) -> str:
         return self.title
@@ -106,6 +146,10 @@ class Comment(CreatedModel):
         класса Comment.
         """
         ordering = ['-created', '-pk']
+        indexes = [
+            models.Index(fields=['post', '-created', '-id'],
+                         name='comment_post_created_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.text[:SYMBOLS]
@@ -135,6 +179,10 @@ class Follow(CreatedModel):
         класса Follow.
         """
         db_table = 'follow'
+        indexes = [
+            models.Index(fields=['author', 'user'],
+                         name='follow_author_user_idx'),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['user', 'author'], name='unique_follow')
@@ -142,3 +190,129 @@ class Follow(CreatedModel):
 
     def __str__(self) -> str:
         return self.author.username
+
+
+class TimelineEntry(models.Model):
+    """
+    Класс TimelineEntry используется для хранения материализованной
+    ленты подписок: запись появляется у каждого подписчика автора
+    при публикации поста (fan-out on write).
+    """
+    user = models.ForeignKey(
+        User,
+        verbose_name='читатель',
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        verbose_name='пост',
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='автор',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        """
+        Внутренний класс Meta для хранения метаданных
+        класса TimelineEntry.
+        """
+        ordering = ['-pub_date', '-pk']
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_pub_post_idx'),
+            models.Index(fields=['user', 'author'],
+                         name='timeline_user_author_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry')
+        ]
+
+    def __str__(self) -> str:
+        return str(self.post)
+
+
+class UserCounters(models.Model):
+    """
+    Класс UserCounters используется для хранения денормализованных
+    счетчиков пользователя: постов, подписчиков и подписок.
+    """
+    user = models.OneToOneField(
+        User,
+        verbose_name='пользователь',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters'
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Количество постов',
+        default=0
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0
+    )
+    following_count = models.PositiveIntegerField(
+        verbose_name='Количество подписок',
+        default=0
+    )
+    pull_until = models.DateTimeField(
+        verbose_name='Подмешивать посты до',
+        help_text='Посты, опубликованные до этой даты, пока у автора '
+                  'было много подписчиков, подмешиваются к лентам '
+                  'при чтении',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        """
+        Внутренний класс Meta для хранения метаданных
+        класса UserCounters.
+        """
+        verbose_name = 'Счетчики пользователя'
+        verbose_name_plural = 'Счетчики пользователей'
+
+    def __str__(self) -> str:
+        return str(self.user)
+
+
+class SearchTerm(models.Model):
+    """
+    Класс SearchTerm используется для хранения инвертированного
+    индекса полнотекстового поиска, если SQLite FTS5 недоступен:
+    основа слова и число ее вхождений в текст поста или комментария.
+    """
+    term = models.CharField(verbose_name='Основа слова', max_length=100)
+    kind = models.CharField(verbose_name='Тип документа', max_length=10)
+    object_id = models.PositiveIntegerField(verbose_name='id документа')
+    post = models.ForeignKey(
+        Post,
+        verbose_name='пост',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    frequency = models.PositiveIntegerField(
+        verbose_name='Число вхождений')
+    length = models.PositiveIntegerField(verbose_name='Длина документа')
+
+    class Meta:
+        """
+        Внутренний класс Meta для хранения метаданных
+        класса SearchTerm.
+        """
+        indexes = [
+            models.Index(fields=['term'], name='search_term_idx'),
+            models.Index(fields=['kind', 'object_id'],
+                         name='search_document_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return self.term
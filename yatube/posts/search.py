@@ -0,0 +1,290 @@
+"""
+Полнотекстовый поиск по постам и комментариям.
+
+Тексты разбиваются на слова, слова приводятся к основе стеммером
+(core.stemmer), и в индекс попадают основы. Индекс хранится
+в виртуальной таблице SQLite FTS5, если она доступна, иначе
+в таблице SearchTerm (инвертированный индекс, релевантность BM25
+считается в Python). Индекс обновляется сигналами при сохранении
+и удалении постов и комментариев.
+
+Для IDF инвертированному индексу нужно число документов: оно хранится
+в кэше и меняется при добавлении и удалении документов, а при промахе
+(и не реже раза в FEED_CACHE_TIMEOUT) считается по базе заново.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, connection
+
+from core.stemmer import stem
+from .models import Comment, Post, SearchTerm
+
+MAX_RESULTS = settings.SEARCH_MAX_RESULTS
+BATCH_SIZE = 1000
+POST = 'post'
+COMMENT = 'comment'
+# Совпадение в комментарии весит вдвое меньше совпадения в посте.
+WEIGHTS = {POST: 1.0, COMMENT: 0.5}
+WORD_RE = re.compile(r'\w+')
+TERM_LENGTH = 100
+DOCUMENTS_KEY = 'search:documents'
+DOCUMENTS_TIMEOUT = settings.FEED_CACHE_TIMEOUT
+
+
+def tokenize(text):
+    """Возвращает основы слов текста text."""
+    return [stem(word)[:TERM_LENGTH] for word in WORD_RE.findall(text)]
+
+
+def _batches(documents, size=BATCH_SIZE):
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class FTS5Index:
+    """
+    Индекс в виртуальной таблице FTS5. rowid документа вычисляется
+    из его типа и pk, поэтому обновление и удаление идут по rowid.
+    """
+    table = 'posts_search_fts'
+
+    def _rowid(self, kind, object_id):
+        return object_id * 2 + (kind == COMMENT)
+
+    def create(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} '
+                f'USING fts5(body, post_id UNINDEXED, '
+                f"tokenize='unicode61 remove_diacritics 0')")
+
+    def drop(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def add(self, documents):
+        rows = [(self._rowid(kind, object_id), ' '.join(tokenize(text)),
+                 post_id)
+                for kind, object_id, post_id, text in documents]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {self.table}(rowid, body, post_id) '
+                f'VALUES (%s, %s, %s)', rows)
+
+    def remove(self, kind, object_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s',
+                           [self._rowid(kind, object_id)])
+
+    def search(self, terms, limit):
+        match = ' '.join(f'"{term}"' for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id, bm25({self.table}) * CASE rowid %% 2 '
+                f'WHEN 0 THEN %s ELSE %s END AS score '
+                f'FROM {self.table} WHERE {self.table} MATCH %s '
+                f'ORDER BY score LIMIT %s',
+                [WEIGHTS[POST], WEIGHTS[COMMENT], match, limit])
+            return [post_id for post_id, _ in cursor.fetchall()]
+
+
+class InvertedIndex:
+    """
+    Инвертированный индекс в таблице SearchTerm: одна строка
+    на основу слова в документе.
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def document_count(self):
+        """Возвращает число постов и комментариев для IDF."""
+        total = cache.get(DOCUMENTS_KEY)
+        if total is None:
+            total = Post.objects.count() + Comment.objects.count()
+            cache.set(DOCUMENTS_KEY, total, DOCUMENTS_TIMEOUT)
+        return total
+
+    def _count_documents(self, delta):
+        if delta:
+            try:
+                cache.incr(DOCUMENTS_KEY, delta)
+            except ValueError:
+                # Числа нет в кэше: его посчитает следующий поиск.
+                pass
+
+    def clear(self):
+        SearchTerm.objects.all().delete()
+        cache.delete(DOCUMENTS_KEY)
+
+    def add(self, documents):
+        documents = list(documents)
+        indexed = 0
+        for kind in WEIGHTS:
+            ids = [object_id for document_kind, object_id, _, _ in documents
+                   if document_kind == kind]
+            if ids:
+                existing = SearchTerm.objects.filter(
+                    kind=kind, object_id__in=ids)
+                indexed += existing.values('object_id').distinct().count()
+                existing.delete()
+        self._count_documents(len(documents) - indexed)
+        terms = []
+        for kind, object_id, post_id, text in documents:
+            tokens = tokenize(text)
+            terms.extend(
+                SearchTerm(term=term, kind=kind, object_id=object_id,
+                           post_id=post_id, frequency=frequency,
+                           length=len(tokens))
+                for term, frequency in Counter(tokens).items())
+        SearchTerm.objects.bulk_create(terms, batch_size=BATCH_SIZE)
+
+    def remove(self, kind, object_id):
+        # Строки поста могли уже удалиться каскадом, документ все равно
+        # удален из базы.
+        SearchTerm.objects.filter(kind=kind, object_id=object_id).delete()
+        self._count_documents(-1)
+
+    def search(self, terms, limit):
+        """
+        Ранжирует документы, содержащие все основы terms, по BM25.
+        Средняя длина документа оценивается по найденным документам.
+        """
+        terms = set(terms)
+        documents = defaultdict(dict)
+        meta = {}
+        rows = SearchTerm.objects.filter(term__in=terms).values_list(
+            'term', 'kind', 'object_id', 'post_id', 'frequency', 'length')
+        for term, kind, object_id, post_id, frequency, length in rows:
+            documents[kind, object_id][term] = frequency
+            meta[kind, object_id] = (post_id, length)
+        if not documents:
+            return []
+        total = self.document_count()
+        frequencies = Counter(
+            term for found in documents.values() for term in found)
+        idf = {term: math.log(1 + (total - count + 0.5) / (count + 0.5))
+               for term, count in frequencies.items()}
+        average = sum(length for _, length in meta.values()) / len(meta)
+        scores = {}
+        for key, found in documents.items():
+            if len(found) < len(terms):
+                continue
+            post_id, length = meta[key]
+            norm = self.k1 * (1 - self.b + self.b * length / average)
+            score = WEIGHTS[key[0]] * sum(
+                idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+                for term, frequency in found.items())
+            scores[post_id] = max(score, scores.get(post_id, 0))
+        ranked = sorted(scores, key=lambda pk: (-scores[pk], -pk))
+        return ranked[:limit]
+
+
+_fts5_ready = None
+
+
+def fts5_supported():
+    """Проверяет, собран ли SQLite с модулем FTS5."""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                'CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(body)')
+        except OperationalError:
+            return False
+        cursor.execute('DROP TABLE temp.fts5_probe')
+    return True
+
+
+def get_index():
+    """Возвращает индекс, которым пользуется поиск."""
+    global _fts5_ready
+    if settings.SEARCH_BACKEND == 'python':
+        return InvertedIndex()
+    if _fts5_ready is None:
+        _fts5_ready = (
+            FTS5Index.table in connection.introspection.table_names())
+    return FTS5Index() if _fts5_ready else InvertedIndex()
+
+
+def create_index():
+    """Создает таблицу FTS5, если SQLite ее поддерживает."""
+    global _fts5_ready
+    if settings.SEARCH_BACKEND != 'python' and fts5_supported():
+        FTS5Index().create()
+        _fts5_ready = True
+
+
+def drop_index():
+    """Удаляет таблицу FTS5."""
+    global _fts5_ready
+    FTS5Index().drop()
+    _fts5_ready = False
+
+
+def index_all(posts, comments):
+    """Добавляет в индекс посты posts и комментарии comments."""
+    index = get_index()
+    posts = posts.order_by().values_list('pk', 'pk', 'text')
+    comments = comments.order_by().values_list('pk', 'post_id', 'text')
+    for kind, queryset in ((POST, posts), (COMMENT, comments)):
+        for batch in _batches(queryset.iterator()):
+            index.add((kind, object_id, post_id, text)
+                      for object_id, post_id, text in batch)
+
+
+def rebuild(post_model=Post, comment_model=Comment):
+    """Заново строит индекс по всем постам и комментариям."""
+    get_index().clear()
+    index_all(post_model.objects.all(), comment_model.objects.all())
+
+
+def index_post(post):
+    """Добавляет пост в индекс или обновляет его."""
+    get_index().add([(POST, post.pk, post.pk, post.text)])
+
+
+def index_comment(comment):
+    """Добавляет комментарий в индекс или обновляет его."""
+    get_index().add([(COMMENT, comment.pk, comment.post_id, comment.text)])
+
+
+def remove_post(post_id):
+    """Удаляет пост из индекса."""
+    get_index().remove(POST, post_id)
+
+
+def remove_comment(comment_id):
+    """Удаляет комментарий из индекса."""
+    get_index().remove(COMMENT, comment_id)
+
+
+def search(query, limit=MAX_RESULTS):
+    """
+    Возвращает id постов, в тексте или комментариях которых есть
+    все слова query, от самых релевантных к менее релевантным.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return []
+    result = []
+    seen = set()
+    for post_id in get_index().search(terms, limit):
+        if post_id not in seen:
+            seen.add(post_id)
+            result.append(post_id)
+    return result
@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import counters, feed_cache, follow_graph, images, search, timeline
+from .models import Comment, Follow, Group, Post, UserCounters
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """Создает счетчики нового пользователя."""
+    if created:
+        UserCounters.objects.get_or_create(user=instance)
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    """
+    Запоминает исходные группу, картинку и текст поста для пересчета
+    счетчиков, подготовки миниатюр и обновления поискового индекса.
+    """
+    instance._initial_group_id = instance.__dict__.get('group_id')
+    instance._initial_text = instance.__dict__.get('text')
+    image = instance.__dict__.get('image')
+    instance._initial_image = getattr(image, 'name', image) or None
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    """
+    Обновляет счетчики постов автора и группы, версию поста
+    в кэше ленты, поисковый индекс, ставит в очередь обработку
+    новой картинки и раскладывает новый пост по лентам подписчиков
+    автора.
+    """
+    feed_cache.bump_post(instance.pk)
+    if created or instance.text != instance._initial_text:
+        search.index_post(instance)
+        instance._initial_text = instance.text
+    image = instance.image.name or None
+    if image != instance._initial_image:
+        if image:
+            images.schedule_on_commit(image)
+        instance._initial_image = image
+    if created:
+        counters.bump_user(instance.author_id, 'posts_count', 1)
+        counters.bump_group(instance.group_id, 1, instance.pub_date)
+        timeline.fan_out(instance)
+    elif instance._initial_group_id != instance.group_id:
+        counters.bump_group(instance._initial_group_id, -1)
+        counters.bump_group(instance.group_id, 1, instance.pub_date)
+    instance._initial_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """
+    Уменьшает счетчики постов автора и группы и удаляет пост
+    из поискового индекса.
+    """
+    feed_cache.bump_post(instance.pk)
+    search.remove_post(instance.pk)
+    counters.bump_user(instance.author_id, 'posts_count', -1)
+    counters.bump_group(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    """
+    Обновляет версию групп в кэше ленты и таблицы групп. Версия
+    меняется еще раз после фиксации транзакции: таблица, прочитанная
+    другим процессом до фиксации, не переживет изменение.
+    """
+    feed_cache.bump_groups()
+    transaction.on_commit(feed_cache.bump_groups)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    """
+    Увеличивает счетчик комментариев поста и обновляет
+    поисковый индекс.
+    """
+    search.index_comment(instance)
+    if created:
+        counters.bump_post(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """
+    Уменьшает счетчик комментариев поста и удаляет комментарий
+    из поискового индекса.
+    """
+    counters.bump_post(instance.post_id, -1)
+    search.remove_comment(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    """
+    Обновляет счетчики подписок и граф подписок, заполняет ленту
+    подписчика постами нового автора.
+    """
+    follow_graph.changed(instance.user_id, instance.author_id)
+    if created:
+        counters.bump_user(instance.author_id, 'followers_count', 1)
+        counters.bump_user(instance.user_id, 'following_count', 1)
+        timeline.backfill(instance.user, instance.author)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """
+    Обновляет счетчики подписок и граф подписок, убирает посты автора
+    из ленты отписавшегося пользователя.
+    """
+    follow_graph.changed(instance.user_id, instance.author_id)
+    counters.bump_user(instance.author_id, 'followers_count', -1)
+    counters.bump_user(instance.user_id, 'following_count', -1)
+    timeline.prune(instance.user_id, instance.author_id)
+    timeline.release(instance.author_id)
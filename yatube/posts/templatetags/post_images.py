@@ -0,0 +1,16 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def ready_thumbnail(image, geometry):
+    """
+    Возвращает готовую миниатюру картинки поста или None,
+    если она еще создается в фоне.
+    """
+    if not image:
+        return None
+    return thumbnails.get_ready(image, geometry)
@@ -0,0 +1,149 @@
+import json
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ApiTest(TestCase):
+    """
+    Класс для создания тестов для проверки JSON API лент
+    и условных GET-запросов.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(3):
+            Post.objects.create(
+                text=f'Тестовый пост {i}',
+                author=cls.user,
+                group=cls.group,
+            )
+        cls.post = Post.objects.first()
+        Comment.objects.create(
+            post=cls.post,
+            author=cls.user,
+            text='Тестовый комментарий',
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+
+    def get_json(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_feeds_return_posts(self):
+        """Ленты API отдают посты в порядке лент сайта."""
+        urls = (
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list',
+                    kwargs={'slug': self.group.slug}),
+            reverse('posts:api_profile',
+                    kwargs={'username': self.user.username}),
+        )
+        expected = list(Post.objects.values_list('pk', flat=True))
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.get_json(self.client.get(url))
+                self.assertEqual(
+                    [post['id'] for post in data['results']], expected)
+                first = data['results'][0]
+                self.assertEqual(first['author'], self.user.username)
+                self.assertEqual(first['group']['slug'], self.group.slug)
+                self.assertIsNone(data['next'])
+
+    def test_feed_pages_by_cursor(self):
+        """Лента API разбивается на страницы курсором next."""
+        url = reverse('posts:api_index')
+        with mock.patch('posts.api.COUNT_PER_PAGE', 2):
+            first = self.get_json(self.client.get(url))
+            second = self.get_json(
+                self.client.get(url, {'after': first['next']}))
+        self.assertEqual(len(first['results']), 2)
+        self.assertEqual(len(second['results']), 1)
+        self.assertIsNotNone(second['previous'])
+
+    def test_post_detail(self):
+        """Пост отдается вместе с комментариями."""
+        data = self.get_json(self.client.get(reverse(
+            'posts:api_post_detail', kwargs={'post_id': self.post.pk})))
+        self.assertEqual(data['post']['text'], self.post.text)
+        self.assertEqual([comment['text'] for comment in data['comments']],
+                         ['Тестовый комментарий'])
+        response = self.client.get(reverse(
+            'posts:api_post_detail', kwargs={'post_id': 0}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_unchanged_feed_returns_not_modified(self):
+        """Неизменившаяся лента отдает 304 без тела."""
+        url = reverse('posts:api_index')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        with mock.patch('posts.api._post') as serialize:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        serialize.assert_not_called()
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_update_etag(self):
+        """Новый пост, правка поста и комментарий меняют ETag."""
+        feed_url = reverse('posts:api_index')
+        detail_url = reverse(
+            'posts:api_post_detail', kwargs={'post_id': self.post.pk})
+        feed_etag = self.client.get(feed_url)['ETag']
+        detail_etag = self.client.get(detail_url)['ETag']
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Измененный текст'
+        post.save()
+        edited_etag = self.client.get(feed_url)['ETag']
+        self.assertNotEqual(edited_etag, feed_etag)
+        Post.objects.create(text='Новый пост', author=self.user)
+        self.assertNotEqual(self.client.get(feed_url)['ETag'], edited_etag)
+        Comment.objects.create(post=post, author=self.user, text='Еще')
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_edit_updates_last_modified(self):
+        """
+        Правка поста сдвигает Last-Modified, даже если дата
+        публикации не изменилась.
+        """
+        url = reverse('posts:api_index')
+        last_modified = self.client.get(url)['Last-Modified']
+        with mock.patch('posts.feed_cache.time.time',
+                        return_value=time.time() + 60):
+            post = Post.objects.get(pk=self.post.pk)
+            post.text = 'Измененный текст'
+            post.save()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['Last-Modified'], last_modified)
+
+    def test_image_url_from_field_storage(self):
+        """Адрес картинки строит хранилище поля image."""
+        Post.objects.filter(pk=self.post.pk).update(image='posts/photo.jpg')
+        storage = Post._meta.get_field('image').storage
+        with mock.patch.object(storage, 'url',
+                               return_value='/cdn/photo.jpg') as url:
+            data = self.get_json(self.client.get(reverse(
+                'posts:api_post_detail', kwargs={'post_id': self.post.pk})))
+        self.assertEqual(data['post']['image'], '/cdn/photo.jpg')
+        url.assert_called_once_with('posts/photo.jpg')
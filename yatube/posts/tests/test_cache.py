@@ -5,7 +5,7 @@ from django.conf import settings
 from django.core.paginator import Paginator
 from django.core.cache import cache
 
-from posts.models import Post, Group
+from posts.models import Follow, Group, Post
 
 User = get_user_model()
 COUNT_PER_PAGE = settings.COUNT_PER_PAGE
@@ -49,21 +49,129 @@ class CacheTest(TestCase):
 
     def test_cache_index(self):
         """Тест для проверки кеширования главной страницы index."""
-        object_count = Post.objects.count()
+        cache.clear()
+        response_cached = self.client.get(reverse('posts:index'))
+        Post.objects.filter(pk=Post.objects.first().pk).update(
+            text='Изменено в обход сигналов.')
+        response_stale = self.client.get(reverse('posts:index'))
+        self.assertEqual(response_cached.content, response_stale.content)
+        cache.clear()
+        response_fresh = self.client.get(reverse('posts:index'))
+        self.assertIn('Изменено в обход сигналов.',
+                      response_fresh.content.decode())
+
+    def test_cache_index_invalidated_on_delete(self):
+        """Удаленный пост сразу исчезает из кэшированной ленты."""
+        cache.clear()
+        deleted = Post.objects.order_by('id').last()
         response_predelete = self.client.get(reverse('posts:index'))
-        cached_object = Post.objects.order_by('id')
-        cached_object = cached_object.last()
-        cached_object_dict = {
-            'text': cached_object.text,
-        }
-        self.assertEqual(cached_object_dict['text'], self.post_obj[-1].text)
-        self.assertIn(cached_object.text, response_predelete.content.decode())
-        Post.objects.filter(pk=cached_object.pk).delete()
+        self.assertIn(deleted.text, response_predelete.content.decode())
+        deleted.delete()
         response_deleted = self.client.get(reverse('posts:index'))
-        content_deleted = response_deleted.content
-        self.assertEqual(Post.objects.count(), object_count - ABSTRACT_OBJECT)
-        self.assertEqual(response_predelete.content, content_deleted)
+        self.assertNotIn(deleted.text, response_deleted.content.decode())
+
+    def test_cache_index_invalidated_on_edit(self):
+        """Отредактированный пост сразу обновляется в ленте."""
         cache.clear()
-        response_cached = self.client.get(reverse('posts:index'))
-        content_cached = response_cached.content
-        self.assertNotEqual(content_deleted, content_cached)
+        edited = Post.objects.order_by('id').last()
+        self.client.get(reverse('posts:index'))
+        edited.text = 'Отредактированный текст.'
+        edited.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertIn('Отредактированный текст.', response.content.decode())
+
+    def test_new_post_keeps_next_pages_cached(self):
+        """
+        Новый пост меняет первую страницу, но не сбрасывает
+        кэш страниц, открытых по курсору.
+        """
+        cache.clear()
+        first = self.client.get(reverse('posts:index'))
+        url = (reverse('posts:index')
+               + '?after=' + first.context['page_obj'].next_cursor)
+        second = self.client.get(url)
+        Post.objects.filter(
+            pk__in=[post.pk for post in second.context['page_obj']]
+        ).update(text='Изменено в обход сигналов.')
+        new_post = Post.objects.create(
+            text='Совсем новый пост для кэша.', author=self.user)
+        self.assertIn(
+            new_post.text,
+            self.client.get(reverse('posts:index')).content.decode())
+        self.assertEqual(second.content, self.client.get(url).content)
+
+
+class ViewerCacheTest(TestCase):
+    """
+    Класс для создания тестов для проверки общих для всех зрителей
+    фрагментов страниц и частей, зависящих от зрителя.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.other_author = User.objects.create_user(username='other')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(
+            text='Пост автора.', author=cls.author)
+        cls.other_post = Post.objects.create(
+            text='Пост другого автора.', author=cls.other_author)
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.other_author)
+
+    def setUp(self):
+        cache.clear()
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_profile_posts_shared_follow_button_per_viewer(self):
+        """
+        Список постов профиля общий для зрителей, кнопка подписки -
+        своя у каждого.
+        """
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        response = self.follower_client.get(url)
+        self.assertContains(response, 'Отписаться')
+        Post.objects.filter(pk=self.post.pk).update(
+            text='Изменено в обход сигналов.')
+        response = self.reader_client.get(url)
+        self.assertContains(response, 'Подписаться')
+        self.assertNotContains(response, 'Отписаться')
+        self.assertContains(response, 'Пост автора.')
+        self.assertContains(self.client.get(url), 'Пост автора.')
+
+    def test_follow_feed_is_not_shared_between_users(self):
+        """Лента подписок одного пользователя не видна другому."""
+        url = reverse('posts:follow_index')
+        self.assertContains(self.follower_client.get(url), 'Пост автора.')
+        response = self.reader_client.get(url)
+        self.assertContains(response, 'Пост другого автора.')
+        self.assertNotContains(response, 'Пост автора.')
+
+    def test_feeds_share_post_list(self):
+        """Лента подписок использует фрагмент с теми же постами."""
+        self.follower_client.get(reverse('posts:follow_index'))
+        Post.objects.filter(pk=self.post.pk).update(
+            text='Изменено в обход сигналов.')
+        response = self.follower_client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'Пост автора.')
+        response = self.follower_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Изменено в обход сигналов.')
+
+    def test_switcher_rendered_per_viewer(self):
+        """Вкладки ленты не попадают в общий фрагмент."""
+        self.client.get(reverse('posts:index'))
+        response = self.follower_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Избранные авторы')
+
+    def test_edit_link_only_for_author(self):
+        """Ссылка на редактирование поста видна только автору."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        edit_url = reverse('posts:post_edit',
+                           kwargs={'post_id': self.post.pk})
+        self.assertNotContains(self.reader_client.get(url), edit_url)
+        author_client = Client()
+        author_client.force_login(self.author)
+        self.assertContains(author_client.get(url), edit_url)
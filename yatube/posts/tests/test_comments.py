@@ -0,0 +1,60 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+COMMENTS = 5
+PER_PAGE = 2
+
+
+@mock.patch('posts.views.COMMENTS_PER_PAGE', PER_PAGE)
+class CommentsPaginationTest(TestCase):
+    """
+    Класс для создания тестов для проверки постраничного
+    вывода и подгрузки комментариев поста.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+        for i in range(COMMENTS):
+            Comment.objects.create(
+                post=cls.post,
+                author=cls.user,
+                text=f'Комментарий {i}',
+            )
+        cls.expected = list(Comment.objects.filter(post=cls.post))
+
+    def setUp(self) -> None:
+        self.client = Client()
+
+    def test_post_detail_shows_first_comments(self):
+        """Страница поста выводит только первую страницу комментариев."""
+        response = self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}))
+        comments = response.context['comments']
+        self.assertEqual(list(comments), self.expected[:PER_PAGE])
+        self.assertContains(
+            response,
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+            + f'?after={comments.next_cursor}')
+
+    def test_fragments_load_remaining_comments(self):
+        """Фрагменты по курсору next отдают остальные комментарии."""
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        loaded = []
+        cursor = ''
+        while True:
+            response = self.client.get(url, {'after': cursor})
+            self.assertTemplateUsed(response, 'posts/includes/comments.html')
+            self.assertNotContains(response, '<html')
+            comments = response.context['comments']
+            loaded.extend(comments)
+            if not comments.has_next():
+                break
+            cursor = comments.next_cursor
+        self.assertEqual(loaded, self.expected)
@@ -0,0 +1,102 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, UserCounters
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    """
+    Класс для создания тестов для проверки работы
+    денормализованных счетчиков.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.group_second = Group.objects.create(
+            title='Тестовая группа 2',
+            slug='test-slug-second',
+            description='Тестовое описание 2',
+        )
+
+    def setUp(self) -> None:
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def counters(self, user):
+        return UserCounters.objects.get(user=user)
+
+    def test_post_counters(self):
+        """Создание, перенос в другую группу и удаление поста."""
+        post = Post.objects.create(
+            text='Пост', author=self.user, group=self.group)
+        self.assertEqual(self.counters(self.user).posts_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.group_second
+        post.save()
+        self.group.refresh_from_db()
+        self.group_second.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.group_second.posts_count, 1)
+        post.delete()
+        self.group_second.refresh_from_db()
+        self.assertEqual(self.counters(self.user).posts_count, 0)
+        self.assertEqual(self.group_second.posts_count, 0)
+
+    def test_comment_counter(self):
+        """Создание и удаление комментария."""
+        post = Post.objects.create(text='Пост', author=self.user)
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий')
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_follow_counters(self):
+        """Подписка и отписка."""
+        follow = Follow.objects.create(user=self.reader, author=self.user)
+        self.assertEqual(self.counters(self.user).followers_count, 1)
+        self.assertEqual(self.counters(self.reader).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.counters(self.user).followers_count, 0)
+        self.assertEqual(self.counters(self.reader).following_count, 0)
+
+    def test_recount_command_repairs_drift(self):
+        """Команда recount_counters исправляет расхождения счетчиков."""
+        Post.objects.bulk_create([
+            Post(text='Пост {i}'.format(i=i),
+                 author=self.user,
+                 group=self.group) for i in range(3)])
+        UserCounters.objects.filter(user=self.reader).delete()
+        call_command('recount_counters', stdout=StringIO())
+        self.group.refresh_from_db()
+        self.assertEqual(self.counters(self.user).posts_count, 3)
+        self.assertEqual(self.group.posts_count, 3)
+        self.assertEqual(self.counters(self.reader).posts_count, 0)
+
+    def test_profile_reads_counter_without_count_query(self):
+        """Страница профиля не выполняет COUNT по постам."""
+        Post.objects.create(text='Пост', author=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(reverse(
+                'posts:profile', kwargs={'username': self.user.username}))
+        self.assertEqual(response.context['post_quantity'], 1)
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
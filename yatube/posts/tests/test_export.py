@@ -0,0 +1,106 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import exporter
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ExportTest(TestCase):
+    """
+    Класс для создания тестов для проверки потоковой выгрузки
+    постов автора и группы.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(5):
+            post = Post.objects.create(
+                text=f'Тестовый пост {i}',
+                author=cls.user,
+                group=cls.group,
+            )
+            Comment.objects.create(
+                post=post, author=cls.user, text=f'Комментарий {i}')
+        Post.objects.create(text='Пост без группы', author=cls.user)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_records_are_read_in_chunks(self):
+        """Комментарии загружаются одним запросом на пачку постов."""
+        with CaptureQueriesContext(connection) as queries:
+            items = list(exporter.records(
+                Post.objects.filter(group=self.group), chunk_size=2))
+        self.assertEqual(len(items), 10)
+        self.assertEqual(len(queries), 1 + 3)
+        self.assertEqual([item['type'] for item in items[:2]],
+                         ['post', 'comment'])
+        self.assertEqual(items[1]['post'], items[0]['id'])
+        self.assertEqual(items[0]['text'], 'Тестовый пост 4')
+
+    @mock.patch('posts.exporter.LOOKUP_BATCH_SIZE', 2)
+    def test_comment_lookups_are_batched(self):
+        """Запрос комментариев получает не больше LOOKUP_BATCH_SIZE id."""
+        with CaptureQueriesContext(connection) as queries:
+            items = list(exporter.records(
+                Post.objects.filter(group=self.group), chunk_size=1000))
+        self.assertEqual(len(items), 10)
+        self.assertEqual(len(queries), 1 + 3)
+
+    def test_export_group_jsonl(self):
+        """Выгрузка группы отдается потоком JSONL."""
+        response = self.authorized_client.get(
+            reverse('posts:export_group', kwargs={'slug': 'test-slug'}))
+        self.assertTrue(response.streaming)
+        self.assertIn('group-test-slug.jsonl',
+                      response['Content-Disposition'])
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        items = [json.loads(line) for line in lines]
+        self.assertEqual(len(items), 10)
+        self.assertEqual(items[0]['group'], 'test-slug')
+
+    def test_export_profile_csv(self):
+        """Выгрузка автора в CSV содержит посты и комментарии."""
+        response = self.authorized_client.get(
+            reverse('posts:export_profile', kwargs={'username': 'auth'}),
+            {'format': 'csv'})
+        self.assertEqual(response['Content-Type'], exporter.FORMATS['csv'])
+        rows = list(csv.DictReader(StringIO(
+            b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 11)
+        self.assertEqual(rows[0]['text'], 'Пост без группы')
+        self.assertEqual(rows[0]['group'], '')
+
+    def test_export_requires_login(self):
+        """Выгрузка недоступна анониму."""
+        url = reverse('posts:export_group', kwargs={'slug': 'test-slug'})
+        response = Client().get(url)
+        self.assertRedirects(response, f'/auth/login/?next={url}')
+
+    def test_export_command(self):
+        """Команда export_posts пишет выгрузку в файл."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'group.jsonl')
+            call_command('export_posts', '--group', 'test-slug',
+                         '--output', path, '--chunk-size', '2')
+            with open(path, encoding='utf-8') as stream:
+                self.assertEqual(len(stream.readlines()), 10)
@@ -0,0 +1,109 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import follow_graph
+from posts.management.commands import follow_graph_benchmark
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTest(TestCase):
+    """
+    Класс для создания тестов для проверки графа подписок в кэше.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [User.objects.create_user(username=f'author_{i}')
+                       for i in range(3)]
+        for author in cls.authors[:2]:
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_lookups_do_not_query_db_when_cached(self):
+        """Проверки, числа и списки подписок читаются из кэша."""
+        first, second, other = (author.pk for author in self.authors)
+        follow_graph.following(self.reader.pk)
+        follow_graph.followers(first)
+        with self.assertNumQueries(0):
+            self.assertTrue(follow_graph.is_following(self.reader.pk, first))
+            self.assertFalse(follow_graph.is_following(self.reader.pk, other))
+            self.assertEqual(list(follow_graph.following(self.reader.pk)),
+                             sorted([first, second]))
+            self.assertEqual(follow_graph.following_count(self.reader.pk), 2)
+            self.assertEqual(list(follow_graph.followers(first)),
+                             [self.reader.pk])
+            self.assertEqual(follow_graph.followers_count(first), 1)
+
+    def test_many_users_load_in_one_query(self):
+        """Массивы нескольких пользователей загружаются одним запросом."""
+        user_ids = [self.reader.pk] + [author.pk for author in self.authors]
+        with self.assertNumQueries(1):
+            following = follow_graph.following_many(user_ids)
+        self.assertEqual(len(following[self.reader.pk]), 2)
+        self.assertEqual(len(following[self.authors[0].pk]), 0)
+
+    def test_graph_is_updated_on_follow_writes(self):
+        """Подписка и отписка сразу видны в графе."""
+        author = self.authors[2]
+        self.assertFalse(follow_graph.is_following(self.reader.pk, author.pk))
+        follow = Follow.objects.create(user=self.reader, author=author)
+        self.assertTrue(follow_graph.is_following(self.reader.pk, author.pk))
+        self.assertEqual(follow_graph.followers_count(author.pk), 1)
+        follow.delete()
+        self.assertFalse(follow_graph.is_following(self.reader.pk, author.pk))
+        self.assertEqual(follow_graph.followers_count(author.pk), 0)
+
+    def test_writes_do_not_trust_stale_graph(self):
+        """Подписка и отписка пишут в базу, даже если граф устарел."""
+        author = self.authors[2]
+        follow_graph.following(self.reader.pk)
+        Follow.objects.bulk_create([Follow(user=self.reader, author=author)])
+        self.client.get(reverse('posts:profile_unfollow',
+                                kwargs={'username': author.username}))
+        self.assertFalse(Follow.objects.filter(
+            user=self.reader, author=author).exists())
+        follow_graph.following(self.reader.pk)
+        Follow.objects.filter(
+            user=self.reader, author=self.authors[0]).delete()
+        cache.set(follow_graph.FOLLOWING_KEY.format(pk=self.reader.pk),
+                  follow_graph._pack([self.authors[0].pk]))
+        self.client.get(reverse('posts:profile_follow', kwargs={
+            'username': self.authors[0].username}))
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.authors[0]).exists())
+
+    def test_profile_follow_views(self):
+        """Подписка и отписка через страницы обновляют граф."""
+        author = self.authors[2]
+        url = reverse('posts:profile', kwargs={'username': author.username})
+        self.assertContains(self.client.get(url), 'Подписаться')
+        self.client.get(reverse('posts:profile_follow',
+                                kwargs={'username': author.username}))
+        self.assertContains(self.client.get(url), 'Отписаться')
+        self.client.get(reverse('posts:profile_unfollow',
+                                kwargs={'username': author.username}))
+        self.assertContains(self.client.get(url), 'Подписаться')
+        self.assertFalse(Follow.objects.filter(
+            user=self.reader, author=author).exists())
+
+    def test_benchmark(self):
+        """Бенчмарк отвечает так же, как база, без запросов к ней."""
+        result = follow_graph_benchmark.benchmark(lookups=20)
+        self.assertEqual(result['lookups'], 20)
+        self.assertEqual(result['query_count'], 20)
+        self.assertEqual(result['graph_count'], 0)
+        self.assertEqual(result['mismatches'], 0)
+        out = StringIO()
+        call_command('follow_graph_benchmark', '--lookups', '10', stdout=out)
+        self.assertIn('расхождений 0', out.getvalue())
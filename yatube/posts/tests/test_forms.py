@@ -109,6 +109,7 @@ class PostsFormsTests(TestCase):
         поста с картинкой.
         """
         post_count = Post.objects.count()
+        self.uploaded.seek(0)
         form_data = {
             'text': 'Post in da home',
             'group': self.group_second.pk,
@@ -0,0 +1,113 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import groups
+from posts.views import GROUPS_PER_PAGE
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class GroupLookupTest(TestCase):
+    """
+    Класс для создания тестов для проверки таблицы групп
+    и каталога групп.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Group.objects.create(
+            title='Пустая группа',
+            slug='empty',
+            description='Без постов',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_lookup_is_cached(self):
+        """Повторный поиск группы не обращается к базе."""
+        self.assertEqual(groups.by_slug('test-slug'), self.group)
+        with self.assertNumQueries(0):
+            self.assertEqual(groups.by_id(self.group.pk).slug, 'test-slug')
+            self.assertIsNone(groups.by_slug('missing'))
+
+    def test_lookup_is_invalidated_on_save_and_delete(self):
+        """Изменение и удаление группы видны сразу."""
+        groups.by_slug('test-slug')
+        group = Group.objects.get(slug='empty')
+        group.title = 'Новое название'
+        group.save()
+        self.assertEqual(groups.by_slug('empty').title, 'Новое название')
+        group.delete()
+        self.assertIsNone(groups.by_slug('empty'))
+
+    def test_group_page_does_not_query_group(self):
+        """Страница группы находит группу по slug без запроса к базе."""
+        url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.context['group'], self.group)
+        for query in queries.captured_queries:
+            self.assertFalse(query['sql'].startswith(
+                'SELECT "posts_group"'))
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_group_index(self):
+        """Каталог показывает число постов и дату последней публикации."""
+        post = Post.objects.create(
+            text='Пост', author=self.user, group=self.group)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:group_index'))
+        page = list(response.context['page_obj'])
+        self.assertEqual([group['slug'] for group in page],
+                         ['empty', 'test-slug'])
+        self.assertEqual(page[1]['posts_count'], 1)
+        self.assertEqual(page[1]['last_activity'], post.pub_date)
+        self.assertIsNone(page[0]['last_activity'])
+        for query in queries.captured_queries:
+            self.assertNotIn('"posts_post"', query['sql'])
+
+    def test_group_index_next_page(self):
+        """Каталог групп листается на следующую страницу."""
+        Group.objects.bulk_create(
+            Group(title=f'Группа {i:03}', slug=f'group-{i}')
+            for i in range(GROUPS_PER_PAGE))
+        response = self.client.get(reverse('posts:group_index'))
+        page_obj = response.context['page_obj']
+        self.assertTrue(page_obj.has_next())
+        response = self.client.get(
+            reverse('posts:group_index'), {'after': page_obj.next_cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [group['slug'] for group in response.context['page_obj']],
+            ['empty', 'test-slug'])
+
+    def test_recount_repairs_last_activity(self):
+        """recount_counters восстанавливает дату последней публикации."""
+        post = Post.objects.create(
+            text='Пост', author=self.user, group=self.group)
+        Group.objects.update(last_activity=None)
+        call_command('recount_counters', stdout=StringIO())
+        self.assertEqual(
+            Group.objects.get(pk=self.group.pk).last_activity,
+            post.pub_date)
+        out = StringIO()
+        call_command('recount_counters', stdout=out)
+        self.assertIn('Всего исправлено: 0', out.getvalue())
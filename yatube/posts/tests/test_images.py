@@ -0,0 +1,214 @@
+import os
+import shutil
+import tempfile
+import time
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import images
+from posts.forms import PostForm
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_jpeg(size=(800, 400), color='red'):
+    """Возвращает JPEG size с EXIF (поворот и модель камеры)."""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x0110] = 'Test camera'
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImagePipelineTest(TestCase):
+    """
+    Класс для создания тестов для проверки обработки
+    загруженных картинок постов.
+    """
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self, content, name='photo.jpg'):
+        return Post.objects.create(
+            text='Пост с картинкой.', author=self.user,
+            image=SimpleUploadedFile(name, content, 'image/jpeg'))
+
+    @mock.patch('posts.images.MAX_SIZE', 200)
+    @mock.patch('posts.thumbnails.generate')
+    def test_process_reencodes_and_strips_exif(self, generate):
+        """Картинка уменьшается, поворачивается и теряет EXIF."""
+        post = self.create_post(make_jpeg())
+        upload = post.image.name
+        images.process(upload)
+        post.refresh_from_db()
+        self.assertTrue(images.is_processed(post.image.name))
+        self.assertTrue(default_storage.exists(upload))
+        images.collect(grace=0)
+        self.assertFalse(default_storage.exists(upload))
+        generate.assert_called_once_with(post.image.name)
+        with default_storage.open(post.image.name) as stored:
+            image = Image.open(stored)
+            self.assertEqual(image.size, (100, 200))
+            self.assertEqual(len(image.getexif()), 0)
+            self.assertEqual(image.format, images.get_format()[0])
+
+    @mock.patch('posts.thumbnails.generate')
+    def test_identical_uploads_share_file(self, generate):
+        """Одинаковые картинки хранятся в одном файле."""
+        content = make_jpeg(color='blue')
+        first = self.create_post(content)
+        second = self.create_post(content)
+        for post in (first, second):
+            images.process(post.image.name)
+            post.refresh_from_db()
+        self.assertEqual(first.image.name, second.image.name)
+
+    @mock.patch('posts.thumbnails.generate')
+    def test_identical_uploads_share_upload(self, generate):
+        """Одинаковые загрузки хранятся в одном файле до обработки."""
+        content = make_jpeg(color='green')
+        first = self.create_post(content)
+        second = self.create_post(content, name='copy.jpg')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.startswith('posts/'))
+        self.assertFalse(images.is_processed(first.image.name))
+
+    @mock.patch('posts.thumbnails.generate')
+    def test_file_is_collected_after_last_post(self, generate):
+        """Сборка удаляет файл, когда на него не ссылается ни один пост."""
+        content = make_jpeg(color='yellow')
+        first = self.create_post(content)
+        second = self.create_post(content)
+        images.process(first.image.name)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        name = first.image.name
+        self.assertEqual(second.image.name, name)
+        first.delete()
+        images.collect(grace=0)
+        self.assertTrue(default_storage.exists(name))
+        second.delete()
+        self.assertTrue(default_storage.exists(name))
+        out = StringIO()
+        call_command('collect_images', '--grace', '0', stdout=out)
+        self.assertIn('Удалено картинок', out.getvalue())
+        self.assertFalse(default_storage.exists(name))
+
+    def test_replaced_image_is_collected(self):
+        """Замененная картинка поста удаляется сборкой."""
+        post = self.create_post(make_jpeg(color='black'))
+        name = post.image.name
+        with mock.patch('posts.images.thumbnails.submit'):
+            post.image = SimpleUploadedFile(
+                'new.jpg', make_jpeg(color='white'), 'image/jpeg')
+            post.save()
+        images.collect(grace=0)
+        self.assertFalse(default_storage.exists(name))
+        self.assertTrue(default_storage.exists(post.image.name))
+
+    def test_collect_keeps_recently_stored_file(self):
+        """
+        Файл без постов, который только что сохранили заново, сборка
+        не удаляет, пока не истечет отсрочка.
+        """
+        content = make_jpeg(color='purple')
+        name = self.create_post(content).image.name
+        Post.objects.all().delete()
+        old = time.time() - 2 * images.GC_GRACE
+        os.utime(default_storage.path(name), (old, old))
+        self.assertEqual(images.storage.save('posts/photo.jpg',
+                                             ContentFile(content)), name)
+        self.assertEqual(images.collect(), 0)
+        self.assertTrue(default_storage.exists(name))
+        os.utime(default_storage.path(name), (old, old))
+        self.assertEqual(images.collect(), 1)
+        self.assertFalse(default_storage.exists(name))
+
+    def test_broken_upload_is_kept(self):
+        """
+        Картинка, которую не удалось декодировать, остается у поста
+        без обработки.
+        """
+        post = self.create_post(b'not an image', name='broken.jpg')
+        name = post.image.name
+        with self.assertLogs('posts.images', 'WARNING'):
+            images.process(name)
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, name)
+        images.collect(grace=0)
+        self.assertTrue(default_storage.exists(name))
+
+    @mock.patch('posts.images.thumbnails.generate')
+    def test_process_keeps_image_changed_meanwhile(self, generate):
+        """
+        Если картинку поста сменили во время обработки, результат
+        обработки старой картинки ее не затирает.
+        """
+        post = self.create_post(make_jpeg())
+        name = post.image.name
+        replaced = self.create_post(make_jpeg(color='blue')).image.name
+        edited = []
+
+        def edit_before_update(execute, sql, params, many, context):
+            if sql.startswith('UPDATE') and not edited:
+                edited.append(sql)
+                Post.objects.filter(pk=post.pk).update(image=replaced)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(edit_before_update):
+            images.process(name)
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, replaced)
+
+    def test_save_schedules_processing(self):
+        """Сохранение поста ставит обработку новой картинки в очередь."""
+        with mock.patch('posts.images.thumbnails.submit') as submit, \
+                mock.patch('posts.images.transaction.on_commit',
+                           side_effect=lambda callback: callback()):
+            post = self.create_post(make_jpeg())
+        submit.assert_called_once_with(images.process, post.image.name)
+
+    @mock.patch('posts.forms.MAX_UPLOAD_SIZE', 100)
+    def test_form_rejects_large_upload(self):
+        """Форма отклоняет картинку больше допустимого размера."""
+        form = PostForm(data={'text': 'Текст'}, files={
+            'image': SimpleUploadedFile(
+                'photo.jpg', make_jpeg(), 'image/jpeg')})
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
+
+    @override_settings(POST_THUMBNAIL_WORKERS=2)
+    def test_post_create_saves_upload(self):
+        """Страница создания поста сохраняет картинку из формы."""
+        with mock.patch('posts.images.thumbnails.submit'):
+            self.authorized_client.post(reverse('posts:post_create'), {
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(
+                    'photo.jpg', make_jpeg(), 'image/jpeg'),
+            })
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertTrue(post.image.name.startswith('posts/'))
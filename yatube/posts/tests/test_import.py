@@ -0,0 +1,143 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import importer, search
+from posts.models import (Follow, Group, Post, TimelineEntry,
+                          UserCounters)
+
+User = get_user_model()
+
+
+def jsonl(*rows):
+    return StringIO(''.join(json.dumps(row) + '\n' for row in rows))
+
+
+class ImportTest(TestCase):
+    """
+    Класс для создания тестов для проверки массового импорта
+    групп, постов, комментариев и подписок.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+
+    def import_rows(self, kind, *rows, batch_size=2):
+        return importer.run(
+            kind, importer.read_rows(jsonl(*rows), 'jsonl'), batch_size)
+
+    def test_import_posts(self):
+        """Посты создаются с датой из файла, ошибки строк пропускаются."""
+        result = self.import_rows(
+            'posts',
+            {'text': 'Старый пост', 'author': 'author', 'group': 'group',
+             'pub_date': '2015-03-01T10:00:00'},
+            {'text': 'Пост без группы', 'author': 'author'},
+            {'text': '   ', 'author': 'author'},
+            {'text': 'Пост', 'author': 'nobody'},
+            {'text': 'Пост', 'author': 'author', 'group': 'missing'},
+            {'text': 'x' * 10001, 'author': 'author'},
+        )
+        self.assertEqual(result['rows'], 6)
+        self.assertEqual(result['created'], 2)
+        self.assertEqual(result['error_count'], 4)
+        self.assertEqual([error.line for error in result['errors']],
+                         [3, 4, 5, 6])
+        post = Post.objects.get(text='Старый пост')
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.pub_date.year, 2015)
+        self.assertEqual(
+            UserCounters.objects.get(user=self.author).posts_count, 2)
+        self.assertEqual(Group.objects.get(pk=self.group.pk).posts_count, 1)
+        self.assertEqual(TimelineEntry.objects.filter(
+            user=self.reader).count(), 2)
+        self.assertEqual(search.search('старый'), [post.pk])
+
+    def test_concurrent_posts_are_not_counted_twice(self):
+        """
+        Посты, созданные во время импорта другими запросами, не попадают
+        в обработку импорта, а поле pub_date модели не меняется.
+        """
+        field = Post._meta.get_field('pub_date')
+        prefetch = importer.PostImporter.prefetch
+
+        def concurrent_prefetch(instance, rows):
+            self.assertTrue(field.auto_now_add)
+            Post.objects.create(text='Пост с сайта', author=self.author)
+            prefetch(instance, rows)
+
+        with mock.patch.object(importer.PostImporter, 'prefetch',
+                               concurrent_prefetch):
+            result = self.import_rows(
+                'posts',
+                *({'text': f'Пост {i}', 'author': 'author',
+                   'pub_date': '2015-03-01T10:00:00'} for i in range(3)))
+        self.assertEqual(result['created'], 3)
+        self.assertTrue(field.auto_now_add)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 5)
+        self.assertEqual(
+            UserCounters.objects.get(user=self.author).posts_count, 5)
+        self.assertEqual(TimelineEntry.objects.filter(
+            user=self.reader).count(), 5)
+        self.assertEqual(Post.objects.filter(
+            pub_date__year=2015).count(), 3)
+
+    def test_import_comments_and_follows(self):
+        """Комментарии и подписки обновляют счетчики и ленты."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        result = self.import_rows(
+            'comments',
+            {'post': post.pk, 'author': 'reader', 'text': 'Комментарий'},
+            {'post': 0, 'author': 'reader', 'text': 'Комментарий'},
+        )
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
+        self.assertEqual(search.search('комментарий'), [post.pk])
+        result = self.import_rows(
+            'follows',
+            {'user': 'author', 'author': 'reader'},
+            {'user': 'reader', 'author': 'author'},
+            {'user': 'reader', 'author': 'reader'},
+        )
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(result['error_count'], 1)
+        self.assertTrue(Follow.objects.filter(
+            user=self.author, author=self.reader).exists())
+        self.assertEqual(
+            UserCounters.objects.get(user=self.reader).followers_count, 1)
+
+    def test_import_groups_from_csv(self):
+        """Группы импортируются из CSV, повторный slug - ошибка."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'groups.csv')
+            with open(path, 'w', encoding='utf-8', newline='') as stream:
+                stream.write('title,slug,description\n'
+                             'Новая,new,Описание\n'
+                             'Дубль,group,Описание\n'
+                             'Плохая,bad slug,Описание\n')
+            out, err = StringIO(), StringIO()
+            call_command('import_data', 'groups', path,
+                         stdout=out, stderr=err)
+        self.assertTrue(Group.objects.filter(slug='new').exists())
+        self.assertIn('создано: 1, ошибок: 2', out.getvalue())
+        self.assertIn('Строка 3', err.getvalue())
+        self.assertIn('Строка 4', err.getvalue())
+
+    def test_invalid_json_line(self):
+        """Нераспознанная строка JSONL попадает в отчет об ошибках."""
+        rows = importer.read_rows(
+            StringIO('{"text": "Пост", "author": "author"}\nnot json\n'),
+            'jsonl')
+        result = importer.run('posts', rows)
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(result['errors'][0].line, 2)
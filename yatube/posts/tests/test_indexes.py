@@ -0,0 +1,119 @@
+import base64
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+INDEX_MARKERS = ('USING INDEX', 'USING COVERING INDEX',
+                 'USING INTEGER PRIMARY KEY', 'USING PRIMARY KEY')
+
+
+class QueryPlanTest(TestCase):
+    """
+    Класс для создания тестов, проверяющих по EXPLAIN QUERY PLAN,
+    что запросы лент с сортировкой идут по индексу без сортировки
+    во временном B-дереве.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(3):
+            Post.objects.create(
+                text=f'Тестовый пост {i}',
+                author=cls.author,
+                group=cls.group,
+            )
+        cls.post = Post.objects.first()
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def ordered_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries.captured_queries
+                if query['sql'].startswith('SELECT')
+                and 'ORDER BY' in query['sql']]
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_feed_queries_use_indexes(self):
+        """Сортированные запросы страниц читают таблицы по индексам."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}),
+            reverse('posts:follow_index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:api_index'),
+        )
+        for url in urls:
+            queries = self.ordered_queries(url)
+            self.assertTrue(queries, url)
+            for sql in queries:
+                self.assert_index_plan(url, sql)
+
+    def test_cursor_pages_read_index_range(self):
+        """
+        Страницы после и до курсора ограничивают первое поле сортировки
+        и читают индекс диапазоном от курсора, а не все строки до него
+        или после.
+        """
+        cursor = base64.urlsafe_b64encode(json.dumps(
+            [self.post.pub_date.isoformat(), self.post.pk]).encode()).decode()
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            for direction, bound in (('after', '<'), ('before', '>')):
+                queries = [
+                    sql for sql in self.ordered_queries(
+                        f'{url}?{direction}={cursor}')
+                    if f'"pub_date" {bound}' in sql]
+                self.assertTrue(queries, (url, direction))
+                for sql in queries:
+                    plan = self.assert_index_plan(url, sql)
+                    with self.subTest(url=url, sql=sql, plan=plan):
+                        self.assertIn(f'"pub_date" {bound}=', sql)
+                        self.assertTrue(
+                            [step for step in plan
+                             if step.startswith('SEARCH')
+                             and f'pub_date{bound}' in step])
+
+    def assert_index_plan(self, url, sql):
+        plan = self.explain(sql)
+        with self.subTest(url=url, sql=sql, plan=plan):
+            self.assertFalse(
+                [step for step in plan if 'TEMP B-TREE' in step])
+            self.assertFalse(
+                [step for step in plan
+                 if step.startswith('SCAN')
+                 and not any(marker in step for marker in INDEX_MARKERS)])
+        return plan
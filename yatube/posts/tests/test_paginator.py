@@ -1,8 +1,11 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.conf import settings
 from django.core.paginator import Paginator
+from django.core.cache import cache
 
 from posts.models import Post, Group
 
@@ -44,6 +47,12 @@ class PaginatorViewsTest(TestCase):
     def setUp(self) -> None:
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def next_page_query(self, name, **kwargs):
+        """Возвращает GET-параметры ссылки на следующую страницу."""
+        response = self.authorized_client.get(reverse(name, kwargs=kwargs))
+        return '?after=' + response.context['page_obj'].next_cursor
 
     def test_first_page_index_contains_ten_records(self):
         """
@@ -68,12 +77,12 @@ class PaginatorViewsTest(TestCase):
         """
         if self.authorized_client:
             response = self.authorized_client.get(
-                reverse('posts:index') + '?page=2')
+                reverse('posts:index') + self.next_page_query('posts:index'))
             self.assertEqual(
                 len(response.context['page_obj']), self.page_second_obj)
         else:
             response = self.client.get(
-                reverse('posts:index') + '?page=2')
+                reverse('posts:index') + self.next_page_query('posts:index'))
             self.assertEqual(
                 len(response.context['page_obj']), self.page_second_obj)
 
@@ -100,16 +109,18 @@ class PaginatorViewsTest(TestCase):
         Проверка паджинатора - вывод последних постов на
         вторую страницу group_list.html.
         """
+        query = self.next_page_query(
+            'posts:group_list', slug=self.group.slug)
         if self.authorized_client:
             response = self.authorized_client.get((reverse(
                 'posts:group_list',
-                kwargs={'slug': self.group.slug})) + '?page=2')
+                kwargs={'slug': self.group.slug})) + query)
             self.assertEqual(
                 len(response.context['page_obj']), self.page_second_obj)
         else:
             response = self.client.get((reverse(
                 'posts:group_list',
-                kwargs={'slug': self.group.slug})) + '?page=2')
+                kwargs={'slug': self.group.slug})) + query)
             self.assertEqual(
                 len(response.context['page_obj']), self.page_second_obj)
 
@@ -129,8 +140,66 @@ class PaginatorViewsTest(TestCase):
         Проверка паджинатора - вывод последних постов на
         вторую страницу group_list.html.
         """
+        query = self.next_page_query(
+            'posts:profile', username=self.user.username)
         response = self.authorized_client.get((reverse(
             'posts:profile',
-            kwargs={'username': self.user.username})) + '?page=2')
+            kwargs={'username': self.user.username})) + query)
         self.assertEqual(
             len(response.context['page_obj']), self.page_second_obj)
+
+    def test_previous_cursor_returns_first_page(self):
+        """
+        Проверка курсорного паджинатора - ссылка «Предыдущая»
+        со второй страницы ведет на первую страницу.
+        """
+        first = self.authorized_client.get(reverse('posts:index'))
+        second = self.authorized_client.get(
+            reverse('posts:index') + self.next_page_query('posts:index'))
+        previous = self.authorized_client.get(
+            reverse('posts:index')
+            + '?before=' + second.context['page_obj'].previous_cursor)
+        self.assertEqual(
+            list(previous.context['page_obj']),
+            list(first.context['page_obj']))
+        self.assertFalse(previous.context['page_obj'].has_previous())
+
+    def test_last_page_contains_earliest_records(self):
+        """
+        Проверка курсорного паджинатора - последняя страница
+        содержит самые ранние посты и не имеет следующей.
+        """
+        response = self.authorized_client.get(
+            reverse('posts:index') + '?before=last')
+        page_obj = response.context['page_obj']
+        self.assertEqual(
+            list(page_obj),
+            list(Post.objects.all()[3:]))
+        self.assertFalse(page_obj.has_next())
+        self.assertTrue(page_obj.has_previous())
+
+    def test_invalid_cursor_returns_first_page(self):
+        """
+        Проверка курсорного паджинатора - некорректный токен
+        приводит к выдаче первой страницы.
+        """
+        for param in ('after', 'before'):
+            with self.subTest(param=param):
+                response = self.authorized_client.get(
+                    reverse('posts:index') + f'?{param}=broken-token')
+                self.assertEqual(
+                    list(response.context['page_obj']),
+                    list(Post.objects.all()[:COUNT_PER_PAGE]))
+
+    def test_cursor_pages_do_not_use_count_and_offset(self):
+        """
+        Проверка курсорного паджинатора - выборка страницы не
+        выполняет COUNT(*) и OFFSET.
+        """
+        query = self.next_page_query('posts:index')
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(reverse('posts:index') + query)
+        sql = ' '.join(q['sql'] for q in queries.captured_queries).upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+POSTS_PER_AUTHOR = 6
+PAGE_SIZES = (2, 10)
+
+
+class FeedQueryCountTest(TestCase):
+    """
+    Класс для создания тестов, проверяющих, что число SQL-запросов
+    страниц лент не зависит от размера страницы (нет N+1).
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.authors = [
+            User.objects.create_user(username=f'author_{i}')
+            for i in range(3)
+        ]
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+            for i in range(POSTS_PER_AUTHOR):
+                Post.objects.create(
+                    text=f'Пост {i} автора {author}',
+                    author=author,
+                    group=cls.group,
+                )
+        cls.post = Post.objects.first()
+        for author in cls.authors:
+            for i in range(4):
+                Comment.objects.create(
+                    post=cls.post,
+                    author=author,
+                    text=f'Комментарий {i} от {author}',
+                )
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def count_queries(self, url, per_page):
+        cache.clear()
+        with mock.patch('posts.views.COUNT_PER_PAGE', per_page):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries.captured_queries)
+
+    def test_feed_query_count_does_not_depend_on_page_size(self):
+        """Число запросов страниц лент фиксировано."""
+        expected_queries = {
+            reverse('posts:index'): 3,
+            reverse('posts:group_list',
+                    kwargs={'slug': self.group.slug}): 4,
+            reverse('posts:profile',
+                    kwargs={'username': self.authors[0].username}): 5,
+            reverse('posts:follow_index'): 6,
+            reverse('posts:post_detail',
+                    kwargs={'post_id': self.post.pk}): 4,
+        }
+        for url, expected in expected_queries.items():
+            with self.subTest(url=url):
+                counts = [self.count_queries(url, size)
+                          for size in PAGE_SIZES]
+                self.assertEqual(counts, [expected] * len(PAGE_SIZES))
@@ -0,0 +1,125 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import search
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class SearchTest(TestCase):
+    """
+    Класс для создания тестов для проверки полнотекстового
+    поиска по постам и комментариям (индекс FTS5).
+    """
+    backend = 'auto'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.cats = Post.objects.create(
+            text='Коты любят тёплое молоко.',
+            author=cls.user,
+        )
+        cls.dogs = Post.objects.create(
+            text='Собаки охраняют дом.',
+            author=cls.user,
+        )
+        Comment.objects.create(
+            post=cls.dogs,
+            author=cls.user,
+            text='А мои коты спят весь день.',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_index_backend(self):
+        """Используется индекс, соответствующий настройке SEARCH_BACKEND."""
+        expected = (search.InvertedIndex
+                    if self.backend == 'python' else search.FTS5Index)
+        self.assertIsInstance(search.get_index(), expected)
+
+    def test_stemmed_words_are_found(self):
+        """Поиск находит слова в других формах."""
+        self.assertEqual(search.search('молоком'), [self.cats.pk])
+        self.assertEqual(search.search('собака дома'), [self.dogs.pk])
+
+    def test_post_text_ranks_above_comment(self):
+        """Совпадение в тексте поста важнее совпадения в комментарии."""
+        self.assertEqual(search.search('кот'), [self.cats.pk, self.dogs.pk])
+
+    def test_all_words_are_required(self):
+        """Пост должен содержать все слова запроса."""
+        self.assertEqual(search.search('коты собаки'), [])
+        self.assertEqual(search.search('...'), [])
+
+    def test_index_is_updated_on_save_and_delete(self):
+        """Индекс обновляется при изменении и удалении постов."""
+        post = Post.objects.get(pk=self.cats.pk)
+        post.text = 'Попугаи любят зерно.'
+        post.save()
+        self.assertEqual(search.search('молоко'), [])
+        self.assertEqual(search.search('попугай'), [post.pk])
+        Post.objects.get(pk=self.dogs.pk).delete()
+        self.assertEqual(search.search('собаки'), [])
+        self.assertEqual(search.search('спят'), [])
+
+    def test_rebuild_command(self):
+        """Команда rebuild_search_index заново строит индекс."""
+        search.get_index().clear()
+        self.assertEqual(search.search('молоко'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(search.search('молоко'), [self.cats.pk])
+
+    def test_search_page(self):
+        """Страница поиска выводит найденные посты страницами."""
+        client = Client()
+        response = client.get(reverse('posts:post_search'), {'q': 'коты'})
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.cats, self.dogs])
+        with mock.patch('posts.views.COUNT_PER_PAGE', 1):
+            response = client.get(
+                reverse('posts:post_search'), {'q': 'коты'})
+            self.assertEqual(list(response.context['page_obj']),
+                             [self.cats])
+            self.assertContains(
+                response, '?q=%D0%BA%D0%BE%D1%82%D1%8B&after=1')
+            response = client.get(
+                reverse('posts:post_search'), {'q': 'коты', 'after': '1'})
+        self.assertEqual(list(response.context['page_obj']), [self.dogs])
+
+
+@override_settings(SEARCH_BACKEND='python')
+class InvertedIndexSearchTest(SearchTest):
+    """
+    Класс для создания тестов для проверки полнотекстового
+    поиска на инвертированном индексе в таблице SearchTerm.
+    """
+    backend = 'python'
+
+    def test_document_count_is_kept_at_index_time(self):
+        """
+        Число документов для IDF берется из кэша и меняется при
+        индексации, а не считается по базе на каждый поиск.
+        """
+        index = search.get_index()
+        self.assertEqual(index.document_count(), 3)
+        with self.assertNumQueries(1):
+            search.search('кот')
+        post = Post.objects.create(text='Коты и собаки.', author=self.user)
+        self.assertEqual(index.document_count(), 4)
+        post.text = 'Только коты.'
+        post.save()
+        self.assertEqual(index.document_count(), 4)
+        post.delete()
+        self.assertEqual(index.document_count(), 3)
+        Comment.objects.filter(post=self.dogs).delete()
+        self.assertEqual(index.document_count(), 2)
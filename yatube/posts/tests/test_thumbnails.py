@@ -0,0 +1,94 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from sorl import __version__ as sorl_version
+from sorl.thumbnail import get_thumbnail
+
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEST_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTest(TestCase):
+    """
+    Класс для создания тестов для проверки фоновой
+    подготовки миниатюр.
+    """
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(
+            text='Пост с картинкой.',
+            author=self.user,
+            image=SimpleUploadedFile(
+                name='small.gif', content=TEST_GIF,
+                content_type='image/gif'),
+        )
+
+    def test_generate_creates_all_geometries(self):
+        """generate создает миниатюры всех размеров из шаблонов."""
+        thumbnails.generate(self.post.image.name)
+        for geometry in thumbnails.GEOMETRIES:
+            with self.subTest(geometry=geometry):
+                self.assertIsNotNone(
+                    thumbnails.get_ready(self.post.image, geometry))
+
+    def test_ready_thumbnail_name_matches_sorl(self):
+        """
+        Имя готовой миниатюры совпадает с именем, которое дает
+        get_thumbnail закрепленной версии sorl-thumbnail.
+        """
+        self.assertEqual(sorl_version, thumbnails.SORL_THUMBNAIL_VERSION)
+        for extra in ({}, {'THUMBNAIL_PRESERVE_FORMAT': True,
+                           'THUMBNAIL_PROGRESSIVE': False}):
+            for geometry in thumbnails.GEOMETRIES:
+                with self.subTest(geometry=geometry, **extra), \
+                        override_settings(**extra):
+                    self.assertIsNone(thumbnails.backend.get_ready_thumbnail(
+                        self.post.image, geometry, **thumbnails.OPTIONS))
+                    created = get_thumbnail(
+                        self.post.image, geometry, **thumbnails.OPTIONS)
+                    ready = thumbnails.backend.get_ready_thumbnail(
+                        self.post.image, geometry, **thumbnails.OPTIONS)
+                    self.assertEqual(ready.name, created.name)
+
+    @override_settings(POST_THUMBNAIL_WORKERS=2)
+    def test_missing_thumbnail_renders_placeholder(self):
+        """
+        Пока миниатюра не готова, страница показывает заглушку
+        и ставит создание миниатюр в очередь.
+        """
+        with mock.patch('posts.thumbnails.schedule') as schedule:
+            response = self.client.get(reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}))
+        schedule.assert_called_with(self.post.image.name)
+        self.assertContains(response, 'Изображение обрабатывается')
+
+    def test_ready_thumbnail_is_rendered(self):
+        """Готовая миниатюра выводится на странице."""
+        thumbnails.generate(self.post.image.name)
+        ready = thumbnails.get_ready(self.post.image, '400x250')
+        response = self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertContains(response, ready.url)
@@ -0,0 +1,161 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTest(TestCase):
+    """
+    Класс для создания тестов для проверки работы
+    материализованной ленты подписок.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.old_post = Post.objects.create(
+            text='Пост до подписки.',
+            author=cls.author,
+        )
+
+    def setUp(self) -> None:
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        cache.clear()
+
+    def feed(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_timeline(self):
+        """При подписке в ленту попадают уже опубликованные посты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.feed(), [self.old_post])
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост сразу записывается в ленты подписчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(text='Новый пост.', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=new_post).exists())
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    def test_unfollow_prunes_timeline(self):
+        """После отписки посты автора исчезают из ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.reader_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username}))
+        self.assertFalse(self.reader.timeline.exists())
+        self.assertEqual(self.feed(), [])
+
+    def test_celebrity_posts_are_pulled_on_read(self):
+        """
+        Пост автора с большим числом подписчиков не раскладывается
+        при публикации, а подтягивается в ленту при её чтении.
+        """
+        Follow.objects.create(user=self.reader, author=self.author)
+        with mock.patch('posts.timeline.FANOUT_LIMIT', 0):
+            new_post = Post.objects.create(
+                text='Пост популярного автора.', author=self.author)
+            self.assertFalse(TimelineEntry.objects.filter(
+                post=new_post).exists())
+            self.assertEqual(self.feed(), [new_post, self.old_post])
+            self.assertFalse(TimelineEntry.objects.filter(
+                post=new_post).exists())
+
+    def test_former_celebrity_posts_stay_in_feed(self):
+        """
+        Когда у автора становится не больше лимита подписчиков,
+        его новые посты раскладываются по лентам, а опубликованные,
+        пока он был популярным, продолжают подтягиваться при чтении.
+        """
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=fan, author=self.author)
+        with mock.patch('posts.timeline.FANOUT_LIMIT', 1):
+            celebrity_post = Post.objects.create(
+                text='Пост популярного автора.', author=self.author)
+            Follow.objects.filter(user=fan).delete()
+            new_post = Post.objects.create(
+                text='Пост после отписки.', author=self.author)
+            self.assertFalse(TimelineEntry.objects.filter(
+                post=celebrity_post).exists())
+            self.assertTrue(TimelineEntry.objects.filter(
+                user=self.reader, post=new_post).exists())
+            self.assertEqual(self.feed(),
+                             [new_post, celebrity_post, self.old_post])
+
+    def test_feed_cursor_survives_celebrity_merge(self):
+        """
+        Курсор страницы ленты без популярных авторов подходит
+        и для ленты с ними.
+        """
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(text='Новый пост.', author=self.author)
+        url = reverse('posts:follow_index')
+        with mock.patch('posts.views.COUNT_PER_PAGE', 1):
+            cursor = self.reader_client.get(url).context[
+                'page_obj'].next_cursor
+            with mock.patch('posts.timeline.FANOUT_LIMIT', 0):
+                response = self.reader_client.get(url, {'after': cursor})
+                self.assertEqual(list(response.context['page_obj']),
+                                 [self.old_post])
+                response = self.reader_client.get(url)
+                self.assertEqual(list(response.context['page_obj']),
+                                 [new_post])
+
+    def test_celebrity_feed_is_merged_by_keyset(self):
+        """
+        Лента с популярными авторами сливается из страниц записей
+        и постов каждого автора: все посты по порядку и без повторов,
+        запросы идут по индексам без сортировки во временном B-дереве.
+        """
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=other)
+        posts = [self.old_post]
+        for i in range(2):
+            posts.append(Post.objects.create(text=f'Запись {i}',
+                                             author=other))
+        url = reverse('posts:follow_index')
+        with mock.patch('posts.timeline.FANOUT_LIMIT', 0), \
+                mock.patch('posts.views.COUNT_PER_PAGE', 2):
+            for i in range(3):
+                posts.append(Post.objects.create(
+                    text=f'Пост {i}', author=(self.author, other)[i % 2]))
+            expected = sorted(posts, key=lambda post: (post.pub_date,
+                                                       post.pk),
+                              reverse=True)
+            pages = []
+            params = {}
+            with CaptureQueriesContext(connection) as queries:
+                while True:
+                    page_obj = self.reader_client.get(url, params).context[
+                        'page_obj']
+                    pages.append(list(page_obj))
+                    if not page_obj.next_cursor:
+                        break
+                    params = {'after': page_obj.next_cursor}
+            self.assertEqual(sum(pages, []), expected)
+            response = self.reader_client.get(
+                url, {'before': page_obj.previous_cursor})
+            self.assertEqual(list(response.context['page_obj']), pages[-2])
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                if 'ORDER BY' not in query['sql']:
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}')
+                plan = [row[-1] for row in cursor.fetchall()]
+                self.assertFalse(
+                    [step for step in plan
+                     if 'TEMP B-TREE' in step or 'MULTI-INDEX' in step],
+                    query['sql'])
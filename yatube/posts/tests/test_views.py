@@ -1,9 +1,11 @@
 import shutil
 import tempfile
+from io import StringIO
 
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django import forms
@@ -68,6 +70,7 @@ class PostsViewTests(TestCase):
                     image=cls.uploaded))
             )
         cls.page_obj = Post.objects.bulk_create(cls.objs)
+        call_command('recount_counters', stdout=StringIO())
         paginator = Paginator(
             Post.objects.order_by('-pub_date'),
             COUNT_PER_PAGE)
@@ -0,0 +1,144 @@
+"""
+Фоновая подготовка миниатюр картинок постов.
+
+Миниатюры всех размеров, которые используют шаблоны, создаются пулом
+потоков сразу после сохранения поста, а не при первом рендеринге
+страницы. Пока миниатюра не готова, шаблоны показывают заглушку.
+Картинка по имени открывается хранилищем поля Post.image: ключ
+sorl-thumbnail зависит от хранилища, и миниатюры, созданные здесь,
+должны находиться по картинке поста в шаблоне.
+
+Миниатюры создаются через sorl.thumbnail.get_thumbnail. Открытого
+способа проверить готовность миниатюры, не создавая ее, у sorl нет:
+get_ready_thumbnail повторяет вычисление имени миниатюры из
+ThumbnailBackend.get_thumbnail версии SORL_THUMBNAIL_VERSION
+(закреплена в requirements.txt), тесты сверяют имена с get_thumbnail.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from . import feed_cache
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Размеры миниатюр из шаблонов: лента, профиль и страница поста.
+GEOMETRIES = ('960x339', '650x339', '400x250')
+OPTIONS = {'crop': 'center', 'upscale': True}
+# Версия sorl-thumbnail, с которой совпадает get_ready_thumbnail.
+SORL_THUMBNAIL_VERSION = '12.7.0'
+
+
+class PostThumbnailBackend(ThumbnailBackend):
+    """Backend sorl-thumbnail, умеющий проверять готовность миниатюры."""
+    def get_ready_thumbnail(self, file_, geometry_string, **options):
+        """
+        Возвращает миниатюру, если она уже создана,
+        иначе None. Саму миниатюру не создает.
+        """
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+backend = PostThumbnailBackend()
+storage = Post._meta.get_field('image').storage
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.POST_THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails')
+        return _executor
+
+
+def generate(name):
+    """
+    Создает все миниатюры картинки name и сбрасывает кэш лент
+    с постами, показывавшими вместо нее заглушку.
+    """
+    close_old_connections()
+    try:
+        source = ImageFile(name, storage)
+        missing = [geometry for geometry in GEOMETRIES
+                   if backend.get_ready_thumbnail(
+                       source, geometry, **OPTIONS) is None]
+        for geometry in missing:
+            get_thumbnail(source, geometry, **OPTIONS)
+        if missing:
+            for pk in Post.objects.filter(image=name).values_list(
+                    'pk', flat=True):
+                feed_cache.bump_post(pk)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', name)
+    finally:
+        done(generate, name)
+        close_old_connections()
+
+
+def submit(function, name):
+    """
+    Выполняет function(name) в пуле, если задача для name еще не
+    в очереди. При POST_THUMBNAIL_WORKERS = 0 - сразу, в текущем потоке.
+    """
+    if not settings.POST_THUMBNAIL_WORKERS:
+        function(name)
+        return
+    with _lock:
+        if (function, name) in _pending:
+            return
+        _pending.add((function, name))
+    _get_executor().submit(function, name)
+
+
+def done(function, name):
+    """Снимает отметку о задаче function(name) в очереди пула."""
+    with _lock:
+        _pending.discard((function, name))
+
+
+def schedule(name):
+    """Ставит создание миниатюр картинки name в очередь пула."""
+    submit(generate, name)
+
+
+def schedule_on_commit(name):
+    """Ставит создание миниатюр в очередь после фиксации транзакции."""
+    transaction.on_commit(lambda: schedule(name))
+
+
+def get_ready(image, geometry):
+    """
+    Возвращает готовую миниатюру image или None, поставив ее
+    создание в очередь.
+    """
+    thumbnail = backend.get_ready_thumbnail(image, geometry, **OPTIONS)
+    if thumbnail is None:
+        schedule(image.name)
+        if not settings.POST_THUMBNAIL_WORKERS:
+            thumbnail = backend.get_ready_thumbnail(
+                image, geometry, **OPTIONS)
+    return thumbnail
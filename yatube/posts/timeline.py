@@ -0,0 +1,190 @@
+"""
+Материализованная лента подписок (follow_index).
+
+Пост автора с небольшим числом подписчиков сразу записывается в ленты
+всех подписчиков (fan-out on write). Для авторов, у которых подписчиков
+больше settings.TIMELINE_FANOUT_LIMIT, раскладка при публикации не
+выполняется: их посты подмешиваются к ленте читателя при её чтении
+(fan-out on read), так что пост популярного автора не порождает
+миллион вставок, а чтение ленты ничего не пишет в базу. Страница
+такой ленты сливается в Python из страницы записей ленты и страниц
+постов каждого популярного автора, выбранных от курсора по индексам.
+
+Популярность автора определяется только по счетчику
+UserCounters.followers_count - и при раскладке, и при чтении. Когда
+автор опускается до лимита, его новые посты снова раскладываются,
+а опубликованные раньше (UserCounters.pull_until) продолжают
+подмешиваться при чтении.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from core.paginator import CursorPaginator, MergedCursorPaginator, paginate
+from .models import Follow, Post, PostQuerySet, TimelineEntry, UserCounters
+
+FANOUT_LIMIT = settings.TIMELINE_FANOUT_LIMIT
+BACKFILL_SIZE = settings.TIMELINE_BACKFILL_SIZE
+# Сколько id передается в один запрос IN (...).
+LOOKUP_BATCH_SIZE = 500
+# Курсор ленты в обоих вариантах чтения - (дата публикации, id поста).
+ENTRY_ORDERING = ('-pub_date', '-post_id')
+POST_ORDERING = ('-pub_date', '-pk')
+
+
+def _entries(user_ids, posts):
+    return [
+        TimelineEntry(user_id=user_id,
+                      post_id=post['pk'],
+                      author_id=post['author'],
+                      pub_date=post['pub_date'])
+        for user_id in user_ids
+        for post in posts
+    ]
+
+
+def _save(entries):
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+def _celebrities(author_ids):
+    """Возвращает id авторов, посты которых не раскладываются по лентам."""
+    return set(
+        UserCounters.objects.filter(user__in=author_ids,
+                                    followers_count__gt=FANOUT_LIMIT)
+        .values_list('user', flat=True)
+    )
+
+
+def pulled_authors(user):
+    """
+    Возвращает словарь {id автора: дата} для подписок user, посты
+    которых подмешиваются при чтении: все посты популярных авторов
+    (дата None) и посты до pull_until бывших популярных.
+    """
+    rows = (
+        Follow.objects.filter(user=user)
+        .filter(Q(author__counters__followers_count__gt=FANOUT_LIMIT)
+                | Q(author__counters__pull_until__isnull=False))
+        .values_list('author', 'author__counters__followers_count',
+                     'author__counters__pull_until')
+    )
+    return {
+        author_id: None if followers_count > FANOUT_LIMIT else pull_until
+        for author_id, followers_count, pull_until in rows
+    }
+
+
+def fan_out(post):
+    """Добавляет новый пост в ленты подписчиков автора."""
+    if _celebrities([post.author_id]):
+        return
+    followers = list(
+        Follow.objects.filter(author=post.author_id)
+        .values_list('user', flat=True)
+    )
+    _save(_entries(followers, [{'pk': post.pk,
+                                'author': post.author_id,
+                                'pub_date': post.pub_date}]))
+
+
+def backfill(user, author):
+    """Добавляет в ленту user последние посты author после подписки."""
+    posts = (Post.objects.filter(author=author)
+             .values('pk', 'author', 'pub_date')[:BACKFILL_SIZE])
+    _save(_entries([user.pk], posts))
+
+
+def _by_author(rows):
+    grouped = defaultdict(list)
+    for author_id, value in rows:
+        grouped[author_id].append(value)
+    return grouped
+
+
+def fan_out_many(posts):
+    """
+    Добавляет посты posts (QuerySet), созданные в обход сигналов,
+    в ленты подписчиков их авторов.
+    """
+    posts = _by_author(
+        (post['author'], post)
+        for post in posts.values('pk', 'author', 'pub_date').iterator())
+    authors = list(posts)
+    for start in range(0, len(authors), LOOKUP_BATCH_SIZE):
+        batch = authors[start:start + LOOKUP_BATCH_SIZE]
+        celebrities = _celebrities(batch)
+        followers = _by_author(Follow.objects.filter(
+            author__in=[author_id for author_id in batch
+                        if author_id not in celebrities]
+        ).values_list('author', 'user'))
+        for author_id, user_ids in followers.items():
+            _save(_entries(user_ids, posts[author_id]))
+
+
+def backfill_many(follows):
+    """
+    Добавляет в ленты подписчиков последние посты авторов
+    для подписок follows (пары user_id, author_id), созданных
+    в обход сигналов.
+    """
+    followers = _by_author((author_id, user_id)
+                           for user_id, author_id in follows)
+    for author_id, user_ids in followers.items():
+        posts = list(Post.objects.filter(author=author_id)
+                     .values('pk', 'author', 'pub_date')[:BACKFILL_SIZE])
+        if posts:
+            _save(_entries(user_ids, posts))
+
+
+def prune(user, author):
+    """Убирает посты author из ленты user после отписки."""
+    TimelineEntry.objects.filter(user=user, author=author).delete()
+
+
+def release(author):
+    """
+    Если после отписки у author осталось FANOUT_LIMIT подписчиков,
+    его новые посты снова раскладываются по лентам, а опубликованные
+    до этого момента продолжают подмешиваться при чтении.
+    """
+    UserCounters.objects.filter(
+        user=author, followers_count=FANOUT_LIMIT
+    ).update(pull_until=timezone.now())
+
+
+class EntryPaginator(CursorPaginator):
+    """Пагинатор записей ленты, который отдает их посты."""
+    def get_rows(self, values, forward, limit):
+        return [entry.post
+                for entry in super().get_rows(values, forward, limit)]
+
+
+def get_page(request, user, per_page):
+    """
+    Возвращает страницу ленты подписок user с постами. Если user
+    подписан на популярных (или бывших популярных) авторов, страница
+    сливается из записей ленты и постов этих авторов.
+    """
+    entries = TimelineEntry.objects.filter(user=user).select_related(
+        *(f'post__{name}' for name in PostQuerySet.feed_related))
+    authors = pulled_authors(user)
+    if authors:
+        posts = Post.objects.for_feed()
+        sources = [EntryPaginator(entries, per_page, ordering=ENTRY_ORDERING)]
+        for author, until in authors.items():
+            author_posts = posts.filter(author=author)
+            if until is not None:
+                author_posts = author_posts.filter(pub_date__lte=until)
+            sources.append(CursorPaginator(author_posts, per_page,
+                                           ordering=POST_ORDERING))
+        paginator = MergedCursorPaginator(posts, per_page, sources,
+                                          ordering=POST_ORDERING)
+        return paginator.get_cursor_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'))
+    page_obj = paginate(request, entries, per_page, ordering=ENTRY_ORDERING)
+    page_obj.object_list = [entry.post for entry in page_obj.object_list]
+    return page_obj
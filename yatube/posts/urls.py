@@ -1,24 +1,40 @@
 from django.urls import path
 
-from . import views
+from . import api, exporter, views
 
 app_name = 'posts'
 urlpatterns = [path('', views.index, name='index'),
+               path('group/', views.group_index, name='group_index'),
                path('group/<slug:slug>/',
                     views.group_posts,
                     name='group_list'),
                path('profile/<str:username>/', views.profile,
                     name='profile'),
+               path('search/', views.post_search, name='post_search'),
                path('posts/<int:post_id>/', views.post_detail,
                     name='post_detail'),
                path('create/', views.post_create,
                     name='post_create'),
                path('posts/<int:post_id>/edit/', views.post_edit,
                     name='post_edit'),
+               path('posts/<int:post_id>/comments/', views.post_comments,
+                    name='post_comments'),
                path('posts/<int:post_id>/comment/', views.add_comment,
                     name='add_comment'),
                path('follow/', views.follow_index, name='follow_index'),
                path('profile/<str:username>/follow/', views.profile_follow,
                     name='profile_follow'),
                path('profile/<str:username>/unfollow/', views.profile_unfollow,
-                    name='profile_unfollow'), ]
+                    name='profile_unfollow'),
+               path('api/posts/', api.index, name='api_index'),
+               path('api/group/<slug:slug>/', api.group_posts,
+                    name='api_group_list'),
+               path('api/profile/<str:username>/', api.profile,
+                    name='api_profile'),
+               path('api/posts/<int:post_id>/', api.post_detail,
+                    name='api_post_detail'),
+               path('export/group/<slug:slug>/', exporter.export_group,
+                    name='export_group'),
+               path('export/profile/<str:username>/',
+                    exporter.export_profile,
+                    name='export_profile'), ]
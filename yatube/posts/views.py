@@ -1,72 +1,126 @@
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.http import Http404
 from django.shortcuts import (get_object_or_404,
                               redirect,
                               render)
 from django.conf import settings
 
+from core.db_router import use_primary
+from core.ratelimit import ratelimit
+from core.paginator import paginate, paginate_sequence
+from . import counters, feed_cache, follow_graph, groups, search, timeline
 from .forms import CommentForm, PostForm
-from .models import Comment, Group, Post, Follow
+from .models import Comment, Group, Post, Follow, UserCounters
 
 COUNT_PER_PAGE = settings.COUNT_PER_PAGE
+COMMENTS_PER_PAGE = settings.COMMENTS_PER_PAGE
+GROUPS_PER_PAGE = settings.GROUPS_PER_PAGE
 LETTERS_FOR_TITLE = 30
+FEED_CACHE_TIMEOUT = settings.FEED_CACHE_TIMEOUT
 
 
-def index(request):
-    """Information which is showing up on the start page."""
-    post_list = Post.objects.select_related('group').all()
-    paginator = Paginator(post_list, COUNT_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    context = {
+def _feed_context(page_obj):
+    """
+    Контекст страницы постов page_obj с версией ее списка в кэше.
+
+    Список постов не зависит от зрителя: фрагмент кэшируется по версии
+    показанных постов и групп и общий для всех пользователей и страниц
+    с теми же постами. Зависящие от зрителя части (кнопка подписки,
+    вкладки ленты, пагинатор) рендерятся вне фрагмента.
+    """
+    return {
         'page_obj': page_obj,
+        'cache_version': feed_cache.page_version(page_obj),
+        'cache_timeout': FEED_CACHE_TIMEOUT,
     }
-    return render(request, 'posts/index.html', context)
+
+
+def index(request):
+    """Information which is showing up on the start page."""
+    post_list = Post.objects.for_feed()
+    page_obj = paginate(request, post_list, COUNT_PER_PAGE)
+    return render(request, 'posts/index.html', _feed_context(page_obj))
 
 
 def group_posts(request, slug):
     """Information for displaying on the page with posts grouped by GROUPS."""
-    group = get_object_or_404(Group, slug=slug)
-    post_list = Post.objects.filter(group=group).all()
-    paginator = Paginator(post_list, COUNT_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    group = groups.by_slug(slug)
+    if group is None:
+        raise Http404
+    post_list = Post.objects.for_feed().filter(group=group.pk)
+    page_obj = paginate(request, post_list, COUNT_PER_PAGE)
     context = {
         'group': group,
-        'page_obj': page_obj,
+        **_feed_context(page_obj),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+def group_index(request):
+    """
+    Каталог групп: число постов и дата последней публикации
+    читаются из денормализованных полей, без агрегации постов.
+    """
+    group_list = Group.objects.order_by('title', 'pk').values(
+        'id', 'slug', 'title', 'description', 'posts_count',
+        'last_activity')
+    page_obj = paginate(request, group_list, GROUPS_PER_PAGE)
+    return render(request, 'posts/group_index.html', {'page_obj': page_obj})
+
+
 def profile(request, username):
     """
     The view shows a page profile of an authorised user.
     """
-    author = get_object_or_404(User, username=username)
-    post_list = Post.objects.filter(author=author).all()
-    paginator = Paginator(post_list, COUNT_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    post_quantity = post_list.count()
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user,
-        author=author).exists()
+    author = get_object_or_404(
+        User.objects.select_related('counters'), username=username)
+    post_list = Post.objects.for_feed().filter(author=author)
+    page_obj = paginate(request, post_list, COUNT_PER_PAGE)
+    post_quantity = counters.get_counters(author).posts_count
+    following = (request.user.is_authenticated
+                 and follow_graph.is_following(request.user.pk, author.pk))
     context = {
         'author': author,
-        'page_obj': page_obj,
         'post_quantity': post_quantity,
         'following': following,
+        **_feed_context(page_obj),
     }
     return render(request, 'posts/profile.html', context)
 
 
+def post_search(request):
+    """
+    The view shows posts whose text or comments match the search query,
+    the most relevant first.
+    """
+    query = request.GET.get('q', '').strip()
+    post_ids = search.search(query) if query else []
+    page_obj = paginate_sequence(request, post_ids, COUNT_PER_PAGE)
+    posts = Post.objects.for_feed().in_bulk(page_obj.object_list)
+    page_obj.object_list = [posts[pk] for pk in page_obj.object_list
+                            if pk in posts]
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 def post_detail(request, post_id):
     """The view shows information about a current post."""
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__counters', 'group'),
+        pk=post_id)
     title = post.text[:LETTERS_FOR_TITLE]
     form = CommentForm()
-    comments = Comment.objects.filter(post=post_id).all()
+    comments = paginate(
+        request,
+        Comment.objects.filter(post=post_id).select_related('author'),
+        COMMENTS_PER_PAGE)
     context = {
         'post': post,
         'title': title,
@@ -76,12 +130,31 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    """
+    The view returns the next chunk of post comments as an HTML fragment,
+    which the post page loads on demand.
+    """
+    comments = paginate(
+        request,
+        Comment.objects.filter(post=post_id).select_related('author'),
+        COMMENTS_PER_PAGE)
+    context = {
+        'post_id': post_id,
+        'comments': comments,
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
 @login_required
+@ratelimit('post_create')
+@use_primary
+@transaction.atomic
 def post_create(request):
     """The view creates a new post by a special form."""
     form = PostForm()
     if request.method == 'POST':
-        form = PostForm(request.POST)
+        form = PostForm(request.POST, files=request.FILES)
         if form.is_valid():
             new_post = form.save(commit=False)
             new_post.author = request.user
@@ -94,6 +167,8 @@ def post_create(request):
 
 
 @login_required
+@use_primary
+@transaction.atomic
 def post_edit(request, post_id):
     """
     This view edits the post by its id and saves changes in database.
@@ -123,6 +198,9 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('add_comment')
+@use_primary
+@transaction.atomic
 def add_comment(request, post_id):
     """
     The view function creates a new comment by a special form.
@@ -144,22 +222,25 @@ def follow_index(request):
     текущий пользователь.
     """
     follower = request.user
-    follow = Follow.objects.filter(user=follower).exists()
-    post_list = Post.objects.filter(author__following__user=follower)
-    paginator = Paginator(post_list, COUNT_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    post_quantity = post_list.count()
+    follow = bool(follow_graph.following(follower.pk))
+    page_obj = timeline.get_page(request, follower, COUNT_PER_PAGE)
+    post_list = Post.objects.filter(timeline_entries__user=follower)
+    post_quantity = UserCounters.objects.filter(
+        user__following__user=follower).aggregate(
+            total=Coalesce(Sum('posts_count'), 0))['total']
     context = {
         'follow': follow,
         'post_list': post_list,
-        'page_obj': page_obj,
         'post_quantity': post_quantity,
+        **_feed_context(page_obj),
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@ratelimit('follow', methods=None)
+@use_primary
+@transaction.atomic
 def profile_follow(request, username):
     """
     Функция для подписки на интересного автора текущего пользователя.
@@ -172,16 +253,14 @@ def profile_follow(request, username):
 
 
 @login_required
+@ratelimit('follow', methods=None)
+@use_primary
+@transaction.atomic
 def profile_unfollow(request, username):
     """
     Функция для отписки от автора текущего пользователя.
     """
     follower = request.user
     author = get_object_or_404(User, username=username)
-    subscribe = Follow.objects.filter(user=follower, author=author).exists()
-    if subscribe:
-        following = get_object_or_404(Follow,
-                                      user=follower,
-                                      author=author)
-        following.delete()
+    Follow.objects.filter(user=follower, author=author).delete()
     return redirect('posts:profile', username=author.username)
@@ -0,0 +1,17 @@
+"""
+Настройки проекта yatube.
+
+Профиль выбирается переменной окружения DJANGO_ENV: dev (по умолчанию)
+- разработка с DEBUG и debug_toolbar, prod - боевой режим без отладки,
+с кэшем шаблонов и постоянными соединениями с базой.
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+if os.getenv('DJANGO_ENV', default='dev') == 'prod':
+    from .prod import *  # noqa: F401,F403
+else:
+    from .dev import *  # noqa: F401,F403
@@ -0,0 +1,308 @@
+"""
+Django settings for yatube project: common part of all profiles.
+
+Generated by 'django-admin startproject' using Django 2.2.19.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/2.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/2.2/ref/settings/
+"""
+
+import os
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+BASE_DIR = os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.getenv('SECRET_KEY', default='your_secret_key')
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', default='*').split(' ')
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'posts.apps.PostsConfig',
+    'users.apps.UsersConfig',
+    'core.apps.CoreConfig',
+    'about.apps.AboutConfig',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+
+TEMPLATES = [
+    {
+        'BACKEND': 'core.template_backends.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    }
+}
+
+# Реплики только для чтения: пути к файлам SQLite через пробел.
+# Синхронизируются с основной базой командой sync_replicas.
+DATABASE_REPLICAS = os.getenv('DATABASE_REPLICAS', default='').split()
+
+for number, path in enumerate(DATABASE_REPLICAS):
+    DATABASES[f'replica_{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
+# Сколько секунд после записи пользователь читает с основной базы.
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', default=5))
+
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+STATIC_URL = '/static/'
+
+STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+
+LOGIN_URL = 'users:login'
+
+LOGIN_REDIRECT_URL = 'posts:index'
+
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+COUNT_PER_PAGE = 10
+
+COMMENTS_PER_PAGE = 20
+
+GROUPS_PER_PAGE = 50
+
+ABSTRACT_CREATED_OBJECT_FOR_TESTS = 1
+
+SYMBOLS_FOR_TEXT_POST_STR = 15
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+MEDIA_URL = '/media/'
+
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Срок кэширования медиафайлов с именами из хэша содержимого
+# (картинки постов и их миниатюры): содержимое по такому URL
+# не меняется, поэтому они отдаются с Cache-Control: immutable.
+MEDIA_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+# Бэкенд кэша: 'locmem' - память процесса, 'sqlite' - файл
+# CACHE_LOCATION, общий для всех процессов сервера
+# (core.cache_backends.SQLiteCache, LRU-вытеснение по числу записей
+# и размеру в байтах).
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', default='locmem')
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sqlite': {
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', default=os.path.join(BASE_DIR, 'cache.sqlite3')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', default=10000)),
+            'MAX_SIZE': int(os.getenv('CACHE_MAX_SIZE', default=64 * 2 ** 20)),
+        },
+    },
+}
+
+CACHES = {'default': CACHE_BACKENDS[CACHE_BACKEND]}
+
+# Максимальное число подписчиков автора, при котором новый пост
+# раскладывается по их лентам сразу (fan-out on write). Посты авторов
+# с большим числом подписчиков подтягиваются в ленту при её чтении.
+TIMELINE_FANOUT_LIMIT = 1000
+
+# Сколько последних постов автора добавляется в ленту при подписке
+# и при подтягивании постов популярных авторов.
+TIMELINE_BACKFILL_SIZE = 1000
+
+# Время жизни кэшированных фрагментов ленты, секунды. Фрагменты
+# инвалидируются сигналами при изменении постов и групп.
+FEED_CACHE_TIMEOUT = 60 * 60 * 3
+
+# Защита кэша от одновременного пересчета (core.cache): сколько секунд
+# воркер держит блокировку пересчета и насколько рано (beta > 1 - раньше)
+# значение начинает пересчитываться до истечения срока.
+CACHE_LOCK_TIMEOUT = 10
+
+CACHE_EARLY_EXPIRATION_BETA = 1.0
+
+# Размер пула потоков, обрабатывающего картинки постов после загрузки
+# и создающего миниатюры. 0 - делать это сразу, в текущем потоке.
+POST_THUMBNAIL_WORKERS = int(os.getenv('POST_THUMBNAIL_WORKERS', default=2))
+
+# Обработка загруженных картинок постов (posts.images): большая сторона
+# уменьшается до POST_IMAGE_MAX_SIZE пикселей, картинка перекодируется
+# в 'webp', 'jpeg' или 'auto' (WebP, если Pillow его поддерживает).
+# Загрузки больше POST_IMAGE_MAX_UPLOAD_SIZE байт форма отклоняет.
+POST_IMAGE_MAX_SIZE = int(os.getenv('POST_IMAGE_MAX_SIZE', default=1920))
+
+POST_IMAGE_FORMAT = os.getenv('POST_IMAGE_FORMAT', default='auto')
+
+POST_IMAGE_QUALITY = 85
+
+POST_IMAGE_MAX_UPLOAD_SIZE = 20 * 2 ** 20
+
+# Команда collect_images удаляет картинки без постов, к которым больше
+# POST_IMAGE_GC_GRACE секунд не обращались при сохранении.
+POST_IMAGE_GC_GRACE = 24 * 60 * 60
+
+# Загрузки больше этого размера пишутся во временный файл по частям,
+# а не держатся в памяти.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2 ** 20
+
+# Полнотекстовый поиск: 'auto' - SQLite FTS5, если доступен, иначе
+# инвертированный индекс в таблице SearchTerm; 'python' - всегда
+# инвертированный индекс. Поиск возвращает не больше
+# SEARCH_MAX_RESULTS самых релевантных постов.
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', default='auto')
+
+SEARCH_MAX_RESULTS = 1000
+
+# Частота записей на пользователя (для анонима - на IP) по областям
+# core.ratelimit: '<число>/<s|m|h|d>'. Сверх нее запрос получает 429.
+RATE_LIMITS = {
+    'post_create': os.getenv('RATE_LIMIT_POST_CREATE', default='10/m'),
+    'add_comment': os.getenv('RATE_LIMIT_ADD_COMMENT', default='30/m'),
+    'follow': os.getenv('RATE_LIMIT_FOLLOW', default='60/m'),
+}
+
+# PRAGMA, которые core.sqlite выполняет на каждом новом соединении
+# SQLite: журнал WAL, чтобы чтение не ждало запись, ожидание
+# блокировки (мс), кэш страниц (отрицательное значение - в КиБ) и mmap
+# (байты).
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', default='wal'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', default='normal'),
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', default=5000)),
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', default=-64000)),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', default=268435456)),
+}
+
+# Доля запросов, для которых core.middleware.PerformanceMiddleware
+# собирает метрики (SQL, шаблоны, кэш, размер ответа), добавляет
+# заголовок Server-Timing и передает их в PERF_METRICS_SINK.
+PERF_SAMPLE_RATE = float(os.getenv('PERF_SAMPLE_RATE', default=0.01))
+
+PERF_METRICS_SINK = os.getenv(
+    'PERF_METRICS_SINK', default='core.perf.log_sink')
+
+# Под тестами (manage.py test, pytest) метрики в консоль не пишутся.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yatube.performance': {
+            'handlers': ['console'],
+            'level': os.getenv('PERF_LOG_LEVEL',
+                               default='WARNING' if TESTING else 'INFO'),
+            'propagate': False,
+        },
+    },
+}
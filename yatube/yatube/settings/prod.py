@@ -0,0 +1,34 @@
+"""
+Боевой профиль: без DEBUG и debug_toolbar, шаблоны компилируются
+один раз (cached loader), соединения с базой переиспользуются
+между запросами CONN_MAX_AGE секунд, кэш по умолчанию общий
+для воркеров (SQLite-файл).
+"""
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import CACHE_BACKENDS, DATABASES, TEMPLATES
+
+DEBUG = False
+
+TEMPLATES = [dict(
+    TEMPLATES[0],
+    APP_DIRS=False,
+    OPTIONS=dict(TEMPLATES[0]['OPTIONS'], loaders=[
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]),
+)]
+
+CONN_MAX_AGE = int(os.getenv('CONN_MAX_AGE', default=60))
+
+DATABASES = {
+    alias: dict(database, CONN_MAX_AGE=CONN_MAX_AGE)
+    for alias, database in DATABASES.items()
+}
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', default='sqlite')
+
+CACHES = {'default': CACHE_BACKENDS[CACHE_BACKEND]}